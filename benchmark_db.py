@@ -0,0 +1,124 @@
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from src.config.settings import DATABASE_URL
+from src.infrastructure.persistence.database import get_engine
+from src.infrastructure.persistence.migrations import (
+    run_migrations, create_indexes, create_closed_order_index, INDEXES, CLOSED_ORDER_INDEXES,
+)
+from src.infrastructure.persistence.postgres_repo import get_repository, Trade
+
+TRADE_SPACING = timedelta(minutes=1)  # History grows backwards in time, so
+EQUITY_SPACING = timedelta(seconds=10)  # the last-24h windows stay the same size
+OPEN_SYMBOLS = 5
+INSERT_CHUNK = 20000
+
+
+def insert_history(engine, table, start, count, spacing, now):
+    if table == "trades":
+        sql = text(
+            "INSERT INTO trades (symbol, side, entry, amount, margin, best_price, atr, "
+            "breakeven_active, dca_count, status, created_at, closed_at, pnl, exit_reason) "
+            "VALUES (:symbol, 'LONG', 100, 1, 10, 100, 1, false, 0, 'CLOSED', :created_at, :closed_at, 0.5, 'TP')")
+    else:
+        sql = text(
+            'INSERT INTO equity_history ("timestamp", balance, equity, total_pnl) '
+            "VALUES (:at, 1000, 1000, 0)")
+    for offset in range(start, start + count, INSERT_CHUNK):
+        rows = []
+        for i in range(offset, min(offset + INSERT_CHUNK, start + count)):
+            at = now - spacing * i
+            if table == "trades":
+                rows.append({"symbol": f"SYM{i % 200}/USDT:USDT",
+                             "created_at": at - timedelta(minutes=30), "closed_at": at})
+            else:
+                rows.append({"at": at})
+        with engine.begin() as conn:
+            conn.execute(sql, rows)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def open_trade_lookup(repo):
+    # save_trade's lookup when a new position opens (no OPEN row to find)
+    session = repo.Session()
+    session.query(Trade).filter_by(symbol="SYM150/USDT:USDT", status="OPEN").first()
+    session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the trade/equity queries as history grows")
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="Final number of closed trades and equity rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-indexes", action="store_true",
+                        help="Drop the query indexes first, for a baseline")
+    args = parser.parse_args()
+
+    if not DATABASE_URL:
+        # Millions of synthetic rows must never land in the trading database
+        print("❌ Set DATABASE_URL to a scratch database to run the benchmark.")
+        return
+
+    engine = get_engine()
+    run_migrations()
+    repo = get_repository()
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM trades"))
+        conn.execute(text("DELETE FROM equity_history"))
+        if args.no_indexes:
+            for name, _ in INDEXES + CLOSED_ORDER_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if not args.no_indexes:
+        # Restores indexes dropped by an earlier --no-indexes run
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            create_indexes(conn)
+            create_closed_order_index(conn)
+
+    now = datetime.now(timezone.utc)
+    for i in range(OPEN_SYMBOLS):
+        repo.save_trade({"symbol": f"SYM{i}/USDT:USDT", "side": "LONG",
+                         "entry": 100, "amount": 1})
+    since = (now - timedelta(days=1)).replace(tzinfo=None).isoformat()
+
+    stages = []
+    size = 10_000
+    while size < args.rows:
+        stages.append(size)
+        size *= 10
+    stages.append(args.rows)
+
+    print(f"{'rows':>10} | {'open trades':>11} | {'new lookup':>11} | "
+          f"{'closed 24h':>10} | {'equity 24h':>10}   (median ms)")
+    inserted = 0
+    for size in stages:
+        insert_history(engine, "trades", inserted, size - inserted, TRADE_SPACING, now)
+        insert_history(engine, "equity_history", inserted, size - inserted, EQUITY_SPACING, now)
+        inserted = size
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE trades"))
+            conn.execute(text("ANALYZE equity_history"))
+
+        results = [
+            timed(repo.load_trades, args.repeat),
+            timed(lambda: open_trade_lookup(repo), args.repeat),
+            timed(lambda: repo.load_closed_trades(since), args.repeat),
+            # Raw rows, the newest tier (rollups are read by load_equity_series)
+            timed(lambda: repo.load_equity_history(since), args.repeat),
+        ]
+        print(f"{size:>10} | {results[0]:>11.2f} | {results[1]:>11.2f} | "
+              f"{results[2]:>10.2f} | {results[3]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
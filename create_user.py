@@ -1,4 +1,5 @@
-from src.infrastructure.persistence.postgres_repo import PostgresRepository
+from src.infrastructure.persistence.postgres_repo import get_repository
+from src.infrastructure.persistence.migrations import run_migrations
 import getpass
 
 
@@ -13,7 +14,8 @@ def main():
         return
 
     try:
-        repo = PostgresRepository()
+        run_migrations()
+        repo = get_repository()
         repo.create_user(username, password)
         print(f"✅ User '{username}' created successfully!")
     except Exception as e:
@@ -4,7 +4,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import time
 from datetime import datetime, timedelta
-from src.infrastructure.persistence.postgres_repo import PostgresRepository
+from src.infrastructure.persistence.postgres_repo import get_repository
+from src.infrastructure.persistence.database import pool_stats
 from src.config.settings import INITIAL_PAPER_BALANCE
 
 # --- PAGE CONFIG ---
@@ -59,7 +60,7 @@ st.markdown("""
 
 @st.cache_resource
 def get_repo(v=1):
-    return PostgresRepository()
+    return get_repository()
 
 
 repo = get_repo(v=3)  # Inc version to force reload
@@ -97,6 +98,10 @@ with st.sidebar:
     st.title("⚡ AI Trader Pro")
     st.markdown("---")
     st.metric("Bot Status", "Active", "Running")
+    pool = pool_stats()
+    if pool.get("initialized"):
+        st.caption(
+            f"DB pool: {pool['checked_out']}/{pool['size']} in use, overflow {pool['overflow']}")
 
     if st.button("🔄 Refresh Data"):
         st.rerun()
@@ -132,7 +137,7 @@ state_bal = repo.load_state_value("paper_balance", INITIAL_PAPER_BALANCE)
 total_pnl = repo.load_state_value("total_pnl", 0.0)
 active_trades = repo.load_trades()
 closed_trades = repo.load_closed_trades()
-equity_history = repo.load_equity_history()
+equity_history = repo.load_equity_series()
 
 # 2. Top Metrics (Performance Cards)
 st.markdown("### 🚀 Account Overview")
@@ -1,5 +1,9 @@
 from src.application.bot import TradingBot
+from src.infrastructure.persistence.migrations import run_migrations
+from src.config.settings import AUTO_MIGRATE
 
 if __name__ == "__main__":
+    if AUTO_MIGRATE:
+        run_migrations()
     bot = TradingBot()
     bot.run()
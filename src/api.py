@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from src.interfaces.api import routes
 from src.application.bot import TradingBot
+from src.infrastructure.persistence.migrations import run_migrations
+from src.config.settings import AUTO_MIGRATE
 import threading
 
 app = FastAPI(
@@ -30,6 +32,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Schema first: the bot loads its state as soon as it is created
+if AUTO_MIGRATE:
+    run_migrations()
+
 # Initialize Bot
 bot = TradingBot()
 # Update the dependency in routes
@@ -1,20 +1,50 @@
-import time
 import threading
-from src.config.settings import RISK_PER_TRADE_PCT, MIN_TRADE_SIZE, LEVERAGE, REAL_TRADING, MAX_POSITIONS, MAX_DAILY_LOSS_PCT
+from src.config.settings import LEVERAGE, REAL_TRADING, MAX_POSITIONS, MAX_DAILY_LOSS_PCT, ASYNC_SCAN, SCAN_UNIVERSE_SIZE, USE_WS_FEED, USE_EXIT_ENGINE, MAX_DCA, USE_PROTECTIVE_ORDERS, PROTECTIVE_AMEND_WORKER, FLATTEN_ON_STOP, FLATTEN_ON_CIRCUIT_BREAKER
 from src.infrastructure.exchange.client import exchange_client
+from src.infrastructure.clock import clock
+from src.infrastructure.exchange.ticker_snapshot import ticker_snapshot
+from src.infrastructure.exchange.ws_feed import price_feed
+from src.infrastructure.exchange.tape import tape_writer, record_price
 from src.infrastructure.persistence.state import TradeManager
+from src.infrastructure.persistence.equity_rollups import EquityCompactor
 from src.infrastructure.notification.discord import log_to_discord
 from src.domain.analysis.market import fetch_data, get_dynamic_symbols, get_market_regime
 from src.domain.analysis.ai_scanner import get_ai_signal
+from src.domain.analysis.scanner import MarketScanner
+from src.domain.analysis.regime import regime_service
 from src.infrastructure.notification.telegram_bot import TelegramService
+from src.application.exit_engine import ExitEngine
+from src.application.order_manager import OrderManager
+from src.application.protective_orders import ProtectiveOrders
+from src.domain.trading.exit_rules import price_move_pct, dca_due, entry_margin
 
 
 class TradingBot:
     def __init__(self):
-        self.manager = TradeManager(exchange_client)
+        self.manager = TradeManager(exchange_client, ticker_snapshot)
+        regime_service.bind_repo(self.manager.repo)
         self.stop_requested = False
         self.running = False
         self.thread = None
+        self.scanner = MarketScanner()
+        self.candidates = set()
+        self.pending_scan = None
+        # Guards trade state shared by the loop and the exit engine
+        self.trade_lock = threading.RLock()
+        self.exit_engine = ExitEngine(
+            self.manager, self.close_position, self.trade_lock)
+        price_feed.add_listener(self.exit_engine.on_price)
+        self.order_manager = OrderManager(
+            exchange_client, self._on_entry_complete)
+        if tape_writer:
+            price_feed.add_listener(record_price)
+        self.protection = None
+        if USE_PROTECTIVE_ORDERS:
+            self.protection = ProtectiveOrders(
+                exchange_client, self.manager.repo, self.manager.params, paper=not REAL_TRADING)
+            self.manager.on_trade_update = self.protection.update
+            price_feed.add_listener(self.protection.on_price)
+        self.compactor = EquityCompactor(self.manager.repo)
         self.telegram = TelegramService(self)
         self.telegram.start()
 
@@ -24,20 +54,23 @@ class TradingBot:
         else:
             return self.manager.state["paper_balance"]
 
+    def get_price(self, symbol):
+        # Live WebSocket price first, shared REST snapshot as fallback
+        price = price_feed.get_price(symbol) if USE_WS_FEED else None
+        if price is None:
+            price = ticker_snapshot.fetch_ticker(symbol)["last"]
+        return price
+
     def set_leverage(self, symbol):
         exchange_client.set_leverage(symbol)
 
     def open_position(self, symbol, side, available_balance, atr_value):
-        target_margin = available_balance * RISK_PER_TRADE_PCT
-        if target_margin < MIN_TRADE_SIZE:
-            if available_balance > MIN_TRADE_SIZE:
-                target_margin = MIN_TRADE_SIZE
-            else:
-                target_margin = available_balance * 0.95
-            if target_margin < 1.0:
-                return
-
-        ticker = exchange_client.fetch_ticker(symbol)
+        target_margin = float(entry_margin(
+            available_balance, self.manager.params))
+        if target_margin == 0:
+            return
+
+        ticker = ticker_snapshot.fetch_ticker(symbol)
         price = ticker["last"]
         amount_coins = (target_margin * LEVERAGE) / price
 
@@ -54,86 +87,134 @@ class TradingBot:
         if REAL_TRADING:
             self.set_leverage(symbol)
             try:
-                # Attempt Limit Order (Maker)
+                # Maker limit order; the order manager tracks fills and the market fallback
                 limit_price = ticker["bid"] if side == "LONG" else ticker["ask"]
-                print(f"⏳ Placing Limit {side} Order at {limit_price}...")
-
-                order = None
-                if side == "LONG":
-                    order = exchange_client.create_limit_buy_order(
-                        symbol, amount_coins, limit_price)
-                elif side == "SHORT":
-                    order = exchange_client.create_limit_sell_order(
-                        symbol, amount_coins, limit_price)
-
-                # Wait for fill (Simple blocking for MVP)
-                for _ in range(10):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-
-                # Check Order Status
-                fetched = exchange_client.fetch_order(order["id"], symbol)
-                if fetched["status"] == "open":
-                    print("⏳ Limit Order not filled. Cancelling and Market Buying...")
-                    exchange_client.cancel_order(order["id"], symbol)
-                    # Fallback to Market
-                    if side == "LONG":
-                        exchange_client.create_market_buy_order(
-                            symbol, amount_coins)
-                    elif side == "SHORT":
-                        exchange_client.create_market_sell_order(
-                            symbol, amount_coins)
-                else:
-                    print("✅ Limit Order Filled!")
+                self.order_manager.submit(
+                    symbol, side, amount_coins, limit_price,
+                    meta={"margin": target_margin, "atr": atr_value})
             except Exception as e:
                 log_to_discord(f"❌ Execution Failed: {e}", "error")
-                return
-
-        self.manager.add_trade(
-            symbol,
-            {
-                "symbol": symbol,
-                "side": side,
-                "entry": price,
-                "amount": amount_coins,
-                "margin": target_margin,
-                "best_price": price,
-                "atr": atr_value,
-                "breakeven_active": False,
-            },
-        )
+            return
 
-    def close_position(self, symbol, reason):
-        if symbol not in self.manager.state["trades"]:
+        with self.trade_lock:
+            self.manager.add_trade(
+                symbol,
+                {
+                    "symbol": symbol,
+                    "side": side,
+                    "entry": price,
+                    "amount": amount_coins,
+                    "margin": target_margin,
+                    "best_price": price,
+                    "atr": atr_value,
+                    "breakeven_active": False,
+                },
+            )
+            if self.protection:
+                self.protection.place(
+                    symbol, self.manager.state["trades"][symbol])
+
+    def _on_entry_complete(self, task):
+        symbol = task["symbol"]
+        if task["filled"] <= 0:
+            log_to_discord(
+                f"❌ Entry for {symbol} ended {task['state']} with nothing filled", "error")
             return
-        trade = self.manager.state["trades"][symbol]
-        ticker = exchange_client.fetch_ticker(symbol)
-        exit_price = ticker["last"]
 
-        if REAL_TRADING:
-            try:
+        # Margin scales with what actually filled
+        fill_ratio = task["filled"] / task["amount"]
+        margin = task["meta"]["margin"] * fill_ratio
+        with self.trade_lock:
+            self.manager.add_trade(
+                symbol,
+                {
+                    "symbol": symbol,
+                    "side": task["side"],
+                    "entry": task["average"],
+                    "amount": task["filled"],
+                    "margin": margin,
+                    "best_price": task["average"],
+                    "atr": task["meta"]["atr"],
+                    "breakeven_active": False,
+                },
+            )
+            if self.protection:
+                self.protection.place(
+                    symbol, self.manager.state["trades"][symbol])
+        print(
+            f"✅ {symbol} entry {task['state']}: {task['filled']:.6f} @ {task['average']:.6f} "
+            f"(limit {task['limit_filled']:.6f}, market {task['market_filled']:.6f})")
+
+    def close_position(self, symbol, reason, exit_price=None, send_order=True):
+        """`send_order=False` books a position the exchange already closed."""
+        self.close_positions([(symbol, reason, exit_price, send_order)])
+
+    def close_positions(self, closes):
+        """
+        Closes several positions with one batch order.
+        `closes` are (symbol, reason, exit_price, send_order) tuples; returns
+        (closed, failed) symbols. A position whose close order is rejected
+        stays open.
+        """
+        booked = []
+        failed = []
+        with self.trade_lock:
+            pending = []
+            orders = []
+            for symbol, reason, exit_price, send_order in closes:
+                if symbol not in self.manager.state["trades"] or symbol in [p[0] for p in pending]:
+                    continue
+                trade = self.manager.state["trades"][symbol]
+
+                if self.protection:
+                    protective = self.protection.cancel(symbol)
+                    if protective and protective["state"] == "triggered" and send_order:
+                        # The exchange-side stop beat us to it; a market order would reopen
+                        send_order = False
+                        exit_price = protective["price"]
+                        reason = f"{reason} (exchange)"
+                if exit_price is None:
+                    exit_price = self.get_price(symbol)
+                pending.append((symbol, trade, reason, exit_price))
+
+                if REAL_TRADING and send_order:
+                    orders.append({
+                        "symbol": symbol,
+                        "side": "sell" if trade["side"] == "LONG" else "buy",
+                        "amount": trade["amount"],
+                        "reduce_only": True,
+                    })
+
+            if orders:
+                for result in exchange_client.create_market_orders(orders):
+                    if not result["ok"]:
+                        failed.append(result["symbol"])
+                        log_to_discord(
+                            f"❌ Close Failed for {result['symbol']}: {result['error']}", "error")
+                        if self.protection:
+                            # Still open, so still needs its stop
+                            self.protection.place(
+                                result["symbol"], self.manager.state["trades"][result["symbol"]])
+
+            for symbol, trade, reason, exit_price in pending:
+                if symbol in failed:
+                    continue
                 if trade["side"] == "LONG":
-                    exchange_client.create_market_sell_order(
-                        symbol, trade["amount"])
-                elif trade["side"] == "SHORT":
-                    exchange_client.create_market_buy_order(
-                        symbol, trade["amount"])
-            except Exception as e:
-                log_to_discord(f"❌ Close Failed: {e}", "error")
+                    pnl = (exit_price - trade["entry"]) * trade["amount"]
+                else:
+                    pnl = (trade["entry"] - exit_price) * trade["amount"]
 
-        if trade["side"] == "LONG":
-            pnl = (exit_price - trade["entry"]) * trade["amount"]
-        else:
-            pnl = (trade["entry"] - exit_price) * trade["amount"]
+                # Calculate ROI%
+                margin = trade.get("margin", 0)
+                if margin == 0:
+                    margin = (trade["amount"] * trade["entry"]) / LEVERAGE
+                roi_pct = (pnl / margin) * 100 if margin > 0 else 0
 
-        # Calculate ROI%
-        margin = trade.get("margin", 0)
-        if margin == 0:
-            margin = (trade["amount"] * trade["entry"]) / LEVERAGE
-        roi_pct = (pnl / margin) * 100 if margin > 0 else 0
+                self.manager.remove_trade(symbol, pnl, exit_reason=reason)
+                booked.append((symbol, reason, pnl, roi_pct))
 
-        self.manager.remove_trade(symbol, pnl, exit_reason=reason)
+        if not booked:
+            return [], failed
 
         new_total_pnl = self.manager.state["total_pnl"]
         new_balance = (
@@ -146,16 +227,70 @@ class TradingBot:
             if new_total_pnl >= 0
             else f"-${abs(new_total_pnl):.2f}"
         )
-        trade_pnl_str = f"+${pnl:.2f}" if pnl >= 0 else f"-${abs(pnl):.2f}"
-        roi_str = f"+{roi_pct:.2f}%" if roi_pct >= 0 else f"{roi_pct:.2f}%"
-
+        for symbol, reason, pnl, roi_pct in booked:
+            trade_pnl_str = f"+${pnl:.2f}" if pnl >= 0 else f"-${abs(pnl):.2f}"
+            roi_str = f"+{roi_pct:.2f}%" if roi_pct >= 0 else f"{roi_pct:.2f}%"
+
+            log_to_discord(
+                f"🛑 **CLOSING**: {symbol}\n"
+                f"📜 Reason: {reason}\n"
+                f"💵 Trade PnL: **{trade_pnl_str} ({roi_str})**\n"
+                f"💳 New Balance: **${new_balance:.2f}**\n"
+                f"💰 Total PnL: **{total_str}**"
+            )
+        return [b[0] for b in booked], failed
+
+    def execute_dca(self, adds):
+        """Adds the same amount again to each (symbol, price) position, one batch order for all."""
+        with self.trade_lock:
+            adds = [(s, p) for s, p in adds if s in self.manager.state["trades"]]
+            failed = set()
+            if REAL_TRADING and adds:
+                orders = []
+                for symbol, _ in adds:
+                    trade = self.manager.state["trades"][symbol]
+                    orders.append({
+                        "symbol": symbol,
+                        "side": "buy" if trade["side"] == "LONG" else "sell",
+                        # Buy same amount (Martingale would be amount * 2)
+                        "amount": trade["amount"],
+                    })
+                for result in exchange_client.create_market_orders(orders):
+                    if not result["ok"]:
+                        failed.add(result["symbol"])
+                        log_to_discord(
+                            f"❌ DCA Failed for {result['symbol']}: {result['error']}", "error")
+
+            for symbol, current_price in adds:
+                if symbol in failed:
+                    continue
+                # Paper fills at current_price
+                trade = self.manager.state["trades"][symbol]
+                amount = trade["amount"]
+                dca_count = trade.get("dca_count", 0)
+                new_total_amt = amount * 2
+                new_margin = trade["margin"] * 2  # Approx
+                # Weighted Avg Entry
+                new_entry = (trade["entry"] * amount +
+                             current_price * amount) / new_total_amt
+                self.manager.update_trade_entry(
+                    symbol, new_entry, new_total_amt, new_margin)
+                log_to_discord(
+                    f"♻️ **DCA Executed** for {symbol}\nNew Entry: ${new_entry:.4f}\nCount: {dca_count + 1}/{MAX_DCA}")
+
+    def flatten_all(self, reason="FLATTEN"):
+        """Market-closes every open position in as few requests as possible."""
+        with self.trade_lock:
+            symbols = list(self.manager.state["trades"].keys())
+        if not symbols:
+            return [], []
+        print(f"🧹 Flattening {len(symbols)} positions ({reason})...")
+        closed, failed = self.close_positions(
+            [(symbol, reason, None, True) for symbol in symbols])
         log_to_discord(
-            f"🛑 **CLOSING**: {symbol}\n"
-            f"📜 Reason: {reason}\n"
-            f"💵 Trade PnL: **{trade_pnl_str} ({roi_str})**\n"
-            f"💳 New Balance: **${new_balance:.2f}**\n"
-            f"💰 Total PnL: **{total_str}**"
-        )
+            f"🧹 **FLATTEN** ({reason}): closed {len(closed)}, failed {len(failed)}"
+            + (f"\n❌ {', '.join(failed)}" if failed else ""))
+        return closed, failed
 
     def start(self):
         if self.running:
@@ -164,6 +299,16 @@ class TradingBot:
 
         self.running = True
         self.stop_requested = False
+        if USE_WS_FEED:
+            price_feed.track(self.manager.state["trades"].keys())
+            price_feed.start()
+            if USE_EXIT_ENGINE:
+                self.exit_engine.start()
+        if REAL_TRADING:
+            self.order_manager.start()
+        if self.protection and PROTECTIVE_AMEND_WORKER:
+            self.protection.start()
+        self.compactor.start()
         self.thread = threading.Thread(target=self.run_loop, daemon=True)
         self.thread.start()
         print(f"🤖 **AI TRADER STARTED** (Background Thread)")
@@ -178,6 +323,18 @@ class TradingBot:
         self.stop_requested = True
         if self.thread:
             self.thread.join(timeout=5)
+        if FLATTEN_ON_STOP:
+            self.flatten_all("BOT_STOP")
+        self.order_manager.stop()
+        if self.protection:
+            self.protection.stop()
+        self.exit_engine.stop()
+        price_feed.stop()
+        self.compactor.stop()
+        try:
+            self.manager.flush()
+        except Exception as e:
+            print(f"❌ Persistence flush on stop failed: {e}")
         log_to_discord("🛑 Bot Stopped via API")
 
     def get_status(self):
@@ -185,7 +342,11 @@ class TradingBot:
             "running": self.running,
             "balance": self.manager.state.get("paper_balance", 0.0),
             "open_positions": len(self.manager.state.get("trades", {})),
-            "total_pnl": self.manager.state.get("total_pnl", 0.0)
+            "total_pnl": self.manager.state.get("total_pnl", 0.0),
+            "exit_engine": self.exit_engine.stats() if self.exit_engine.running else None,
+            "pending_orders": self.order_manager.active_count(),
+            "protective_orders": len(self.protection.snapshot()) if self.protection else 0,
+            "equity_rollups": self.compactor.snapshot(),
         }
 
     def run_loop(self):
@@ -195,10 +356,35 @@ class TradingBot:
                 break
 
             try:
+                # Without the worker thread (replay), entry orders advance once per tick
+                if REAL_TRADING and not self.order_manager.running:
+                    self.order_manager.step()
+
+                # Positions the exchange-side stop/take-profit already closed
+                if self.protection:
+                    with self.trade_lock:
+                        triggered = self.protection.poll(
+                            dict(self.manager.state["trades"]))
+                    self.close_positions([
+                        (symbol, f"{reason} (${price:.4f}, exchange)", price, False)
+                        for symbol, reason, price in triggered])
+                    # Without the worker thread (replay), amends go out once per tick
+                    if not self.protection.running:
+                        self.protection.send_amends()
+
                 # PHASE 1: MANAGE
                 active_symbols = list(self.manager.state["trades"].keys())
                 total_realized_pnl = self.manager.state["total_pnl"]
 
+                # One bulk ticker call per tick, shared by every consumer below
+                try:
+                    ticker_snapshot.refresh(active_symbols)
+                except Exception as e:
+                    print(f"⚠️ Ticker refresh failed: {e}")
+
+                if USE_WS_FEED:
+                    price_feed.track(set(active_symbols) | self.candidates)
+
                 # Sync Balance & Log Equity (Always run this)
                 current_bal, current_equity = self.manager.sync_balance()
 
@@ -206,64 +392,38 @@ class TradingBot:
                     f"\n--- 💳 Balance: ${current_bal:.2f} | 💰 Profit: ${total_realized_pnl:.4f} ---"
                 )
 
+                # Exits and DCA adds are collected and sent as one batch each
+                exits = []
+                dca_adds = []
                 for symbol in active_symbols:
-                    trade = self.manager.state["trades"][symbol]
-                    ticker = exchange_client.fetch_ticker(symbol)
-                    current_price = ticker["last"]
+                    # The exit engine may have closed it since the tick started
+                    trade = self.manager.state["trades"].get(symbol)
+                    if trade is None:
+                        continue
+                    current_price = self.get_price(symbol)
+                    if self.protection:
+                        self.protection.on_price(symbol, current_price)
                     entry_price = trade["entry"]
                     side = trade["side"]
-                    amount = trade["amount"]
                     dca_count = trade.get("dca_count", 0)
 
-                    # DCA Logic (Max 2 DCAs, 2% Step)
-                    DCA_STEP = 0.02  # TEMP FOR VERIFICATION
-                    MAX_DCA = 2
+                    # DCA Logic (MAX_DCA adds, DCA_STEP_PCT apart)
+                    is_long = side == "LONG"
+                    pnl_pct = float(price_move_pct(
+                        is_long, entry_price, current_price))
 
-                    pnl_pct = 0.0
-                    if side == "LONG":
-                        pnl_pct = (current_price - entry_price) / entry_price
-                    elif side == "SHORT":
-                        pnl_pct = (entry_price - current_price) / entry_price
-
-                    if pnl_pct <= -DCA_STEP and dca_count < MAX_DCA:
+                    if dca_due(is_long, entry_price, current_price, dca_count, self.manager.params):
                         print(
                             f"📉 DCA Triggered for {symbol} (PnL: {pnl_pct*100:.2f}%)")
+                        dca_adds.append((symbol, current_price))
+                        continue  # Skip exit check this tick
 
-                        # Execute DCA Order
-                        try:
-                            # Buy same amount (Martingale would be amount * 2)
-                            dca_amount = amount
-                            # Execute Order
-                            if REAL_TRADING:
-                                if side == "LONG":
-                                    exchange_client.create_market_buy_order(
-                                        symbol, dca_amount)
-                                elif side == "SHORT":
-                                    exchange_client.create_market_sell_order(
-                                        symbol, dca_amount)
-                            else:
-                                pass  # Paper fill at current_price
-
-                            # Update State
-                            new_total_amt = amount + dca_amount
-                            new_margin = trade["margin"] * 2  # Approx
-                            # Weighted Avg Entry
-                            total_cost = (entry_price * amount) + \
-                                (current_price * dca_amount)
-                            new_entry = total_cost / new_total_amt
-
-                            self.manager.update_trade_entry(
-                                symbol, new_entry, new_total_amt, new_margin)
-                            log_to_discord(
-                                f"♻️ **DCA Executed** for {symbol}\nNew Entry: ${new_entry:.4f}\nCount: {dca_count + 1}/{MAX_DCA}")
-                            continue  # Skip exit check this tick
-                        except Exception as e:
-                            log_to_discord(f"❌ DCA Failed: {e}", "error")
-
-                    self.manager.update_trailing(symbol, current_price)
-                    exit_reason, exit_price = self.manager.check_exit_conditions(
-                        symbol, current_price
-                    )
+                    # Polled check stays as a backstop to the exit engine
+                    with self.trade_lock:
+                        self.manager.update_trailing(symbol, current_price)
+                        exit_reason, exit_price = self.manager.check_exit_conditions(
+                            symbol, current_price
+                        )
 
                     if trade["side"] == "LONG":
                         # Use new entry/amount
@@ -292,11 +452,17 @@ class TradingBot:
                     )
 
                     if exit_reason:
-                        self.close_position(
-                            symbol, f"{exit_reason} (${exit_price:.4f})")
+                        exits.append(
+                            (symbol, f"{exit_reason} (${exit_price:.4f})", None, True))
+
+                if exits:
+                    self.close_positions(exits)
+                if dca_adds:
+                    self.execute_dca(dca_adds)
 
                 # PHASE 2: SCAN
-                if len(self.manager.state["trades"]) < MAX_POSITIONS:
+                # Entries still being worked count against the position limit
+                if len(self.manager.state["trades"]) + self.order_manager.active_count() < MAX_POSITIONS:
 
                     # Check Circuit Breaker
                     self.manager.reset_daily_stats_if_needed()
@@ -305,23 +471,61 @@ class TradingBot:
                     if breaker_triggered:
                         print(
                             f"🛑 CIRCUIT BREAKER TRIGGERED! Daily Loss: {daily_pnl_pct*100:.2f}% > {MAX_DAILY_LOSS_PCT*100}%")
+                        if FLATTEN_ON_CIRCUIT_BREAKER:
+                            self.flatten_all("CIRCUIT_BREAKER")
                         print("Scanning Paused for today.")
-                        time.sleep(60)  # Wait longer
+                        clock.sleep(60)  # Wait longer
                         continue
 
+                    # Refresh every reference asset in one batch; BTC drives the filter
+                    regime_service.get_regimes()
                     regime = get_market_regime()
                     print(
                         f"🔍 Scanning... Regime: {regime} (Balance: ${current_bal:.2f} | Daily: {daily_pnl_pct*100:.2f}%)")
 
-                    if current_bal > 2.0:
+                    if current_bal > 2.0 and ASYNC_SCAN:
+                        # Signals are evaluated off-thread; positions keep being
+                        # managed each tick until the batch completes
+                        if self.pending_scan is None:
+                            candidates = [
+                                s for s in get_dynamic_symbols(limit=SCAN_UNIVERSE_SIZE)
+                                if s not in self.manager.state["trades"] and not self.order_manager.pending(s)
+                            ]
+                            self.candidates = set(candidates)
+                            print(f"Analyzing {len(candidates)} symbols...")
+                            self.pending_scan = self.scanner.start_scan(
+                                candidates)
+
+                        ranked = []
+                        if self.pending_scan.done():
+                            ranked = self.pending_scan.results()
+                            self.pending_scan = None
+
+                        for result in ranked:
+                            if result["symbol"] in self.manager.state["trades"] or self.order_manager.pending(result["symbol"]):
+                                continue
+                            signal = result["signal"]
+
+                            # Regime Filter
+                            if regime == "BULL" and signal == "SHORT":
+                                continue
+                            if regime == "BEAR" and signal == "LONG":
+                                continue
+
+                            print(
+                                f"✅ SIGNAL: {result['symbol']} {signal} ({result['confidence']:.2f}) | ATR: {result['atr']:.4f}")
+                            self.open_position(
+                                result["symbol"], signal, current_bal, result["atr"])
+                            break
+                    elif current_bal > 2.0:
                         dynamic_list = get_dynamic_symbols(limit=10)
                         for symbol in dynamic_list:
-                            if symbol in self.manager.state["trades"]:
+                            if symbol in self.manager.state["trades"] or self.order_manager.pending(symbol):
                                 continue
                             print(f"Analyzing {symbol}...")
                             df = fetch_data(symbol)
                             if df is not None:
-                                signal, conf, atr = get_ai_signal(df)
+                                signal, conf, atr = get_ai_signal(df, symbol)
 
                                 # Regime Filter
                                 if regime == "BULL" and signal == "SHORT":
@@ -345,8 +549,11 @@ class TradingBot:
                 for _ in range(10):
                     if not self.running:
                         break
-                    time.sleep(1)
+                    clock.sleep(1)
 
             except Exception as e:
                 print(f"Error in loop: {e}")
-                time.sleep(5)
+                clock.sleep(5)
+
+        self.pending_scan = None
+        self.scanner.close()
@@ -0,0 +1,130 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.config.settings import EXIT_EVENT_LATENCY_BUDGET_MS
+
+
+class ExitEngine:
+    """
+    Re-runs trailing, breakeven, ATR stop and take-profit logic for a symbol
+    on every incoming price event instead of on the polling cadence.
+
+    Events are coalesced per symbol (latest price wins), so the queue never
+    holds more than one pending event per open position and per-event latency
+    stays bounded by a single pass over the open symbols. Closes are handed
+    to a dedicated execution worker so evaluation never waits on an order.
+    """
+
+    def __init__(self, manager, close_fn, lock, latency_budget_ms=EXIT_EVENT_LATENCY_BUDGET_MS):
+        self.manager = manager
+        self.close_fn = close_fn
+        self.lock = lock
+        self.latency_budget_ms = latency_budget_ms
+        self.pending = {}  # symbol -> (price, received_at)
+        self.cond = threading.Condition()
+        self.closing = set()
+        self.executor = None
+        self.thread = None
+        self.running = False
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.started_at = time.monotonic()
+        self.events = 0
+        self.evaluated = 0
+        self.coalesced = 0
+        self.over_budget = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._reset_stats()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="exit-exec")
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self.executor.shutdown(wait=True)
+
+    def on_price(self, symbol, price, received_at):
+        # PriceFeed listener, runs on the feed thread: must stay cheap
+        if not self.running or symbol not in self.manager.state["trades"]:
+            return
+        with self.cond:
+            self.events += 1
+            if symbol in self.pending:
+                self.coalesced += 1
+            self.pending[symbol] = (price, received_at)
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                batch = self.pending
+                self.pending = {}
+
+            for symbol, (price, received_at) in batch.items():
+                try:
+                    self._evaluate(symbol, price)
+                except Exception as e:
+                    print(f"⚠️ Exit evaluation failed for {symbol}: {e}")
+                self._record_latency(received_at)
+
+    def _evaluate(self, symbol, price):
+        with self.lock:
+            if symbol in self.closing or symbol not in self.manager.state["trades"]:
+                return
+            self.manager.update_trailing(symbol, price)
+            exit_reason, exit_price = self.manager.check_exit_conditions(
+                symbol, price)
+            if not exit_reason:
+                return
+            self.closing.add(symbol)
+
+        print(f"⚡ Exit Triggered for {symbol}: {exit_reason} @ {price}")
+        self.executor.submit(
+            self._close, symbol, f"{exit_reason} (${exit_price:.4f})")
+
+    def _close(self, symbol, reason):
+        try:
+            self.close_fn(symbol, reason)
+        except Exception as e:
+            print(f"⚠️ Close failed for {symbol}: {e}")
+        finally:
+            self.closing.discard(symbol)
+
+    def _record_latency(self, received_at):
+        latency_ms = (time.monotonic() - received_at) * 1000
+        self.evaluated += 1
+        self.latency_total_ms += latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        if latency_ms > self.latency_budget_ms:
+            self.over_budget += 1
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "events": self.events,
+            "evaluated": self.evaluated,
+            "coalesced": self.coalesced,
+            "events_per_sec": round(self.events / elapsed, 2),
+            "evaluations_per_sec": round(self.evaluated / elapsed, 2),
+            "avg_latency_ms": round(self.latency_total_ms / self.evaluated, 3) if self.evaluated else 0.0,
+            "max_latency_ms": round(self.latency_max_ms, 3),
+            "over_budget": self.over_budget,
+        }
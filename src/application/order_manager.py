@@ -0,0 +1,190 @@
+import threading
+from src.config.settings import ORDER_LIMIT_TIMEOUT_SECONDS, ORDER_POLL_SECONDS, ORDER_MAX_ERRORS
+from src.infrastructure.clock import clock
+
+PLACED = "PLACED"
+PARTIAL = "PARTIAL"
+MARKET = "MARKET"
+FILLED = "FILLED"
+CANCELLED = "CANCELLED"
+FAILED = "FAILED"
+FINAL_STATES = {FILLED, CANCELLED, FAILED}
+DEAD_STATUSES = {"canceled", "cancelled", "expired", "rejected"}
+
+
+class OrderManager:
+    """
+    Entry orders as independent state machines:
+    PLACED -> PARTIAL -> FILLED, or on timeout CANCELLED -> MARKET (for the
+    unfilled remainder) -> FILLED. A worker thread polls every active order
+    with step(), so the trading loop never waits on an order. Fills are
+    accumulated from each poll; `on_complete(task)` receives the final
+    filled amount and volume-weighted average price.
+    """
+
+    def __init__(self, client, on_complete, timeout=ORDER_LIMIT_TIMEOUT_SECONDS,
+                 poll_seconds=ORDER_POLL_SECONDS, max_errors=ORDER_MAX_ERRORS):
+        self.client = client
+        self.on_complete = on_complete
+        self.timeout = timeout
+        self.poll_seconds = poll_seconds
+        self.max_errors = max_errors
+        self.tasks = {}  # symbol -> task
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        while self.running:
+            try:
+                self.step()
+            except Exception as e:
+                print(f"⚠️ Order manager error: {e}")
+            clock.sleep(self.poll_seconds)
+
+    # --- Queries ---
+
+    def pending(self, symbol):
+        with self.lock:
+            return symbol in self.tasks
+
+    def active_count(self):
+        with self.lock:
+            return len(self.tasks)
+
+    def snapshot(self):
+        with self.lock:
+            return [dict(t) for t in self.tasks.values()]
+
+    # --- State machine ---
+
+    def submit(self, symbol, side, amount, limit_price, meta=None):
+        """Places the maker limit order and returns immediately."""
+        order_side = "buy" if side == "LONG" else "sell"
+        if order_side == "buy":
+            order = self.client.create_limit_buy_order(
+                symbol, amount, limit_price)
+        else:
+            order = self.client.create_limit_sell_order(
+                symbol, amount, limit_price)
+
+        task = {
+            "symbol": symbol,
+            "side": side,
+            "order_side": order_side,
+            "amount": amount,
+            "limit_price": limit_price,
+            "state": PLACED,
+            "order_id": order["id"],
+            "market_order_id": None,
+            "limit_filled": 0.0,
+            "limit_cost": 0.0,
+            "market_filled": 0.0,
+            "market_cost": 0.0,
+            "filled": 0.0,
+            "average": None,
+            "placed_at": clock.now_ms(),
+            "errors": 0,
+            "meta": meta or {},
+        }
+        with self.lock:
+            self.tasks[symbol] = task
+        print(
+            f"⏳ Limit {side} {symbol} placed at {limit_price} (order {order['id']})")
+        return task
+
+    def step(self):
+        """Advances every active order by one poll."""
+        with self.lock:
+            tasks = list(self.tasks.values())
+        for task in tasks:
+            try:
+                self._advance(task)
+                task["errors"] = 0
+            except Exception as e:
+                task["errors"] += 1
+                print(
+                    f"⚠️ Order poll failed for {task['symbol']} ({task['errors']}/{self.max_errors}): {e}")
+                if task["errors"] >= self.max_errors:
+                    self._finish(task, FAILED)
+
+    def _record(self, task, order, leg):
+        # Exchange reports cumulative fills per order; keep the latest view of each leg
+        filled = float(order.get("filled") or 0.0)
+        average = order.get("average") or order.get("price") or 0.0
+        task[f"{leg}_filled"] = filled
+        task[f"{leg}_cost"] = filled * float(average)
+        task["filled"] = task["limit_filled"] + task["market_filled"]
+        cost = task["limit_cost"] + task["market_cost"]
+        task["average"] = cost / task["filled"] if task["filled"] > 0 else None
+
+    def _remaining(self, task):
+        remaining = task["amount"] - task["filled"]
+        return remaining if remaining > task["amount"] * 1e-9 else 0.0
+
+    def _advance(self, task):
+        symbol = task["symbol"]
+        if task["state"] in (PLACED, PARTIAL):
+            order = self.client.fetch_order(task["order_id"], symbol)
+            self._record(task, order, "limit")
+            if order["status"] == "closed" or self._remaining(task) == 0:
+                self._finish(task, FILLED)
+                return
+            if task["filled"] > 0:
+                task["state"] = PARTIAL
+
+            expired = clock.now_ms() - \
+                task["placed_at"] >= self.timeout * 1000
+            if order["status"] in DEAD_STATUSES or expired:
+                if order["status"] == "open":
+                    self.client.cancel_order(task["order_id"], symbol)
+                    # Fills can land between the last poll and the cancel
+                    self._record(task, self.client.fetch_order(
+                        task["order_id"], symbol), "limit")
+                task["state"] = CANCELLED
+                remaining = self._remaining(task)
+                if remaining == 0:
+                    self._finish(task, FILLED)
+                    return
+                print(
+                    f"⏳ Limit order for {symbol} not filled ({task['filled']:.6f}/{task['amount']:.6f}), market for the rest...")
+                if task["order_side"] == "buy":
+                    market = self.client.create_market_buy_order(
+                        symbol, remaining)
+                else:
+                    market = self.client.create_market_sell_order(
+                        symbol, remaining)
+                task["market_order_id"] = market["id"]
+                task["state"] = MARKET
+
+        elif task["state"] == MARKET:
+            order = self.client.fetch_order(task["market_order_id"], symbol)
+            self._record(task, order, "market")
+            if order["status"] == "closed":
+                self._finish(task, FILLED)
+            elif order["status"] in DEAD_STATUSES:
+                self._finish(task, FAILED)
+
+    def _finish(self, task, state):
+        task["state"] = state
+        with self.lock:
+            if self.tasks.get(task["symbol"]) is task:
+                del self.tasks[task["symbol"]]
+        try:
+            self.on_complete(task)
+        except Exception as e:
+            print(f"⚠️ Order completion handler failed: {e}")
@@ -0,0 +1,230 @@
+import threading
+from src.config.settings import REAL_TRADING, PROTECTIVE_AMEND_INTERVAL_SECONDS, PROTECTIVE_MIN_MOVE_PCT
+from src.infrastructure.clock import clock
+from src.infrastructure.exchange.algo_book import PaperAlgoClient
+from src.domain.trading.exit_rules import stop_price, take_profit_price
+
+TRIGGER_REASONS = {"sl": "STOP_LOSS", "tp": "TAKE_PROFIT"}
+
+
+class ProtectiveOrders:
+    """
+    Keeps one exchange-side stop-loss/take-profit order per open position,
+    so exits still happen if the loop stalls or the process dies. Trailing
+    and breakeven moves amend the stop in place, at most once per
+    `amend_interval` per position; size changes (DCA) are due straight
+    away. update() runs under the bot's trade lock, so it only records the
+    new targets; send_amends() (the worker thread, or the loop in replay)
+    talks to the exchange without holding it. In paper mode the orders live
+    in a local PaperAlgoClient instead of on the exchange.
+    """
+
+    def __init__(self, client, repo, params, paper=not REAL_TRADING,
+                 amend_interval=PROTECTIVE_AMEND_INTERVAL_SECONDS, min_move=PROTECTIVE_MIN_MOVE_PCT):
+        self.paper = paper
+        self.client = PaperAlgoClient() if paper else client
+        self.repo = repo
+        self.params = params
+        self.amend_interval = amend_interval
+        self.min_move = min_move
+        self.lock = threading.RLock()
+        # Guards only the pending amends, so update() never waits on a request
+        self.pending_lock = threading.Lock()
+        self.dirty = {}  # symbol -> targets not yet sent to the exchange
+        self.urgent = set()  # Resized positions, amended without waiting
+        self.amended_at = {}
+        self.running = False
+        self.thread = None
+        self.wake = threading.Event()
+        # Simulated orders do not survive a restart; poll() places fresh ones
+        self.orders = {} if paper else (
+            repo.load_state_value("protective_orders", {}) or {})
+
+    def _save(self):
+        if not self.paper:
+            self.repo.save_state_value("protective_orders", self.orders)
+
+    def _targets(self, trade):
+        is_long = trade["side"] == "LONG"
+        entry = trade["entry"]
+        return {
+            "stop": float(stop_price(is_long, entry, trade.get("best_price", entry),
+                                     trade.get("atr", 0.0), trade.get("breakeven_active", False), self.params)),
+            "tp": float(take_profit_price(is_long, entry, self.params)),
+            "amount": trade["amount"],
+        }
+
+    def on_price(self, symbol, price, received_at=None):
+        if self.paper:
+            self.client.on_price(symbol, price)
+
+    # --- Order lifecycle ---
+
+    def place(self, symbol, trade):
+        with self.lock:
+            if symbol in self.orders:
+                self.cancel(symbol)
+            targets = self._targets(trade)
+            try:
+                algo_id = self.client.create_protective_orders(
+                    symbol, trade["side"], targets["amount"], targets["stop"], targets["tp"])
+            except Exception as e:
+                print(f"⚠️ Protective order for {symbol} failed: {e}")
+                return
+            self.orders[symbol] = {"id": algo_id, **targets}
+            self.amended_at[symbol] = clock.monotonic()
+            self._save()
+            print(
+                f"🛡️ Protective orders for {symbol}: SL {targets['stop']:.6f} / TP {targets['tp']:.6f}")
+
+    def update(self, symbol, trade):
+        """
+        TradeManager hook: the stop, take-profit or size of `trade` may have
+        moved. Called under the trade lock, so it never talks to the exchange.
+        """
+        order = self.orders.get(symbol)
+        if order is None:
+            return
+        targets = self._targets(trade)
+        resized = targets["amount"] != order["amount"]
+        moved = abs(targets["stop"] - order["stop"]) >= order["stop"] * self.min_move
+        with self.pending_lock:
+            if not (resized or moved or targets["tp"] != order["tp"]):
+                self.dirty.pop(symbol, None)
+                self.urgent.discard(symbol)
+                return
+            self.dirty[symbol] = targets
+            if resized:
+                self.urgent.add(symbol)
+        if resized:
+            self.wake.set()
+
+    def send_amends(self):
+        """Sends the pending amends that are due. Must not be called under the trade lock."""
+        now = clock.monotonic()
+        with self.pending_lock:
+            due = [(symbol, targets) for symbol, targets in self.dirty.items()
+                   if symbol in self.urgent or now - self.amended_at.get(symbol, 0.0) >= self.amend_interval]
+            for symbol, _ in due:
+                del self.dirty[symbol]
+                self.urgent.discard(symbol)
+        for symbol, targets in due:
+            self._amend(symbol, targets)
+        return len(due)
+
+    def _amend(self, symbol, targets):
+        order = self.orders.get(symbol)
+        if order is None:
+            return
+        changes = {
+            "stop_price": targets["stop"] if targets["stop"] != order["stop"] else None,
+            "tp_price": targets["tp"] if targets["tp"] != order["tp"] else None,
+            "amount": targets["amount"] if targets["amount"] != order["amount"] else None,
+        }
+        self.amended_at[symbol] = clock.monotonic()
+        try:
+            self.client.amend_protective_orders(symbol, order["id"], **changes)
+        except Exception as e:
+            # Retried later unless a newer move replaced it; poll() notices if the order already fired
+            with self.pending_lock:
+                self.dirty.setdefault(symbol, targets)
+            print(f"⚠️ Protective amend for {symbol} failed: {e}")
+            return
+        with self.lock:
+            # Cancelled or replaced while the request was in flight
+            if self.orders.get(symbol) is not order:
+                return
+            order.update(targets)
+            self._save()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.wake.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+
+    def _run(self):
+        while self.running:
+            self.wake.clear()
+            try:
+                self.send_amends()
+            except Exception as e:
+                print(f"⚠️ Protective amend pass failed: {e}")
+            # Woken early by a resize; trailing moves wait for the interval anyway
+            self.wake.wait(min(1.0, self.amend_interval))
+
+    def cancel(self, symbol):
+        """
+        Removes the position's protective order. Returns its last state, so a
+        caller about to close can see the exchange already did.
+        """
+        with self.lock:
+            order = self.orders.pop(symbol, None)
+            with self.pending_lock:
+                self.dirty.pop(symbol, None)
+                self.urgent.discard(symbol)
+            self.amended_at.pop(symbol, None)
+            if order is None:
+                return None
+            self._save()
+            try:
+                state = self.client.fetch_protective_order(symbol, order["id"])
+                if state and state["state"] == "live":
+                    self.client.cancel_protective_orders(symbol, order["id"])
+                return state
+            except Exception as e:
+                print(f"⚠️ Protective cancel for {symbol} failed: {e}")
+                return None
+
+    def poll(self, trades):
+        """
+        Reconciles orders with `trades` (places missing ones, cancels orphans)
+        and returns [(symbol, reason, price)] for positions the exchange has
+        already closed. Amends are left to send_amends().
+        """
+        triggered = []
+        with self.lock:
+            for symbol in [s for s in self.orders if s not in trades]:
+                self.cancel(symbol)
+
+            for symbol, trade in list(trades.items()):
+                order = self.orders.get(symbol)
+                if order is None:
+                    self.place(symbol, trade)
+                    continue
+                try:
+                    state = self.client.fetch_protective_order(
+                        symbol, order["id"])
+                except Exception as e:
+                    print(f"⚠️ Protective order check for {symbol} failed: {e}")
+                    continue
+
+                if state is None or state["state"] in ("canceled", "failed"):
+                    # Gone without closing the position: protect it again
+                    del self.orders[symbol]
+                    self.place(symbol, trade)
+                elif state["state"] == "triggered":
+                    del self.orders[symbol]
+                    with self.pending_lock:
+                        self.dirty.pop(symbol, None)
+                        self.urgent.discard(symbol)
+                    self._save()
+                    price = state["price"] or (
+                        order["stop"] if state["trigger"] == "sl" else order["tp"])
+                    triggered.append(
+                        (symbol, TRIGGER_REASONS.get(state["trigger"], "PROTECTIVE"), price))
+        return triggered
+
+    def snapshot(self):
+        with self.lock:
+            return {s: dict(o) for s, o in self.orders.items()}
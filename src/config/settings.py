@@ -27,11 +27,82 @@ TRAILING_ROI_ACTIVATION = 0.10  # Activate trailing stop after 10% ROI
 ROE_TARGET = 0.3
 TAKE_PROFIT_PCT = ROE_TARGET / LEVERAGE
 CONFIDENCE_THRESHOLD = 0.65
+MODEL_CACHE_SIZE = 200  # Fitted models kept in memory (LRU)
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR")  # Set to persist models with joblib
+INDICATOR_STATE_SIZE = 200  # Symbols whose rolling indicator state is kept (LRU)
 ATR_MULTIPLIER = 2.0
 
 # --- PHASE 2 SETTINGS ---
 MAX_DAILY_LOSS_PCT = 0.10
 BREAKEVEN_TRIGGER_PCT = 0.025  # 2.5%
+DCA_STEP_PCT = 0.02  # Add to a position every 2% against us
+MAX_DCA = 2
+
+# --- SCANNER ---
+ASYNC_SCAN = True  # Fetch the whole candidate list concurrently
+SCAN_UNIVERSE_SIZE = 50
+SCAN_CONCURRENCY = 10  # Max in-flight REST requests during a scan
+CANDLE_CACHE_SIZE = 500  # Bars kept per symbol/timeframe
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR")  # Set to keep candle history on disk
+CANDLE_DOWNLOAD_CONCURRENCY = 5  # Parallel requests when backfilling history
+SIGNAL_WORKERS = max((os.cpu_count() or 2) - 1, 1)  # 0 = evaluate in the trading thread
+SIGNAL_TIMEOUT_SECONDS = 20  # Per-symbol budget for signal evaluation
+SIGNAL_MODE = "per_symbol"  # "per_symbol" or "universe" (one pooled model)
+UNIVERSE_RETRAIN_MINUTES = 60
+UNIVERSE_TRAIN_ASYNC = True  # Fit the universe model in a signal worker, serving the old one meanwhile
+TICKER_TTL_SECONDS = 5  # Max age of a shared ticker snapshot entry
+FUNDING_FALLBACK_TTL_SECONDS = 3600  # Used when the exchange gives no next funding time
+
+# --- MARKET REGIME ---
+REGIME_EMA_LENGTH = 200  # Daily EMA
+REGIME_ASSETS = ["BTC/USDT:USDT", "ETH/USDT:USDT"]
+
+# --- WEBSOCKET FEED ---
+USE_WS_FEED = True
+WS_PUBLIC_URL = os.getenv(
+    "OKX_WS_PUBLIC_URL", "wss://ws.okx.com:8443/ws/v5/public")
+WS_CHANNEL = "tickers"  # or "trades"
+WS_PRICE_MAX_AGE = 15  # Seconds before a WS price is considered stale
+
+# --- EXIT ENGINE ---
+USE_EXIT_ENGINE = True  # Evaluate stops on every WS price event (needs USE_WS_FEED)
+EXIT_EVENT_LATENCY_BUDGET_MS = 50
+
+# --- ORDER EXECUTION ---
+ORDER_LIMIT_TIMEOUT_SECONDS = 10  # Maker limit gets this long before the market fallback
+ORDER_POLL_SECONDS = 1
+ORDER_MAX_ERRORS = 5  # Consecutive failed polls before an order is given up
+BATCH_ORDER_LIMIT = 20  # OKX batch-orders accepts at most this many per request
+FLATTEN_ON_STOP = False  # Close every position when the bot is stopped
+FLATTEN_ON_CIRCUIT_BREAKER = False  # Close every position when the daily loss limit trips
+
+# --- PROTECTIVE ORDERS ---
+USE_PROTECTIVE_ORDERS = True  # Exchange-side stop/take-profit (simulated in paper mode)
+PROTECTIVE_AMEND_INTERVAL_SECONDS = 5  # At most one amend per position this often
+PROTECTIVE_MIN_MOVE_PCT = 0.0005  # Smaller stop moves are not worth an amend
+PROTECTIVE_AMEND_WORKER = True  # Send amends from their own thread, off the trade lock
+
+# --- REPLAY ---
+EXCHANGE_MODE = os.getenv("EXCHANGE_MODE", "live")  # "live" or "replay"
+REPLAY_DATA_DIR = os.getenv("REPLAY_DATA_DIR", CANDLE_STORE_DIR)  # Candle store to replay
+REPLAY_TIMEFRAME = os.getenv("REPLAY_TIMEFRAME", TIMEFRAME)  # Finest stored timeframe
+REPLAY_START = os.getenv("REPLAY_START")  # ISO date, defaults to the start of the data
+REPLAY_END = os.getenv("REPLAY_END")  # ISO date, defaults to the end of the data
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "0"))  # x real time, 0 = as fast as possible
+
+# --- TAPE RECORDER ---
+TAPE_DIR = os.getenv("TAPE_DIR")  # Set to record every exchange response
+TAPE_SEGMENT_MB = 64  # Rotate to a new compressed segment past this size
+TAPE_FLUSH_SECONDS = 1.0  # Longest a record waits in memory before its batch is written
+TAPE_FLUSH_KB = 1024  # Write the batch early once its JSON reaches this size
+
+if EXCHANGE_MODE == "replay":
+    # Replay runs the loop single-threaded so every run is identical
+    USE_WS_FEED = False
+    USE_EXIT_ENGINE = False
+    ASYNC_SCAN = False
+    PROTECTIVE_AMEND_WORKER = False
+    UNIVERSE_TRAIN_ASYNC = False
 
 REAL_TRADING = False  # CHANGE TO True FOR REAL MONEY
 INITIAL_PAPER_BALANCE = 5.0
@@ -44,6 +115,22 @@ DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASS = os.getenv("DB_PASS", "postgres")
 DB_NAME = os.getenv("DB_NAME", "okx_trading")
 DB_PORT = os.getenv("DB_PORT", "5432")
+# Full SQLAlchemy URL; overrides the DB_* values above when set
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+DB_POOL_SIZE = 5  # Connections kept open, shared by the bot and the API
+DB_MAX_OVERFLOW = 10  # Extra connections allowed under burst load
+DB_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = 1800  # Reconnect connections older than this (seconds)
+DB_POOL_PRE_PING = True  # Test connections before use, drop dead ones
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "True").lower() == "true"  # Apply schema migrations at startup
+USE_WRITE_BEHIND = True  # Queue trade/state writes off the trading thread
+PERSIST_FLUSH_SECONDS = 1.0  # Max delay before queued writes reach the database
+STREAM_BATCH_SIZE = 1000  # Rows per server-side cursor fetch when streaming history
+EQUITY_RAW_RETENTION_DAYS = 7  # Raw equity rows (one per loop) kept this long
+EQUITY_ROLLUP_RETENTION_DAYS = {"1m": 30, "1h": 365, "1d": None}  # None = forever
+EQUITY_COMPACT_INTERVAL_SECONDS = 60  # How often the rollup compactor runs
+EQUITY_COMPACT_LAG_SECONDS = 60  # Leave room for equity rows still in the write-behind queue
+EQUITY_SERIES_MAX_POINTS = 2000  # Chart reads use the finest tier that stays under this
 
 # --- TELEGRAM ---
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
@@ -1,30 +1,161 @@
-import pandas_ta as ta
+import os
+import threading
+from collections import OrderedDict
+import joblib
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from src.config.settings import CONFIDENCE_THRESHOLD
-
-
-def get_ai_signal(df):
-    df["RSI"] = ta.rsi(df["close"], length=14)
-    df["SMA"] = ta.sma(df["close"], length=20)
-    df["ATR"] = ta.atr(df["high"], df["low"], df["close"], length=14)
-    df["Returns"] = df["close"].pct_change()
-    df["Vol_Change"] = df["volume"].pct_change()
-    df["Target"] = (df["close"].shift(-1) > df["close"]).astype(int)
-    df.dropna(inplace=True)
-    if len(df) < 50:
-        return "NEUTRAL", 0.0, 0.0
+from src.config.settings import CONFIDENCE_THRESHOLD, TIMEFRAME, MODEL_CACHE_SIZE, MODEL_CACHE_DIR
+from src.domain.analysis.indicators import compute_features, IndicatorEngine
 
-    features = ["RSI", "SMA", "Returns", "Vol_Change", "Funding"]
-    model = RandomForestClassifier(
-        n_estimators=100, min_samples_split=10, random_state=42
-    )
-    model.fit(df[features][:-1], df["Target"][:-1])
-    latest = df[features].iloc[[-1]]
-    latest_atr = df["ATR"].iloc[-1]
-    prob_up = model.predict_proba(latest)[0][1]
+# Bump whenever FEATURES, their computation or the training rows change to invalidate cached models
+FEATURE_SET_VERSION = 4
+FEATURES = ["RSI", "SMA", "Returns", "Vol_Change", "Funding"]
+
+
+class ModelCache:
+    """
+    LRU cache of fitted models keyed by (symbol, timeframe, last closed
+    candle timestamp, funding rate, feature set version), optionally
+    persisted to disk with joblib.
+    """
+
+    def __init__(self, max_size=MODEL_CACHE_SIZE, directory=MODEL_CACHE_DIR):
+        self.max_size = max_size
+        self.directory = directory
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        symbol, timeframe = key[0], key[1]
+        safe = symbol.replace("/", "_").replace(":", "_")
+        # One file per symbol/timeframe, holding only the latest model
+        return os.path.join(self.directory, f"{safe}_{timeframe}.joblib")
+
+    def get(self, key):
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+
+        if self.directory:
+            path = self._path(key)
+            try:
+                stored_key, model = joblib.load(path)
+                if tuple(stored_key) == key:
+                    self._insert(key, model)
+                    return model
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"⚠️ Failed to load cached model {path}: {e}")
+        return None
+
+    def _insert(self, key, model):
+        with self.lock:
+            self.models[key] = model
+            self.models.move_to_end(key)
+            while len(self.models) > self.max_size:
+                self.models.popitem(last=False)
+
+    def put(self, key, model):
+        self._insert(key, model)
+        if self.directory:
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                # Readers and other writers only ever see a complete file
+                joblib.dump((key, model), tmp)
+                os.replace(tmp, path)
+            except Exception as e:
+                print(f"⚠️ Failed to persist model: {e}")
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+
+model_cache = ModelCache()
+# Rolling indicators per (symbol, timeframe); each worker process has its own
+indicator_engine = IndicatorEngine()
+
+
+def build_feature_tensor(high, low, close, volume, funding, feats=None):
+    """
+    Batched features for (n_symbols, n_bars) inputs. Returns
+    (X[s, t, f], atr[s, t], target[s, t], valid[s, t]); `valid` marks the rows
+    pandas' dropna() used to keep. The inputs are never modified. `feats`
+    are precomputed compute_features() arrays, e.g. from the indicator engine.
+    """
+    feats = dict(feats) if feats is not None else compute_features(
+        high, low, close, volume)
+    feats["Funding"] = np.broadcast_to(
+        np.asarray(funding, dtype=np.float64), feats["RSI"].shape)
 
+    X = np.stack([feats[name] for name in FEATURES], axis=-1)
+    close = np.atleast_2d(close)
+    target = np.zeros(close.shape, dtype=int)
+    target[:, :-1] = close[:, 1:] > close[:, :-1]
+    valid = ~np.isnan(X).any(axis=-1) & ~np.isnan(feats["ATR"])
+    return X, feats["ATR"], target, valid
+
+
+def build_feature_matrix(high, low, close, volume, funding, feats=None):
+    """Single-symbol view of build_feature_tensor."""
+    X, atr, target, valid = build_feature_tensor(
+        high, low, close, volume, funding, feats)
+    return X[0], atr[0], target[0], valid[0]
+
+
+def classify(prob_up, atr):
     if prob_up > CONFIDENCE_THRESHOLD:
-        return "LONG", prob_up, latest_atr
+        return "LONG", prob_up, atr
     elif prob_up < (1 - CONFIDENCE_THRESHOLD):
-        return "SHORT", (1 - prob_up), latest_atr
+        return "SHORT", (1 - prob_up), atr
     return "NEUTRAL", 0.0, 0.0
+
+
+def signal_from_arrays(symbol, timeframe, timestamp, high, low, close, volume, funding):
+    feats = None
+    if symbol is not None:
+        # Only candles closed since the last scan of this symbol are computed
+        feats = {name: values[np.newaxis] for name, values in indicator_engine.window(
+            (symbol, timeframe), timestamp, high, low, close, volume).items()}
+    X, atr, target, valid = build_feature_matrix(
+        high, low, close, volume, np.asarray(funding)[np.newaxis], feats)
+    X, atr, target, timestamp = X[valid], atr[valid], target[valid], timestamp[valid]
+    if len(X) < 50:
+        return "NEUTRAL", 0.0, 0.0
+
+    # Training data only changes when a candle closes or funding updates, so reuse the model until then
+    model = None
+    if symbol is not None:
+        funding_rate = float(np.asarray(funding, dtype=np.float64).ravel()[-1])
+        key = (symbol, timeframe, int(timestamp[-2]), funding_rate, FEATURE_SET_VERSION)
+        model = model_cache.get(key)
+
+    if model is None:
+        model = RandomForestClassifier(
+            n_estimators=100, min_samples_split=10, random_state=42
+        )
+        # The last closed row's label would be the forming bar's close: train on closed outcomes only
+        model.fit(X[:-2], target[:-2])
+        if symbol is not None:
+            model_cache.put(key, model)
+
+    prob_up = model.predict_proba(X[-1:])[0][1]
+    return classify(prob_up, atr[-1])
+
+
+def get_ai_signal(df, symbol=None, timeframe=TIMEFRAME):
+    return signal_from_arrays(
+        symbol,
+        timeframe,
+        df["timestamp"].to_numpy(),
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        df["close"].to_numpy(dtype=np.float64),
+        df["volume"].to_numpy(dtype=np.float64),
+        df["Funding"].to_numpy(dtype=np.float64),
+    )
@@ -0,0 +1,325 @@
+import copy
+import threading
+from collections import deque, OrderedDict
+import numpy as np
+from src.config.settings import INDICATOR_STATE_SIZE
+
+RSI_LENGTH = 14
+SMA_LENGTH = 20
+ATR_LENGTH = 14
+FEATURE_NAMES = ["RSI", "SMA", "ATR", "Returns", "Vol_Change"]
+
+# Reproduces the pandas_ta defaults used by the strategy:
+#   rsi  -> RMA (ewm alpha=1/n, adjust=False) of gains/losses, defined from bar 1
+#   sma  -> plain rolling mean, defined from bar n-1
+#   atr  -> true range seeded with its n-bar SMA, then RMA, defined from bar n-1
+#   ema  -> seeded with the n-bar SMA, then ewm(span=n, adjust=False)
+# Inputs are assumed gap-free (no NaN prices), which holds for exchange candles.
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x[np.newaxis, :] if x.ndim == 1 else x
+
+
+def _recursive(x, alpha, start):
+    """y[start] = x[start], y[t] = alpha * x[t] + (1 - alpha) * y[t-1], row-wise."""
+    out = np.full_like(x, np.nan)
+    if start >= x.shape[1]:
+        return out
+    out[:, start] = x[:, start]
+    for t in range(start + 1, x.shape[1]):
+        out[:, t] = alpha * x[:, t] + (1 - alpha) * out[:, t - 1]
+    return out
+
+
+def sma(close, length=SMA_LENGTH):
+    close = _as_2d(close)
+    out = np.full_like(close, np.nan)
+    if close.shape[1] < length:
+        return out
+    csum = np.cumsum(close, axis=1)
+    out[:, length - 1] = csum[:, length - 1]
+    out[:, length:] = csum[:, length:] - csum[:, :-length]
+    return out / length
+
+
+def ema(close, length):
+    close = _as_2d(close)
+    if close.shape[1] < length:
+        return np.full_like(close, np.nan)
+    seeded = close.copy()
+    seeded[:, length - 1] = close[:, :length].mean(axis=1)
+    return _recursive(seeded, 2 / (length + 1), length - 1)
+
+
+def rsi(close, length=RSI_LENGTH):
+    close = _as_2d(close)
+    delta = np.full_like(close, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    avg_gain = _recursive(gains, 1 / length, 1)
+    avg_loss = _recursive(losses, 1 / length, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 * avg_gain / (avg_gain + avg_loss)
+
+
+def true_range(high, low, close):
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    tr = high - low
+    prev_close = close[:, :-1]
+    tr[:, 1:] = np.maximum.reduce([
+        tr[:, 1:],
+        np.abs(high[:, 1:] - prev_close),
+        np.abs(prev_close - low[:, 1:]),
+    ])
+    return tr
+
+
+def atr(high, low, close, length=ATR_LENGTH):
+    tr = true_range(high, low, close)
+    if tr.shape[1] < length:
+        return np.full_like(tr, np.nan)
+    tr[:, length - 1] = tr[:, :length].mean(axis=1)
+    return _recursive(tr, 1 / length, length - 1)
+
+
+def pct_change(x):
+    x = _as_2d(x)
+    out = np.full_like(x, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[:, 1:] = x[:, 1:] / x[:, :-1] - 1
+    return out
+
+
+def compute_features(high, low, close, volume):
+    """
+    Batched path: every argument is a 2-D (n_symbols, n_bars) array (1-D is
+    treated as a single symbol). Returns a dict of 2-D feature arrays.
+    """
+    return {
+        "RSI": rsi(close),
+        "SMA": sma(close),
+        "ATR": atr(high, low, close),
+        "Returns": pct_change(close),
+        "Vol_Change": pct_change(volume),
+    }
+
+
+class EmaState:
+    """O(1) EMA accumulator, seeded like ema(): n-bar SMA, then span-n recursion."""
+
+    def __init__(self, length, value=None):
+        self.length = length
+        self.alpha = 2 / (length + 1)
+        self.seed = []
+        self.value = value  # None until `length` values have been seen
+
+    def update(self, x):
+        if self.value is None:
+            self.seed.append(x)
+            if len(self.seed) == self.length:
+                self.value = sum(self.seed) / self.length
+                self.seed = []
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class IndicatorState:
+    """
+    Rolling per-symbol state: each closed candle updates RSI/SMA/ATR/EMA and
+    returns in O(1). Produces the same values as compute_features (and
+    ema() for each of `ema_lengths`, as "EMA_<n>") on the full series.
+    """
+
+    def __init__(self, ema_lengths=()):
+        self.last_ts = None
+        self.n_bars = 0
+        self.prev_close = None
+        self.prev_volume = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.window = deque(maxlen=SMA_LENGTH)
+        self.window_sum = 0.0
+        self.tr_seed = []
+        self.atr = None
+        self.emas = {n: EmaState(n) for n in ema_lengths}
+
+    def update(self, bar):
+        """Commits a closed bar [ts, open, high, low, close, volume] and returns its features."""
+        ts, _, high, low, close, volume = bar
+        nan = float("nan")
+        features = {"RSI": nan, "SMA": nan, "ATR": nan,
+                    "Returns": nan, "Vol_Change": nan}
+
+        # True range
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close),
+                     abs(self.prev_close - low))
+        if self.atr is None:
+            self.tr_seed.append(tr)
+            if len(self.tr_seed) == ATR_LENGTH:
+                self.atr = sum(self.tr_seed) / ATR_LENGTH
+                self.tr_seed = []
+        else:
+            self.atr = tr / ATR_LENGTH + (1 - 1 / ATR_LENGTH) * self.atr
+        if self.atr is not None:
+            features["ATR"] = self.atr
+
+        # RSI + returns
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            if self.avg_gain is None:
+                self.avg_gain, self.avg_loss = gain, loss
+            else:
+                a = 1 / RSI_LENGTH
+                self.avg_gain = a * gain + (1 - a) * self.avg_gain
+                self.avg_loss = a * loss + (1 - a) * self.avg_loss
+            total = self.avg_gain + self.avg_loss
+            features["RSI"] = 100 * self.avg_gain / total if total else nan
+            with np.errstate(invalid="ignore", divide="ignore"):
+                features["Returns"] = float(
+                    np.float64(close) / self.prev_close - 1)
+                features["Vol_Change"] = float(
+                    np.float64(volume) / self.prev_volume - 1)
+
+        # SMA
+        if len(self.window) == SMA_LENGTH:
+            self.window_sum -= self.window[0]
+        self.window.append(close)
+        self.window_sum += close
+        if len(self.window) == SMA_LENGTH:
+            features["SMA"] = self.window_sum / SMA_LENGTH
+
+        # EMA
+        for length, state in self.emas.items():
+            value = state.update(close)
+            features[f"EMA_{length}"] = nan if value is None else value
+
+        self.prev_close = close
+        self.prev_volume = volume
+        self.last_ts = ts
+        self.n_bars += 1
+        return features
+
+    def preview(self, bar):
+        """Features for a still-forming bar, without committing it."""
+        trial = copy.copy(self)
+        trial.window = deque(self.window, maxlen=SMA_LENGTH)
+        trial.tr_seed = list(self.tr_seed)
+        trial.emas = {}
+        for length, state in self.emas.items():
+            trial.emas[length] = copy.copy(state)
+            trial.emas[length].seed = list(state.seed)
+        return trial.update(bar)
+
+
+class _FeatureBuffer:
+    """Per-bar FEATURE_NAMES rows, newest last; appends are amortized O(1)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.empty(2 * capacity, dtype=np.int64)
+        self.rows = np.empty((2 * capacity, len(FEATURE_NAMES)))
+        self.size = 0
+
+    def append(self, ts, features):
+        if self.size == len(self.ts):
+            # Slide the newest `capacity` rows to the front
+            self.ts[:self.capacity] = self.ts[self.size - self.capacity:self.size]
+            self.rows[:self.capacity] = self.rows[self.size - self.capacity:self.size]
+            self.size = self.capacity
+        self.ts[self.size] = ts
+        self.rows[self.size] = [features[name] for name in FEATURE_NAMES]
+        self.size += 1
+
+    def last(self, n):
+        return self.ts[self.size - n:self.size], self.rows[self.size - n:self.size]
+
+
+class IndicatorEngine:
+    """
+    Keeps an IndicatorState per symbol (LRU, `max_symbols`) and feeds it
+    only unseen closed bars, remembering each bar's features so a scan
+    window can be served without recomputing it.
+    """
+
+    def __init__(self, max_symbols=INDICATOR_STATE_SIZE):
+        self.max_symbols = max_symbols
+        self.states = OrderedDict()  # symbol -> IndicatorState
+        self.buffers = {}  # symbol -> _FeatureBuffer
+        self.lock = threading.Lock()
+
+    def _state(self, symbol, capacity=1):
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState()
+            self.buffers[symbol] = _FeatureBuffer(capacity)
+            while len(self.states) > self.max_symbols:
+                evicted, _ = self.states.popitem(last=False)
+                del self.buffers[evicted]
+        self.states.move_to_end(symbol)
+        return state
+
+    def update(self, symbol, bars):
+        """`bars` are closed candles in time order; returns features of the newest one."""
+        state = self._state(symbol)
+        features = None
+        for bar in bars:
+            if state.last_ts is not None and bar[0] <= state.last_ts:
+                continue
+            features = state.update(bar)
+            self.buffers[symbol].append(bar[0], features)
+        return features
+
+    def preview(self, symbol, forming_bar):
+        state = self.states.get(symbol)
+        return state.preview(forming_bar) if state else None
+
+    def window(self, symbol, timestamp, high, low, close, volume):
+        """
+        Features for every bar of a window whose last bar is still forming,
+        as 1-D arrays keyed like compute_features. Closed bars seen before
+        cost nothing, each new one is a single update() and the forming bar
+        is a preview(). Because the state carries on across scans, RSI/ATR
+        reflect the whole history seen so far rather than restarting their
+        warm-up at the window start. A window that does not continue the
+        state (first call, a gap, a longer window) reseeds from the window.
+        """
+        closed = len(timestamp) - 1
+        if closed < 1:
+            return {name: values[0] for name, values in compute_features(high, low, close, volume).items()}
+
+        def bars(lo, hi):
+            # Open is not used by any feature
+            return [(int(timestamp[i]), float("nan"), high[i], low[i], close[i], volume[i])
+                    for i in range(lo, hi)]
+
+        with self.lock:
+            state = self.states.get(symbol)
+            if state is not None and state.last_ts is not None:
+                start = int(np.searchsorted(timestamp[:closed], state.last_ts, side="right"))
+                # The window must contain the last bar seen, or there is a gap
+                if start == 0 or timestamp[start - 1] != state.last_ts:
+                    state = None
+                else:
+                    self.update(symbol, bars(start, closed))
+                    buffer = self.buffers[symbol]
+                    if buffer.size < closed or not np.array_equal(buffer.last(closed)[0], timestamp[:closed]):
+                        state = None
+            else:
+                state = None
+            if state is None:
+                self.states.pop(symbol, None)
+                self.buffers.pop(symbol, None)
+                self._state(symbol, capacity=closed)
+                self.update(symbol, bars(0, closed))
+            _, rows = self.buffers[symbol].last(closed)
+            forming = self.preview(symbol, bars(closed, closed + 1)[0])
+
+        return {name: np.append(rows[:, j], forming[name])
+                for j, name in enumerate(FEATURE_NAMES)}
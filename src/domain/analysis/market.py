@@ -1,58 +1,47 @@
 import pandas as pd
-import pandas_ta as ta
 from src.config.settings import TIMEFRAME
 from src.infrastructure.exchange.client import exchange_client
+from src.infrastructure.exchange.candle_cache import candle_cache
+from src.infrastructure.exchange.ticker_snapshot import ticker_snapshot
+from src.infrastructure.exchange.funding_cache import funding_cache
+from src.domain.analysis.regime import regime_service
+
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def build_frame(bars, funding_rate):
+    df = pd.DataFrame(bars, columns=OHLCV_COLUMNS)
+    df["timestamp"] = df["timestamp"].astype("int64")
+    df['Funding'] = funding_rate
+    return df
 
 
 def fetch_data(symbol, limit=100):
     try:
-        bars = exchange_client.fetch_ohlcv(
-            symbol, timeframe=TIMEFRAME, limit=limit)
-        df = pd.DataFrame(
-            bars, columns=["timestamp", "open",
-                           "high", "low", "close", "volume"]
-        )
+        bars = candle_cache.fetch(exchange_client, symbol, TIMEFRAME, limit)
+        if bars is None or len(bars) == 0:
+            return None
 
-        # Funding Rate
+        # Funding Rate (cached until the next funding time)
         try:
-            funding = exchange_client.fetch_funding_rate(symbol)
-            funding_rate = float(funding.get('fundingRate', 0.0))
+            funding_rate = funding_cache.get_rate(symbol)
         except:
             funding_rate = 0.0
 
-        df['Funding'] = funding_rate
-        return df
+        return build_frame(bars, funding_rate)
     except:
         return None
 
 
 def get_market_regime():
-    try:
-        # Fetch daily candles for BTC for 200 EMA
-        btc_bars = exchange_client.fetch_ohlcv(
-            "BTC/USDT:USDT", timeframe="1d", limit=205)
-        if not btc_bars or len(btc_bars) < 200:
-            return "NEUTRAL"
-
-        df = pd.DataFrame(btc_bars, columns=[
-                          "timestamp", "open", "high", "low", "close", "volume"])
-        df["EMA_200"] = ta.ema(df["close"], length=200)
-
-        last_close = df["close"].iloc[-1]
-        last_ema = df["EMA_200"].iloc[-1]
-
-        if last_close > last_ema:
-            return "BULL"
-        else:
-            return "BEAR"
-    except Exception as e:
-        print(f"Error fetching regime: {e}")
-        return "NEUTRAL"
+    # Memoized daily BTC 200 EMA, only refreshed when a daily candle closes
+    return regime_service.get_regime("BTC/USDT:USDT")
 
 
 def get_dynamic_symbols(limit=10):
     try:
-        tickers = exchange_client.fetch_tickers()
+        tickers = ticker_snapshot.fetch_tickers()
         valid_pairs = []
         for symbol, data in tickers.items():
             raw = data.get("info", {})
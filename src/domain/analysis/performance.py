@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+
+def compute_performance(closed_trades, equity_history, now=None):
+    """
+    Performance summary shared by /stats/performance and the backtester.
+    `now` anchors the weekly/monthly windows (defaults to the current UTC time).
+    """
+    # 1. Basic Metrics Calculation
+    total_closed = len(closed_trades)
+    wins = [t for t in closed_trades if t['pnl'] is not None and t['pnl'] > 0]
+    losses = [t for t in closed_trades if t['pnl']
+              is not None and t['pnl'] <= 0]
+
+    total_pnl = sum(t['pnl'] for t in closed_trades if t['pnl'] is not None)
+
+    win_rate = (len(wins) / total_closed * 100) if total_closed > 0 else 0.0
+
+    gross_profit = sum(t['pnl'] for t in wins if t['pnl'] is not None)
+    gross_loss = abs(sum(t['pnl'] for t in losses if t['pnl'] is not None))
+    profit_factor = (
+        gross_profit / gross_loss) if gross_loss > 0 else gross_profit
+
+    # 2. Max Drawdown Calculation
+    max_drawdown = 0.0
+    if equity_history:
+        peak = -float('inf')
+        drawdowns = []
+        for entry in equity_history:
+            # Rollup rows carry the bucket's OHLC; raw rows only equity.
+            # The bucket low comes after its open, but not necessarily after its high
+            equity = entry['equity']
+            peak = max(peak, entry.get('open', equity))
+            low = entry.get('low', equity)
+            drawdown = (peak - low) / peak if peak > 0 else 0.0
+            drawdowns.append(drawdown)
+            peak = max(peak, entry.get('high', equity))
+        max_drawdown = max(drawdowns) * 100 if drawdowns else 0.0
+
+    # Filter for Week/Month
+    now = now or datetime.utcnow()
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+
+    weekly_pnl = sum(t['pnl'] for t in closed_trades
+                     if t['closed_at'] and datetime.fromisoformat(t['closed_at']) >= week_ago and t['pnl'])
+    monthly_pnl = sum(t['pnl'] for t in closed_trades
+                      if t['closed_at'] and datetime.fromisoformat(t['closed_at']) >= month_ago and t['pnl'])
+
+    # 3. Averages and Current State
+    avg_win = (sum(t['pnl'] for t in wins) / len(wins)) if wins else 0.0
+    avg_loss = (sum(t['pnl'] for t in losses) / len(losses)) if losses else 0.0
+
+    current_equity = 0.0
+    current_balance = 0.0
+    if equity_history:
+        last_entry = equity_history[-1]
+        current_equity = last_entry['equity']
+        current_balance = last_entry['balance']
+
+    return {
+        "total_pnl": total_pnl,
+        "win_rate": win_rate,
+        "profit_factor": profit_factor,
+        "max_drawdown": max_drawdown,
+        "total_trades": total_closed,
+        "wins": len(wins),
+        "losses": len(losses),
+        "avg_win": round(avg_win, 2),
+        "avg_loss": round(avg_loss, 2),
+        "current_equity": current_equity,
+        "current_balance": current_balance
+    }
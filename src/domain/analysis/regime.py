@@ -0,0 +1,125 @@
+import threading
+from src.config.settings import REGIME_EMA_LENGTH, REGIME_ASSETS, EXCHANGE_MODE
+from src.infrastructure.exchange.client import exchange_client
+from src.infrastructure.clock import clock
+from src.domain.analysis.indicators import EmaState
+
+DAY_MS = 24 * 60 * 60 * 1000
+STATE_KEY = "regime_state"
+
+
+class RegimeService:
+    """
+    Daily EMA regime per reference asset. The EMA is seeded once from history
+    and then advanced incrementally with each newly closed daily bar, so the
+    exchange is only hit after a day's candle has closed. State is persisted
+    through the repository so restarts are instant. Replay neither loads nor
+    saves it: a live run's state is from the replay's future, so the regime
+    is rebuilt from the bars closed by the virtual clock.
+    """
+
+    def __init__(self, client, length=REGIME_EMA_LENGTH, persist=EXCHANGE_MODE != "replay"):
+        self.client = client
+        self.length = length
+        self.persist = persist
+        self.states = {}  # asset -> {"last_ts", "ema", "close"}
+        self.repo = None
+        self.lock = threading.Lock()
+
+    def bind_repo(self, repo):
+        if not self.persist:
+            return
+        self.repo = repo
+        try:
+            saved = repo.load_state_value(STATE_KEY, {}) or {}
+            with self.lock:
+                self.states.update(saved)
+        except Exception as e:
+            print(f"⚠️ Failed to load regime state: {e}")
+
+    def _save(self):
+        if self.repo is None:
+            return
+        try:
+            self.repo.save_state_value(STATE_KEY, self.states)
+        except Exception as e:
+            print(f"⚠️ Failed to save regime state: {e}")
+
+    def _closed(self, bars, now_ms):
+        # Drop the still-forming daily candle
+        return [b for b in bars if b[0] + DAY_MS <= now_ms]
+
+    def _seed(self, asset, now_ms):
+        bars = self._closed(self.client.fetch_ohlcv(
+            asset, timeframe="1d", limit=self.length + 5), now_ms)
+        if len(bars) < self.length:
+            return None
+        ema = EmaState(self.length)
+        for bar in bars:
+            ema.update(bar[4])
+        return {"last_ts": bars[-1][0], "ema": float(ema.value), "close": float(bars[-1][4])}
+
+    def _advance(self, asset, state, now_ms):
+        missing = (now_ms - state["last_ts"]) // DAY_MS
+        bars = self.client.fetch_ohlcv(
+            asset, timeframe="1d", limit=int(missing) + 1, since=state["last_ts"] + DAY_MS)
+        new_bars = [b for b in self._closed(
+            bars, now_ms) if b[0] > state["last_ts"]]
+        if not new_bars:
+            return state
+        if new_bars[0][0] != state["last_ts"] + DAY_MS:
+            # Hole in the history, reseed from scratch
+            return self._seed(asset, now_ms)
+
+        # One O(1) update per newly closed daily bar
+        ema = EmaState(self.length, value=state["ema"])
+        for bar in new_bars:
+            ema.update(bar[4])
+        return {"last_ts": new_bars[-1][0], "ema": ema.value, "close": float(new_bars[-1][4])}
+
+    def _needs_update(self, state, now_ms):
+        # The next daily candle closes at last_ts + 2 days
+        return state is None or now_ms >= state["last_ts"] + 2 * DAY_MS
+
+    @staticmethod
+    def _from_future(state, now_ms):
+        # Built from a candle that has not closed yet at `now_ms`
+        return state is not None and state["last_ts"] + DAY_MS > now_ms
+
+    @staticmethod
+    def _classify(state):
+        if state is None:
+            return "NEUTRAL"
+        return "BULL" if state["close"] > state["ema"] else "BEAR"
+
+    def get_regimes(self, assets=REGIME_ASSETS):
+        now_ms = clock.now_ms()
+        changed = False
+        result = {}
+        with self.lock:
+            for asset in assets:
+                state = self.states.get(asset)
+                if self._from_future(state, now_ms):
+                    del self.states[asset]
+                    state = None
+                if self._needs_update(state, now_ms):
+                    try:
+                        if state is None:
+                            new_state = self._seed(asset, now_ms)
+                        else:
+                            new_state = self._advance(asset, state, now_ms)
+                        if new_state is not None and new_state != state:
+                            self.states[asset] = state = new_state
+                            changed = True
+                    except Exception as e:
+                        print(f"Error fetching regime: {e}")
+                result[asset] = self._classify(state)
+            if changed:
+                self._save()
+        return result
+
+    def get_regime(self, asset="BTC/USDT:USDT"):
+        return self.get_regimes([asset])[asset]
+
+
+regime_service = RegimeService(exchange_client)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from src.config.settings import (
+    TIMEFRAME, SCAN_CONCURRENCY, SIGNAL_WORKERS, SIGNAL_MODE, UNIVERSE_TRAIN_ASYNC)
+from src.infrastructure.exchange.async_client import AsyncExchangeClient
+from src.infrastructure.exchange.tape import record
+from src.infrastructure.exchange.candle_cache import candle_cache
+from src.infrastructure.exchange.funding_cache import funding_cache
+from src.domain.analysis.market import build_frame
+from src.domain.analysis.signal_pool import SignalBatch, SignalExecutor
+from src.domain.analysis.universe_model import universe_model
+
+
+class MarketScanner:
+    """
+    Fetches candles + funding for a whole candidate list concurrently and
+    ranks the resulting AI signals by confidence. Signal evaluation runs on
+    a process pool when `workers` > 0.
+    """
+
+    def __init__(self, concurrency=SCAN_CONCURRENCY, workers=SIGNAL_WORKERS):
+        self.concurrency = concurrency
+        self.workers = workers
+        self.executor = SignalExecutor(max_workers=max(workers, 1))
+        # Dedicated loop, driven from the trading thread
+        self.loop = asyncio.new_event_loop()
+        self.client = None
+
+    async def _fetch_frame(self, symbol, semaphore, limit, funding_rate):
+        async with semaphore:
+            try:
+                bars = await candle_cache.fetch_async(
+                    self.client, symbol, TIMEFRAME, limit)
+            except Exception:
+                return symbol, None
+
+        if bars is None or len(bars) == 0:
+            return symbol, None
+        return symbol, build_frame(bars, funding_rate)
+
+    async def _fetch_frames(self, symbols, limit, funding):
+        if self.client is None:
+            self.client = record(AsyncExchangeClient())
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._fetch_frame(symbol, semaphore, limit, funding.get(symbol, 0.0))
+              for symbol in symbols)
+        )
+        return {symbol: df for symbol, df in results if df is not None}
+
+    def fetch_frames(self, symbols, limit=100):
+        # Funding only changes on the exchange schedule: one bulk call at most
+        try:
+            funding = funding_cache.rates(symbols)
+        except Exception as e:
+            print(f"⚠️ Funding refresh failed: {e}")
+            funding = {}
+        return self.loop.run_until_complete(self._fetch_frames(symbols, limit, funding))
+
+    def start_scan(self, symbols, limit=100):
+        """Fetches frames and returns a SignalBatch that can be polled from the loop."""
+        frames = self.fetch_frames(symbols, limit)
+        if SIGNAL_MODE == "universe":
+            # N per-symbol fits become one batched predict; retraining runs in a worker
+            executor = self.executor if UNIVERSE_TRAIN_ASYNC else None
+            return SignalBatch.from_results(universe_model.evaluate(frames, executor))
+        if self.workers > 0:
+            return self.executor.submit(frames)
+        return self.executor.evaluate_inline(frames)
+
+    def scan(self, symbols, limit=100):
+        batch = self.start_scan(symbols, limit)
+        while not batch.done():
+            time.sleep(0.05)
+        return batch.results()
+
+    def close(self):
+        self.executor.shutdown()
+        if self.client is not None:
+            self.loop.run_until_complete(self.client.close())
+            self.client = None
@@ -0,0 +1,151 @@
+import zlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+from src.config.settings import TIMEFRAME, SIGNAL_WORKERS, SIGNAL_TIMEOUT_SECONDS
+from src.domain.analysis.ai_scanner import get_ai_signal, signal_from_arrays
+from src.infrastructure.clock import clock
+
+FRAME_COLUMNS = ["timestamp", "open", "high",
+                 "low", "close", "volume", "Funding"]
+
+
+def pack_frame(df):
+    # Compact float64 (n, 7) array: far cheaper to pickle than a DataFrame
+    return np.ascontiguousarray(df[FRAME_COLUMNS].to_numpy(dtype=np.float64))
+
+
+def evaluate_packed(symbol, timeframe, arr):
+    """Worker entry point: returns (signal, confidence, ATR) straight from the packed columns."""
+    ts, _, high, low, close, volume, funding = arr.T
+    signal, conf, atr = signal_from_arrays(
+        symbol, timeframe, ts.astype(np.int64), high, low, close, volume, funding)
+    return signal, float(conf), float(atr)
+
+
+class SignalBatch:
+    """Signals for one scan, collected without blocking the trading thread."""
+
+    def __init__(self, futures, deadlines, on_timeout=None):
+        self.futures = futures  # symbol -> Future
+        self.deadlines = deadlines  # symbol -> clock.monotonic() deadline
+        self.on_timeout = on_timeout  # Called with a symbol whose evaluation is still running
+
+    @classmethod
+    def from_results(cls, results):
+        """Already-computed batch from symbol -> (signal, confidence, ATR)."""
+        futures = {}
+        for symbol, result in results.items():
+            futures[symbol] = Future()
+            futures[symbol].set_result(result)
+        return cls(futures, {s: float("inf") for s in futures})
+
+    def done(self):
+        now = clock.monotonic()
+        return all(f.done() or now >= self.deadlines[s] for s, f in self.futures.items())
+
+    def results(self):
+        now = clock.monotonic()
+        ranked = []
+        for symbol, future in self.futures.items():
+            if not future.done():
+                if now >= self.deadlines[symbol]:
+                    print(f"⏱️ Signal timeout for {symbol}")
+                    # A running evaluation cannot be cancelled, only its worker stopped
+                    if not future.cancel() and self.on_timeout:
+                        self.on_timeout(symbol)
+                continue
+            try:
+                signal, conf, atr = future.result()
+                conf, atr = float(conf), float(atr)
+            except Exception as e:
+                print(f"⚠️ Signal failed for {symbol}: {e}")
+                continue
+            if signal != "NEUTRAL":
+                ranked.append({
+                    "symbol": symbol,
+                    "signal": signal,
+                    "confidence": conf,
+                    "atr": atr,
+                })
+
+        ranked.sort(key=lambda x: x["confidence"], reverse=True)
+        return ranked
+
+
+class SignalExecutor:
+    """
+    Evaluates signals across CPU cores. Frames are shipped to the workers as
+    packed NumPy arrays; each symbol gets its own timeout. Every symbol is
+    pinned to the same single-process worker, so the model cache and
+    indicator state that worker keeps for it are hit on every scan. A worker
+    still busy past its deadline is replaced, so the symbols pinned to it
+    are not stuck behind it on the next scan.
+    """
+
+    def __init__(self, max_workers=SIGNAL_WORKERS, timeout=SIGNAL_TIMEOUT_SECONDS):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.pools = [None] * max_workers
+
+    def _worker_for(self, symbol):
+        # crc32, unlike hash(), is the same in every run
+        return zlib.crc32(symbol.encode()) % self.max_workers
+
+    def _get_pool(self, index):
+        if self.pools[index] is None:
+            # spawn: the parent runs feed/telegram threads, which fork does not copy safely
+            self.pools[index] = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self.pools[index]
+
+    def _recycle(self, index, pool):
+        """Stops a worker stuck past its deadline; the next submit starts a fresh one."""
+        if self.pools[index] is not pool:
+            return  # Already replaced
+        self.pools[index] = None
+        # shutdown() alone waits for the running call to finish in the background
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        print(f"♻️ Signal worker {index} restarted after a timeout")
+
+    def submit(self, frames, timeframe=TIMEFRAME):
+        now = clock.monotonic()
+        futures = {}
+        deadlines = {}
+        placed = {}  # symbol -> (worker index, pool)
+        queued = [0] * self.max_workers
+        for symbol, df in frames.items():
+            index = self._worker_for(symbol)
+            pool = self._get_pool(index)
+            futures[symbol] = pool.submit(
+                evaluate_packed, symbol, timeframe, pack_frame(df))
+            placed[symbol] = (index, pool)
+            # Symbols queued behind others on their worker get a slot's worth of extra time
+            queued[index] += 1
+            deadlines[symbol] = now + self.timeout * queued[index]
+        return SignalBatch(futures, deadlines, lambda symbol: self._recycle(*placed[symbol]))
+
+    def run(self, fn, *args):
+        """Runs one picklable call (e.g. a model fit) on the first worker; returns its Future."""
+        return self._get_pool(0).submit(fn, *args)
+
+    def evaluate_inline(self, frames, timeframe=TIMEFRAME):
+        futures = {}
+        for symbol, df in frames.items():
+            future = Future()
+            try:
+                future.set_result(get_ai_signal(df, symbol, timeframe))
+            except Exception as e:
+                future.set_exception(e)
+            futures[symbol] = future
+        return SignalBatch(futures, {s: float("inf") for s in futures})
+
+    def shutdown(self):
+        for i, pool in enumerate(self.pools):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.pools[i] = None
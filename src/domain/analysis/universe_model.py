@@ -0,0 +1,141 @@
+import threading
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from src.config.settings import UNIVERSE_RETRAIN_MINUTES
+from src.domain.analysis.ai_scanner import FEATURES, build_feature_tensor, classify
+from src.infrastructure.clock import clock
+
+SMA_INDEX = FEATURES.index("SMA")
+
+
+def stack_frames(frames):
+    """
+    Runs the batched feature path over every frame, grouping frames of equal
+    length into one 2-D computation. Returns symbol -> (X, atr, target, valid).
+    """
+    by_length = {}
+    for symbol, df in frames.items():
+        by_length.setdefault(len(df), []).append(symbol)
+
+    out = {}
+    for symbols in by_length.values():
+        cols = {
+            name: np.stack([frames[s][name].to_numpy(dtype=np.float64) for s in symbols])
+            for name in ("high", "low", "close", "volume", "Funding")
+        }
+        X, atr, target, valid = build_feature_tensor(
+            cols["high"], cols["low"], cols["close"], cols["volume"], cols["Funding"])
+        # Raw SMA is a price level and means nothing across symbols: use distance to SMA
+        X = X.copy()
+        X[..., SMA_INDEX] = cols["close"] / X[..., SMA_INDEX] - 1
+        for i, symbol in enumerate(symbols):
+            out[symbol] = (X[i], atr[i], target[i], valid[i])
+    return out
+
+
+def training_rows(stacked):
+    """Pooled (X, y) over every labelled row, or (None, None) if too little to fit."""
+    X_parts, y_parts = [], []
+    for X, _, target, valid in stacked.values():
+        # Latest row has no label; the one before is labelled by the forming bar
+        rows = np.flatnonzero(valid)[:-2]
+        X_parts.append(X[rows])
+        y_parts.append(target[rows])
+    if not X_parts:
+        return None, None
+    X_train = np.concatenate(X_parts)
+    y_train = np.concatenate(y_parts)
+    if len(X_train) < 50 or len(np.unique(y_train)) < 2:
+        return None, None
+    return X_train, y_train
+
+
+def fit_model(X_train, y_train):
+    # Module level so a spawned signal worker can run it
+    model = RandomForestClassifier(
+        n_estimators=100, min_samples_split=10, random_state=42, n_jobs=-1
+    )
+    model.fit(X_train, y_train)
+    return model
+
+
+class UniverseModel:
+    """
+    One model trained on the pooled features of every scanned symbol and
+    retrained on a schedule, off the trading thread when given an executor.
+    Scan-time inference is a single vectorized predict_proba over each
+    candidate's latest row.
+    """
+
+    def __init__(self, retrain_minutes=UNIVERSE_RETRAIN_MINUTES):
+        self.retrain_seconds = retrain_minutes * 60
+        self.model = None
+        self.trained_at = None
+        self.training = None  # Future of a fit running in a signal worker
+        self.lock = threading.Lock()
+
+    def needs_training(self):
+        with self.lock:
+            if self.training is not None:
+                return False
+            return self.model is None or clock.monotonic() - self.trained_at >= self.retrain_seconds
+
+    def train(self, stacked, executor=None):
+        """
+        Fits a new model on every labelled row. With an executor the fit runs
+        in a signal worker and the current model keeps serving until it lands.
+        """
+        X_train, y_train = training_rows(stacked)
+        if X_train is None:
+            return
+        if executor is None:
+            self._install(fit_model(X_train, y_train), len(X_train), len(stacked))
+            return
+
+        future = executor.run(fit_model, X_train, y_train)
+        with self.lock:
+            self.training = future
+
+        def landed(done):
+            with self.lock:
+                self.training = None
+            try:
+                self._install(done.result(), len(X_train), len(stacked))
+            except Exception as e:
+                print(f"⚠️ Universe model training failed: {e}")
+        future.add_done_callback(landed)
+
+    def _install(self, model, rows, symbols):
+        with self.lock:
+            self.model = model
+            self.trained_at = clock.monotonic()
+        print(f"🧠 Universe model trained on {rows} rows from {symbols} symbols")
+
+    def predict(self, stacked):
+        """Returns symbol -> (signal, confidence, ATR) from one predict_proba call."""
+        with self.lock:
+            model = self.model
+        if model is None:
+            return {}
+
+        symbols, rows, atrs = [], [], []
+        for symbol, (X, atr, _, valid) in stacked.items():
+            # Only symbols whose latest bar has complete features
+            if valid.sum() >= 50 and valid[-1]:
+                symbols.append(symbol)
+                rows.append(X[-1])
+                atrs.append(atr[-1])
+        if not symbols:
+            return {}
+
+        prob_up = model.predict_proba(np.vstack(rows))[:, 1]
+        return {s: classify(p, a) for s, p, a in zip(symbols, prob_up, atrs)}
+
+    def evaluate(self, frames, executor=None):
+        stacked = stack_frames(frames)
+        if self.needs_training():
+            self.train(stacked, executor)
+        return self.predict(stacked)
+
+
+universe_model = UniverseModel()
@@ -0,0 +1,290 @@
+from datetime import datetime, timezone
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from src.config.settings import INITIAL_PAPER_BALANCE, REGIME_EMA_LENGTH
+from src.domain.analysis.ai_scanner import build_feature_tensor
+from src.domain.analysis.indicators import ema
+from src.domain.analysis.performance import compute_performance
+from src.domain.analysis.universe_model import SMA_INDEX
+from src.domain.trading.exit_rules import (
+    resolve_params, position_pnl, position_roi, dca_due, trail_best_price,
+    breakeven_trigger, stop_price, take_profit_price, exit_hits, entry_margin,
+)
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def to_iso(ts_ms):
+    # Same naive-UTC ISO format the repository stores
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def align_bars(bars_by_symbol):
+    """
+    ccxt-style OHLCV lists per symbol -> (symbols, timestamps, ohlcv) where
+    ohlcv has shape (5, n_symbols, n_bars) on the union timestamp grid.
+    Bars a symbol does not have are NaN.
+    """
+    symbols = list(bars_by_symbol)
+    arrays = [np.asarray(bars_by_symbol[s], dtype=np.float64).reshape(-1, 6)
+              for s in symbols]
+    timestamps = np.unique(np.concatenate(
+        [a[:, 0] for a in arrays])).astype(np.int64)
+
+    ohlcv = np.full((5, len(symbols), len(timestamps)), np.nan)
+    for i, a in enumerate(arrays):
+        cols = np.searchsorted(timestamps, a[:, 0].astype(np.int64))
+        ohlcv[:, i, cols] = a[:, 1:].T
+    return symbols, timestamps, ohlcv
+
+
+def price_path(open_, high, low, close, intrabar=True):
+    """
+    Price points visited inside each bar, in order. With `intrabar` the bar
+    goes open -> low -> high -> close on up bars and open -> high -> low ->
+    close on down bars; otherwise only the close is seen.
+    """
+    if not intrabar:
+        return [close]
+    up = close >= open_
+    return [open_, np.where(up, low, high), np.where(up, high, low), close]
+
+
+def daily_regime(timestamps, close, length=REGIME_EMA_LENGTH):
+    """
+    Per-bar regime of a reference asset: 1 BULL, -1 BEAR, 0 NEUTRAL.
+    Like RegimeService, each bar only sees the last fully closed daily candle.
+    """
+    days = np.asarray(timestamps, dtype=np.int64) // DAY_MS
+    uniq, first = np.unique(days, return_index=True)
+    last = np.r_[first[1:] - 1, len(days) - 1]
+    daily_close = np.asarray(close, dtype=np.float64)[last]
+    daily_ema = ema(daily_close, length)[0]
+    state = np.where(np.isnan(daily_ema), 0,
+                     np.where(daily_close > daily_ema, 1, -1))
+
+    prev = np.searchsorted(uniq, days) - 1
+    return np.where(prev >= 0, state[np.maximum(prev, 0)], 0)
+
+
+def walk_forward_probabilities(high, low, close, volume, funding=0.0,
+                               train_bars=2000, retrain_every=672, n_estimators=100):
+    """
+    Out-of-sample prob_up for (n_symbols, n_bars) inputs from a pooled model
+    retrained every `retrain_every` bars on the trailing `train_bars` window.
+    prob_up[:, t] is only known once bar t has closed. Returns (prob_up, atr).
+    """
+    X, atr, target, valid = build_feature_tensor(
+        high, low, close, volume, funding)
+    X = X.copy()
+    X[..., SMA_INDEX] = np.asarray(close) / X[..., SMA_INDEX] - 1
+
+    n_bars = X.shape[1]
+    prob_up = np.full(X.shape[:2], np.nan)
+    for start in range(train_bars, n_bars, retrain_every):
+        # Row t is labelled by close[t + 1], so the last usable row is start - 2
+        train = valid[:, start - train_bars:start - 1]
+        X_train = X[:, start - train_bars:start - 1][train]
+        y_train = target[:, start - train_bars:start - 1][train]
+        if len(X_train) < 50 or len(np.unique(y_train)) < 2:
+            continue
+
+        model = RandomForestClassifier(
+            n_estimators=n_estimators, min_samples_split=10, random_state=42, n_jobs=-1
+        )
+        model.fit(X_train, y_train)
+
+        end = min(start + retrain_every, n_bars)
+        rows = valid[:, start:end]
+        if rows.any():
+            block = prob_up[:, start:end]
+            block[rows] = model.predict_proba(X[:, start:end][rows])[:, 1]
+    return prob_up, atr
+
+
+class Backtester:
+    """
+    Replays aligned OHLC arrays through the live bot's tick: DCA first, then
+    the trailing update, breakeven and ATR stop / take-profit checks from
+    TradeManager (via exit_rules), then the scan phase with the daily circuit
+    breaker, regime filter and one entry per bar. Position state lives in
+    per-symbol arrays so every step is vectorized across symbols.
+
+    Exits are checked at every price point of a bar and fill there. Entries
+    are evaluated once per bar, at its close, on that bar's prob_up/atr
+    (known once it has closed) and fill at the close.
+    """
+
+    def __init__(self, params=None, initial_balance=INITIAL_PAPER_BALANCE, intrabar=True):
+        self.params = resolve_params(params)
+        self.initial_balance = initial_balance
+        self.intrabar = intrabar
+
+    def _signals(self, prob_up, regime):
+        threshold = self.params["confidence_threshold"]
+        long_sig = prob_up > threshold
+        short_sig = prob_up < (1 - threshold)
+        if regime is not None:
+            regime = np.asarray(regime)[np.newaxis, :]
+            long_sig &= regime != -1
+            short_sig &= regime != 1
+        confidence = np.where(long_sig, prob_up,
+                              np.where(short_sig, 1 - prob_up, 0.0))
+        return long_sig, confidence
+
+    # Flat slots hold zeros and missing bars are NaN; both are masked out
+    @np.errstate(divide="ignore", invalid="ignore")
+    def run(self, symbols, timestamps, open_, high, low, close, prob_up, atr, regime=None):
+        p = self.params
+        n_symbols, n_bars = close.shape
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        path = price_path(open_, high, low, close, self.intrabar)
+        long_sig, confidence = self._signals(prob_up, regime)
+        atr = np.zeros(close.shape) if atr is None else np.nan_to_num(atr)
+
+        is_open = np.zeros(n_symbols, dtype=bool)
+        is_long = np.zeros(n_symbols, dtype=bool)
+        entry = np.zeros(n_symbols)
+        amount = np.zeros(n_symbols)
+        margin = np.zeros(n_symbols)
+        best = np.zeros(n_symbols)
+        pos_atr = np.zeros(n_symbols)
+        breakeven = np.zeros(n_symbols, dtype=bool)
+        dca_count = np.zeros(n_symbols, dtype=int)
+        unrealized = np.zeros(n_symbols)
+        opened_at = np.zeros(n_symbols, dtype=np.int64)
+
+        balance = self.initial_balance
+        total_pnl = 0.0
+        daily_start = balance
+        last_day = None
+        trades = []
+        equity = []
+
+        for t in range(n_bars):
+            ts = int(timestamps[t])
+            for prices in path:
+                price = prices[:, t]
+
+                # PHASE 1: MANAGE
+                if is_open.any():
+                    live = is_open & np.isfinite(price)
+
+                    dca = live & dca_due(is_long, entry, price, dca_count, p)
+                    if dca.any():
+                        # Same amount again at the current price; skip exits this tick
+                        entry[dca] = (entry[dca] + price[dca]) / 2
+                        amount[dca] *= 2
+                        margin[dca] *= 2
+                        breakeven[dca] = False
+                        dca_count[dca] += 1
+
+                    check = live & ~dca
+                    pnl = position_pnl(is_long, entry, amount, price)
+                    roi = position_roi(pnl, margin)
+                    best = np.where(check, trail_best_price(
+                        is_long, best, price, roi, p)[0], best)
+                    breakeven |= check & breakeven_trigger(breakeven, roi, p)
+                    stop = stop_price(is_long, entry, best,
+                                      pos_atr, breakeven, p)
+                    take_profit = take_profit_price(is_long, entry, p)
+                    stop_hit, tp_hit = exit_hits(
+                        is_long, price, stop, take_profit)
+                    unrealized = np.where(check, pnl, unrealized)
+
+                    for i in np.flatnonzero(check & (stop_hit | tp_hit)):
+                        reason, level = ("STOP_LOSS", stop[i]) if stop_hit[i] else (
+                            "TAKE_PROFIT", take_profit[i])
+                        balance += float(pnl[i])
+                        total_pnl += float(pnl[i])
+                        trades.append({
+                            "symbol": symbols[i],
+                            "side": "LONG" if is_long[i] else "SHORT",
+                            "entry": float(entry[i]),
+                            "amount": float(amount[i]),
+                            "margin": float(margin[i]),
+                            "pnl": float(pnl[i]),
+                            "exit_reason": f"{reason} (${level:.4f})",
+                            "created_at": to_iso(int(opened_at[i])),
+                            "closed_at": to_iso(ts),
+                            "exit_price": float(price[i]),
+                            "dca_count": int(dca_count[i]),
+                        })
+                        is_open[i] = False
+                        unrealized[i] = 0.0
+
+            equity.append({
+                "timestamp": to_iso(ts),
+                "balance": balance,
+                "equity": balance + float(unrealized[is_open].sum()),
+                "total_pnl": total_pnl,
+            })
+
+            # PHASE 2: SCAN, once per bar at the close
+            if is_open.sum() >= p["max_positions"]:
+                continue
+
+            day = ts // DAY_MS
+            if day != last_day:
+                daily_start = balance
+                last_day = day
+            day_pct = (balance + unrealized[is_open].sum() - daily_start) / \
+                daily_start if daily_start > 0 else 0
+            if day_pct < -p["max_daily_loss_pct"] or balance <= 2.0:
+                continue
+
+            price = close[:, t]
+            conf = np.where(is_open | ~np.isfinite(price),
+                            0.0, confidence[:, t])
+            i = int(np.argmax(conf))
+            if conf[i] <= 0:
+                continue
+            target_margin = float(entry_margin(balance, p))
+            if target_margin == 0:
+                continue
+
+            is_open[i] = True
+            is_long[i] = long_sig[i, t]
+            entry[i] = best[i] = price[i]
+            amount[i] = (target_margin * p["leverage"]) / price[i]
+            margin[i] = target_margin
+            pos_atr[i] = atr[i, t]
+            breakeven[i] = False
+            dca_count[i] = 0
+            unrealized[i] = 0.0
+            opened_at[i] = ts
+
+        open_trades = [{
+            "symbol": symbols[i],
+            "side": "LONG" if is_long[i] else "SHORT",
+            "entry": float(entry[i]),
+            "amount": float(amount[i]),
+            "margin": float(margin[i]),
+            "unrealized_pnl": float(unrealized[i]),
+            "created_at": to_iso(int(opened_at[i])),
+        } for i in np.flatnonzero(is_open)]
+
+        now = datetime.fromisoformat(
+            equity[-1]["timestamp"]) if equity else None
+        return {
+            "trades": trades,
+            "open_trades": open_trades,
+            "equity": equity,
+            "stats": compute_performance(trades, equity, now=now),
+        }
+
+
+def run_backtest(bars_by_symbol, prob_up=None, atr=None, regime=None, params=None,
+                 initial_balance=INITIAL_PAPER_BALANCE, intrabar=True):
+    """
+    Convenience wrapper: aligns ccxt-style bars and, when no probabilities
+    are given, produces them with walk_forward_probabilities.
+    """
+    symbols, timestamps, ohlcv = align_bars(bars_by_symbol)
+    open_, high, low, close, volume = ohlcv
+    if prob_up is None:
+        prob_up, model_atr = walk_forward_probabilities(
+            high, low, close, volume)
+        atr = model_atr if atr is None else atr
+    backtester = Backtester(params, initial_balance, intrabar)
+    return backtester.run(symbols, timestamps, open_, high, low, close, prob_up, atr, regime)
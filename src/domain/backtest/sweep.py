@@ -0,0 +1,286 @@
+import os
+import json
+import random
+import hashlib
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from src.config.settings import INITIAL_PAPER_BALANCE
+from src.domain.trading.exit_rules import DEFAULT_PARAMS
+from src.domain.backtest.engine import Backtester, align_bars, walk_forward_probabilities
+
+DATASET_ARRAYS = ["timestamps", "open", "high",
+                  "low", "close", "prob_up", "atr", "regime"]
+RESULTS_FILE = "results.jsonl"
+
+_datasets = {}  # Per-process cache of memory-mapped datasets
+
+
+def save_dataset(directory, symbols, timestamps, open_, high, low, close, prob_up, atr, regime=None):
+    """Writes the read-only sweep inputs as .npy files workers can memory-map."""
+    os.makedirs(directory, exist_ok=True)
+    if regime is None:
+        regime = np.zeros(len(timestamps), dtype=np.int8)
+    arrays = [timestamps, open_, high, low, close, prob_up, atr, regime]
+    for name, arr in zip(DATASET_ARRAYS, arrays):
+        np.save(os.path.join(directory, f"{name}.npy"), np.asarray(arr))
+    with open(os.path.join(directory, "symbols.json"), "w") as f:
+        json.dump(list(symbols), f)
+
+
+def build_dataset(directory, bars_by_symbol, regime=None):
+    """Aligns ccxt-style bars, computes walk-forward probabilities once and saves them."""
+    symbols, timestamps, ohlcv = align_bars(bars_by_symbol)
+    open_, high, low, close, volume = ohlcv
+    prob_up, atr = walk_forward_probabilities(high, low, close, volume)
+    save_dataset(directory, symbols, timestamps,
+                 open_, high, low, close, prob_up, atr, regime)
+
+
+def load_dataset(directory):
+    if directory not in _datasets:
+        data = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in DATASET_ARRAYS}
+        with open(os.path.join(directory, "symbols.json")) as f:
+            data["symbols"] = json.load(f)
+        _datasets[directory] = data
+    return _datasets[directory]
+
+
+def normalize_params(params):
+    # Accept settings-style names (ATR_MULTIPLIER) as well as exit_rules keys
+    out = {}
+    for name, value in params.items():
+        key = name.lower()
+        if key not in DEFAULT_PARAMS:
+            raise ValueError(f"Unknown strategy parameter: {name}")
+        out[key] = value
+    return out
+
+
+def grid(space):
+    """Every combination of {name: [values]}."""
+    names = list(space)
+    for values in itertools.product(*(space[n] for n in names)):
+        yield normalize_params(dict(zip(names, values)))
+
+
+def random_search(space, n_samples, seed=42):
+    """
+    n_samples draws from {name: [choices] or {"min", "max"}}; ranges are
+    sampled uniformly (as integers when both bounds are ints).
+    """
+    rng = random.Random(seed)
+    for _ in range(n_samples):
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, dict):
+                if isinstance(spec["min"], int) and isinstance(spec["max"], int):
+                    params[name] = rng.randint(spec["min"], spec["max"])
+                else:
+                    params[name] = rng.uniform(spec["min"], spec["max"])
+            else:
+                params[name] = rng.choice(spec)
+        yield normalize_params(params)
+
+
+def walk_forward_splits(n_bars, folds, train_ratio=3):
+    """
+    Rolling (train, test) bar ranges: each fold trains on train_ratio test
+    windows and is tested on the window right after, then rolls forward.
+    """
+    test_bars = n_bars // (folds + train_ratio)
+    train_bars = test_bars * train_ratio
+    splits = []
+    for k in range(folds):
+        start = k * test_bars
+        splits.append(((start, start + train_bars),
+                      (start + train_bars, start + train_bars + test_bars)))
+    return splits
+
+
+def job_key(params, segments):
+    payload = json.dumps(
+        {"params": params, "segments": segments}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def run_segment(directory, params, start, end, initial_balance=INITIAL_PAPER_BALANCE):
+    """Backtests bars [start, end) of a memory-mapped dataset; returns the stats."""
+    data = load_dataset(directory)
+    cut = slice(start, end)
+    result = Backtester(params, initial_balance).run(
+        data["symbols"],
+        data["timestamps"][cut],
+        data["open"][:, cut],
+        data["high"][:, cut],
+        data["low"][:, cut],
+        data["close"][:, cut],
+        data["prob_up"][:, cut],
+        data["atr"][:, cut],
+        data["regime"][cut],
+    )
+    return {k: float(v) for k, v in result["stats"].items()}
+
+
+def run_job(directory, params, segments, initial_balance=INITIAL_PAPER_BALANCE):
+    """Worker entry point: stats for each named (start, end) segment."""
+    return {name: run_segment(directory, params, start, end, initial_balance)
+            for name, (start, end) in segments.items()}
+
+
+class ParameterSweep:
+    """
+    Fans backtests of many parameter sets out over a process pool. Workers
+    memory-map the dataset instead of receiving it pickled. Every finished
+    job is appended to results.jsonl, so an interrupted sweep resumes where
+    it stopped.
+    """
+
+    def __init__(self, data_dir, out_dir, objective="total_pnl", workers=None,
+                 initial_balance=INITIAL_PAPER_BALANCE):
+        self.data_dir = data_dir
+        self.out_dir = out_dir
+        self.objective = objective
+        self.workers = workers or os.cpu_count() or 1
+        self.initial_balance = initial_balance
+        os.makedirs(out_dir, exist_ok=True)
+        self.results_path = os.path.join(out_dir, RESULTS_FILE)
+
+    def _load_done(self):
+        done = {}
+        if not os.path.exists(self.results_path):
+            return done
+        with open(self.results_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from an interrupted write
+                done[record["key"]] = record
+        return done
+
+    def _jobs(self, param_sets, folds):
+        n_bars = len(load_dataset(self.data_dir)["timestamps"])
+        if folds:
+            fold_segments = [{"train": list(train), "test": list(test)}
+                             for train, test in walk_forward_splits(n_bars, folds)]
+        else:
+            fold_segments = [{"full": [0, n_bars]}]
+
+        for params in param_sets:
+            for fold, segments in enumerate(fold_segments):
+                yield job_key(params, segments), params, fold, segments
+
+    def run(self, param_sets, folds=0):
+        done = self._load_done()
+        jobs = [job for job in self._jobs(param_sets, folds)
+                if job[0] not in done]
+        print(
+            f"🧪 Sweep: {len(jobs)} jobs to run, {len(done)} already done ({self.workers} workers)")
+
+        if jobs:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            try:
+                futures = {
+                    pool.submit(run_job, self.data_dir, params, segments, self.initial_balance): (key, params, fold)
+                    for key, params, fold, segments in jobs
+                }
+                with open(self.results_path, "a") as f:
+                    for i, future in enumerate(as_completed(futures), 1):
+                        key, params, fold = futures[future]
+                        try:
+                            stats = future.result()
+                        except Exception as e:
+                            print(f"⚠️ Sweep job {params} failed: {e}")
+                            continue
+                        record = {"key": key, "params": params,
+                                  "fold": fold, "stats": stats}
+                        f.write(json.dumps(record) + "\n")
+                        f.flush()
+                        done[key] = record
+                        if i % 50 == 0 or i == len(futures):
+                            print(f"🧪 {i}/{len(futures)} jobs finished")
+            finally:
+                pool.shutdown(cancel_futures=True)
+
+        wanted = {job[0] for job in self._jobs(param_sets, folds)}
+        return self.write_tables([done[k] for k in wanted if k in done], folds)
+
+    def write_tables(self, records, folds):
+        """Ranked results.csv, plus walk_forward.csv with each fold's out-of-sample winner."""
+        rows = []
+        for r in records:
+            for segment, stats in r["stats"].items():
+                rows.append({**r["params"], "fold": r["fold"],
+                            "segment": segment, **stats})
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows)
+        param_cols = sorted({k for r in records for k in r["params"]})
+
+        ranked_segment = "train" if folds else "full"
+        ranked = (
+            df[df["segment"] == ranked_segment]
+            .groupby(param_cols, dropna=False)
+            .mean(numeric_only=True)
+            .drop(columns=["fold"])
+            .sort_values(self.objective, ascending=False)
+            .reset_index()
+        )
+        ranked.to_csv(os.path.join(self.out_dir, "results.csv"), index=False)
+
+        if folds:
+            winners = []
+            for fold, fold_df in df.groupby("fold"):
+                train = fold_df[fold_df["segment"] == "train"]
+                best = train.sort_values(
+                    self.objective, ascending=False).iloc[0]
+                params = best[param_cols]
+                test = fold_df[(fold_df["segment"] == "test") &
+                               (fold_df[param_cols] == params).all(axis=1)]
+                if len(test):
+                    winners.append(test.iloc[0])
+            pd.DataFrame(winners).to_csv(
+                os.path.join(self.out_dir, "walk_forward.csv"), index=False)
+
+        print(
+            f"🏆 Best by {self.objective}: {ranked.iloc[0][param_cols].to_dict()}")
+        return ranked
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parameter sweep over a saved backtest dataset")
+    parser.add_argument("--data", required=True,
+                        help="Directory written by save_dataset/build_dataset")
+    parser.add_argument("--out", required=True,
+                        help="Output directory (resumes if it has results)")
+    parser.add_argument("--space", required=True,
+                        help='JSON file, e.g. {"ATR_MULTIPLIER": [1.5, 2, 3]}')
+    parser.add_argument("--random", type=int, default=0,
+                        help="Random samples instead of the full grid")
+    parser.add_argument("--folds", type=int, default=0,
+                        help="Walk-forward folds (0 = whole range)")
+    parser.add_argument("--objective", default="total_pnl")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.space) as f:
+        space = json.load(f)
+    param_sets = list(random_search(space, args.random)
+                      if args.random else grid(space))
+
+    sweep = ParameterSweep(args.data, args.out,
+                           args.objective, args.workers)
+    sweep.run(param_sets, folds=args.folds)
+
+
+if __name__ == "__main__":
+    main()
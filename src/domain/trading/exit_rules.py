@@ -0,0 +1,96 @@
+import numpy as np
+from src.config.settings import (
+    TRAILING_STOP_PCT, TRAILING_ROI_ACTIVATION, ROE_TARGET, ATR_MULTIPLIER,
+    BREAKEVEN_TRIGGER_PCT, LEVERAGE, RISK_PER_TRADE_PCT, MIN_TRADE_SIZE,
+    MAX_POSITIONS, CONFIDENCE_THRESHOLD, MAX_DAILY_LOSS_PCT, DCA_STEP_PCT, MAX_DCA,
+)
+
+# Exit/DCA rules shared by TradeManager (scalars) and the backtester (arrays).
+# Every function works element-wise on NumPy arrays and on plain floats.
+
+DEFAULT_PARAMS = {
+    "trailing_stop_pct": TRAILING_STOP_PCT,
+    "trailing_roi_activation": TRAILING_ROI_ACTIVATION,
+    "roe_target": ROE_TARGET,
+    "atr_multiplier": ATR_MULTIPLIER,
+    "breakeven_trigger_pct": BREAKEVEN_TRIGGER_PCT,
+    "leverage": LEVERAGE,
+    "risk_per_trade_pct": RISK_PER_TRADE_PCT,
+    "min_trade_size": MIN_TRADE_SIZE,
+    "max_positions": MAX_POSITIONS,
+    "confidence_threshold": CONFIDENCE_THRESHOLD,
+    "max_daily_loss_pct": MAX_DAILY_LOSS_PCT,
+    "dca_step_pct": DCA_STEP_PCT,
+    "max_dca": MAX_DCA,
+}
+
+
+def resolve_params(overrides=None):
+    params = dict(DEFAULT_PARAMS)
+    if overrides:
+        params.update(overrides)
+    params["take_profit_pct"] = params["roe_target"] / params["leverage"]
+    return params
+
+
+def position_pnl(is_long, entry, amount, price):
+    return np.where(is_long, (price - entry) * amount, (entry - price) * amount)
+
+
+def position_roi(pnl, margin):
+    margin = np.asarray(margin, dtype=np.float64)
+    safe = np.where(margin > 0, margin, 1.0)
+    return np.where(margin > 0, pnl / safe, 0.0)
+
+
+def price_move_pct(is_long, entry, price):
+    return np.where(is_long, (price - entry) / entry, (entry - price) / entry)
+
+
+def dca_due(is_long, entry, price, dca_count, params):
+    return (price_move_pct(is_long, entry, price) <= -params["dca_step_pct"]) & (dca_count < params["max_dca"])
+
+
+def trail_best_price(is_long, best, price, roi, params):
+    """New high-water mark: only moves once ROI has reached the activation level."""
+    improved = (roi >= params["trailing_roi_activation"]) & np.where(
+        is_long, price > best, price < best)
+    return np.where(improved, price, best), improved
+
+
+def breakeven_trigger(active, roi, params):
+    return ~np.asarray(active, dtype=bool) & (roi >= params["breakeven_trigger_pct"])
+
+
+def stop_price(is_long, entry, best, atr, breakeven, params):
+    pct_stop = np.where(
+        is_long, best * (1 - params["trailing_stop_pct"]), best * (1 + params["trailing_stop_pct"]))
+    atr_stop = np.where(
+        is_long, best - atr * params["atr_multiplier"], best + atr * params["atr_multiplier"])
+    stop = np.where(atr > 0, atr_stop, pct_stop)
+    # With breakeven active the stop never sits on the losing side of entry
+    protected = np.where(is_long, np.maximum(
+        stop, entry), np.minimum(stop, entry))
+    return np.where(breakeven, protected, stop)
+
+
+def take_profit_price(is_long, entry, params):
+    return np.where(is_long, entry * (1 + params["take_profit_pct"]), entry * (1 - params["take_profit_pct"]))
+
+
+def exit_hits(is_long, price, stop, take_profit):
+    """Returns (stop_hit, tp_hit); the stop wins when both apply."""
+    stop_hit = np.where(is_long, price < stop, price > stop)
+    tp_hit = np.where(is_long, price >= take_profit,
+                      price <= take_profit) & ~stop_hit
+    return stop_hit, tp_hit
+
+
+def entry_margin(balance, params):
+    """Mirror of TradingBot.open_position sizing; 0 means no trade."""
+    balance = np.asarray(balance, dtype=np.float64)
+    target = balance * params["risk_per_trade_pct"]
+    floor = np.where(balance > params["min_trade_size"],
+                     params["min_trade_size"], balance * 0.95)
+    target = np.where(target < params["min_trade_size"], floor, target)
+    return np.where(target < 1.0, 0.0, target)
@@ -0,0 +1,69 @@
+import time
+import threading
+from datetime import datetime, timezone
+from src.config.settings import EXCHANGE_MODE, REPLAY_SPEED
+
+
+class ReplayFinished(BaseException):
+    # BaseException so the bot loop's `except Exception` retry does not swallow it
+    pass
+
+
+class Clock:
+    """Wall clock. Everything that schedules on time goes through `clock`."""
+
+    def now_ms(self):
+        return int(time.time() * 1000)
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def utcnow(self):
+        return datetime.utcnow()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Replay clock: sleep() advances virtual time instantly, or at `speed`
+    times real time when speed > 0. Raises ReplayFinished once the end of
+    the replay window is reached.
+    """
+
+    def __init__(self, speed=REPLAY_SPEED, start_ms=0, end_ms=None):
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.reset(start_ms, end_ms)
+
+    def reset(self, start_ms, end_ms=None):
+        with self.lock:
+            self.start_ms = start_ms
+            self.current_ms = start_ms
+            self.end_ms = end_ms
+
+    def now_ms(self):
+        with self.lock:
+            return self.current_ms
+
+    def monotonic(self):
+        return self.now_ms() / 1000
+
+    def utcnow(self):
+        return datetime.fromtimestamp(self.now_ms() / 1000, timezone.utc).replace(tzinfo=None)
+
+    def advance(self, seconds):
+        with self.lock:
+            self.current_ms += int(seconds * 1000)
+            finished = self.end_ms is not None and self.current_ms >= self.end_ms
+        if finished:
+            raise ReplayFinished()
+
+    def sleep(self, seconds):
+        if self.speed > 0:
+            time.sleep(seconds / self.speed)
+        self.advance(seconds)
+
+
+clock = VirtualClock() if EXCHANGE_MODE == "replay" else Clock()
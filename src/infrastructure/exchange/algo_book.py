@@ -0,0 +1,125 @@
+import threading
+
+
+class LocalAlgoBook:
+    """
+    Local stand-in for OKX OCO algo orders (stop-loss + take-profit on one
+    position). Used for paper trading and by the replay exchange. Orders
+    trigger when the traded range reaches a trigger price; the stop wins
+    when a range covers both.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def create(self, symbol, side, amount, stop_price, tp_price):
+        with self.lock:
+            algo_id = f"sim-{self.next_id}"
+            self.next_id += 1
+            self.orders[algo_id] = {
+                "id": algo_id,
+                "symbol": symbol,
+                "side": side,  # Side of the position being protected
+                "amount": amount,
+                "stop_price": stop_price,
+                "tp_price": tp_price,
+                "state": "live",
+                "trigger": None,
+                "price": None,
+            }
+            return dict(self.orders[algo_id])
+
+    def get(self, algo_id):
+        with self.lock:
+            order = self.orders.get(algo_id)
+            return dict(order) if order else None
+
+    def amend(self, algo_id, stop_price=None, tp_price=None, amount=None):
+        with self.lock:
+            order = self.orders[algo_id]
+            if order["state"] != "live":
+                raise ValueError(f"algo {algo_id} is {order['state']}")
+            if stop_price is not None:
+                order["stop_price"] = stop_price
+            if tp_price is not None:
+                order["tp_price"] = tp_price
+            if amount is not None:
+                order["amount"] = amount
+            return dict(order)
+
+    def cancel(self, algo_id):
+        with self.lock:
+            order = self.orders.get(algo_id)
+            if order and order["state"] == "live":
+                order["state"] = "canceled"
+            return dict(order) if order else None
+
+    def check(self, algo_id, low, high):
+        """Triggers the order if [low, high] reached a trigger; returns its state."""
+        with self.lock:
+            order = self.orders.get(algo_id)
+            if order is None:
+                return None
+            if order["state"] == "live":
+                if order["side"] == "LONG":
+                    stop_hit = low <= order["stop_price"]
+                    tp_hit = high >= order["tp_price"]
+                else:
+                    stop_hit = high >= order["stop_price"]
+                    tp_hit = low <= order["tp_price"]
+                if stop_hit:
+                    order.update(state="triggered", trigger="sl",
+                                 price=order["stop_price"])
+                elif tp_hit:
+                    order.update(state="triggered", trigger="tp",
+                                 price=order["tp_price"])
+            return dict(order)
+
+
+class PaperAlgoClient:
+    """
+    The protective-order half of ExchangeClient for paper trading. Prices
+    come in through on_price (a PriceFeed listener, plus the trading loop's
+    own polls); each check judges the range seen since the previous one,
+    the way the exchange would have watched every trade.
+    """
+
+    def __init__(self):
+        self.book = LocalAlgoBook()
+        self.ranges = {}  # algo id -> [low, high] since the last check
+        self.lock = threading.Lock()
+
+    def on_price(self, symbol, price, received_at=None):
+        with self.lock:
+            for algo_id, order in list(self.book.orders.items()):
+                if order["symbol"] != symbol or order["state"] != "live":
+                    continue
+                seen = self.ranges.get(algo_id)
+                if seen is None:
+                    self.ranges[algo_id] = [price, price]
+                else:
+                    seen[0] = min(seen[0], price)
+                    seen[1] = max(seen[1], price)
+
+    def _check(self, algo_id):
+        with self.lock:
+            seen = self.ranges.pop(algo_id, None)
+        if seen is not None:
+            self.book.check(algo_id, *seen)
+        return self.book.get(algo_id)
+
+    def create_protective_orders(self, symbol, side, amount, stop_price, tp_price):
+        return self.book.create(symbol, side, amount, stop_price, tp_price)["id"]
+
+    def amend_protective_orders(self, symbol, algo_id, stop_price=None, tp_price=None, amount=None):
+        self._check(algo_id)
+        return self.book.amend(algo_id, stop_price, tp_price, amount)
+
+    def cancel_protective_orders(self, symbol, algo_id):
+        self._check(algo_id)
+        return self.book.cancel(algo_id)
+
+    def fetch_protective_order(self, symbol, algo_id):
+        return self._check(algo_id)
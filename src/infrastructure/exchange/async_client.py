@@ -0,0 +1,21 @@
+import ccxt.async_support as ccxt_async
+from src.config.settings import API_KEY, SECRET_KEY, PASSWORD
+
+
+class AsyncExchangeClient:
+    def __init__(self):
+        self.client = ccxt_async.okx(
+            {
+                "apiKey": API_KEY,
+                "secret": SECRET_KEY,
+                "password": PASSWORD,
+                "enableRateLimit": True,
+                "options": {"defaultType": "swap"},
+            }
+        )
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit, since=None):
+        return await self.client.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+    async def close(self):
+        await self.client.close()
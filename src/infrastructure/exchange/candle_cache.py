@@ -0,0 +1,152 @@
+import threading
+import numpy as np
+import ccxt
+from src.config.settings import CANDLE_CACHE_SIZE
+from src.infrastructure.persistence.candle_store import candle_store
+from src.infrastructure.clock import clock
+
+
+class CandleBuffer:
+    """Fixed-size ring buffer of [timestamp, open, high, low, close, volume] rows."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, 6), dtype=np.float64)
+        self.start = 0
+        self.count = 0
+
+    @property
+    def last_ts(self):
+        if self.count == 0:
+            return None
+        return int(self.data[(self.start + self.count - 1) % self.capacity, 0])
+
+    def reset(self, bars):
+        bars = np.asarray(bars, dtype=np.float64)[-self.capacity:]
+        self.data[:len(bars)] = bars
+        self.start = 0
+        self.count = len(bars)
+
+    def append(self, bar):
+        if self.count < self.capacity:
+            self.data[(self.start + self.count) % self.capacity] = bar
+            self.count += 1
+        else:
+            # Full: overwrite the oldest row
+            self.data[self.start] = bar
+            self.start = (self.start + 1) % self.capacity
+
+    def replace_last(self, bar):
+        self.data[(self.start + self.count - 1) % self.capacity] = bar
+
+    def window(self, limit):
+        n = min(limit, self.count)
+        idx = (self.start + self.count - n + np.arange(n)) % self.capacity
+        return self.data[idx]
+
+
+class CandleCache:
+    """
+    Per-symbol, per-timeframe candle store. Only bars after the last cached
+    timestamp are requested from the exchange; the still-forming last bar
+    is replaced on every refresh. With a candle store, cold buffers are
+    seeded from disk and closed bars are written through to series the
+    store already holds.
+    """
+
+    def __init__(self, capacity=CANDLE_CACHE_SIZE, store=None):
+        self.capacity = capacity
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.store = store
+
+    def seed(self, symbol, timeframe, limit):
+        if self.store is None or (symbol, timeframe) in self.buffers:
+            return
+        if not self.store.has(symbol, timeframe):
+            return
+        bars = self.store.tail(symbol, timeframe, self.capacity).tolist()
+        if len(bars) >= limit:
+            self.merge(symbol, timeframe, bars, full=True)
+
+    def _write_through(self, symbol, timeframe, bars):
+        if self.store is None or not bars or not self.store.has(symbol, timeframe):
+            return
+        last_ts = self.store.last_ts(symbol, timeframe)
+        if last_ts is None:
+            return  # Empty series file, left to the downloader like a missing one
+        tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        if bars[0][0] > last_ts + tf_ms:
+            return  # Would leave a hole; the downloader backfills from the last stored bar
+        try:
+            self.store.append(symbol, timeframe, bars)
+        except Exception as e:
+            print(f"⚠️ Candle store append failed for {symbol}: {e}")
+
+    def plan(self, symbol, timeframe, limit, now_ms=None):
+        """Returns (since, fetch_limit) for the next request, since=None meaning a full download."""
+        buf = self.buffers.get((symbol, timeframe))
+        if buf is None or buf.count < limit:
+            return None, limit
+
+        now_ms = now_ms if now_ms is not None else clock.now_ms()
+        tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        missing = (now_ms - buf.last_ts) // tf_ms + 1
+        if missing >= limit:
+            # Too far behind, a delta would not be cheaper
+            return None, limit
+        return buf.last_ts, int(missing) + 1
+
+    def merge(self, symbol, timeframe, bars, full=False):
+        if not bars:
+            return
+        key = (symbol, timeframe)
+        with self.lock:
+            buf = self.buffers.get(key)
+            if buf is None:
+                buf = self.buffers[key] = CandleBuffer(self.capacity)
+            if full or buf.count == 0:
+                buf.reset(bars)
+                return
+
+            tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+            if bars[0][0] > buf.last_ts + tf_ms:
+                # Gap between cache and delta, start over from the new bars
+                buf.reset(bars)
+                return
+
+            for bar in bars:
+                ts = bar[0]
+                last_ts = buf.last_ts
+                if ts == last_ts:
+                    buf.replace_last(bar)
+                elif ts > last_ts:
+                    buf.append(bar)
+
+    def window(self, symbol, timeframe, limit):
+        with self.lock:
+            buf = self.buffers.get((symbol, timeframe))
+            if buf is None:
+                return None
+            return buf.window(limit)
+
+    def fetch(self, client, symbol, timeframe, limit):
+        self.seed(symbol, timeframe, limit)
+        since, fetch_limit = self.plan(symbol, timeframe, limit)
+        bars = client.fetch_ohlcv(
+            symbol, timeframe=timeframe, limit=fetch_limit, since=since)
+        self.merge(symbol, timeframe, bars, full=since is None)
+        self._write_through(symbol, timeframe, bars)
+        return self.window(symbol, timeframe, limit)
+
+    async def fetch_async(self, client, symbol, timeframe, limit):
+        self.seed(symbol, timeframe, limit)
+        since, fetch_limit = self.plan(symbol, timeframe, limit)
+        bars = await client.fetch_ohlcv(
+            symbol, timeframe=timeframe, limit=fetch_limit, since=since)
+        self.merge(symbol, timeframe, bars, full=since is None)
+        self._write_through(symbol, timeframe, bars)
+        return self.window(symbol, timeframe, limit)
+
+
+candle_cache = CandleCache(store=candle_store if candle_store.enabled else None)
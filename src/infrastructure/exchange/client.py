@@ -1,5 +1,15 @@
 import ccxt
-from src.config.settings import API_KEY, SECRET_KEY, PASSWORD, LEVERAGE, REAL_TRADING
+from src.config.settings import API_KEY, SECRET_KEY, PASSWORD, LEVERAGE, REAL_TRADING, EXCHANGE_MODE, BATCH_ORDER_LIMIT
+
+# OKX algo order states -> live/triggered/canceled/failed
+ALGO_STATES = {
+    "live": "live",
+    "pause": "live",
+    "effective": "triggered",
+    "partially_effective": "triggered",
+    "canceled": "canceled",
+    "order_failed": "failed",
+}
 
 
 class ExchangeClient:
@@ -28,11 +38,11 @@ class ExchangeClient:
         except:
             pass
 
-    def fetch_ohlcv(self, symbol, timeframe, limit):
-        return self.client.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+    def fetch_ohlcv(self, symbol, timeframe, limit, since=None):
+        return self.client.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
 
-    def fetch_tickers(self):
-        return self.client.fetch_tickers()
+    def fetch_tickers(self, symbols=None):
+        return self.client.fetch_tickers(symbols)
 
     def fetch_ticker(self, symbol):
         return self.client.fetch_ticker(symbol)
@@ -40,6 +50,9 @@ class ExchangeClient:
     def fetch_funding_rate(self, symbol):
         return self.client.fetch_funding_rate(symbol)
 
+    def fetch_funding_rates(self, symbols=None):
+        return self.client.fetch_funding_rates(symbols)
+
     def create_market_buy_order(self, symbol, amount):
         if REAL_TRADING:
             return self.client.create_market_buy_order(symbol, amount)
@@ -56,6 +69,41 @@ class ExchangeClient:
         if REAL_TRADING:
             return self.client.create_limit_sell_order(symbol, amount, price)
 
+    def create_market_orders(self, orders):
+        """
+        Market orders through OKX's batch endpoint, BATCH_ORDER_LIMIT per
+        request. `orders` are {"symbol", "side": buy/sell, "amount",
+        "reduce_only"}; returns one {"symbol", "ok", "order", "error"} per
+        order, in the same order.
+        """
+        if not REAL_TRADING:
+            return None
+        results = []
+        for i in range(0, len(orders), BATCH_ORDER_LIMIT):
+            chunk = orders[i:i + BATCH_ORDER_LIMIT]
+            requests = [{
+                "symbol": o["symbol"],
+                "type": "market",
+                "side": o["side"],
+                "amount": o["amount"],
+                "params": {"reduceOnly": True} if o.get("reduce_only") else {},
+            } for o in chunk]
+            try:
+                placed = self.client.create_orders(requests)
+            except Exception as e:
+                results += [{"symbol": o["symbol"], "ok": False, "order": None, "error": str(e)}
+                            for o in chunk]
+                continue
+            for o, order in zip(chunk, placed):
+                if order.get("status") == "rejected":
+                    error = (order.get("info") or {}).get("sMsg") or "rejected"
+                    results.append(
+                        {"symbol": o["symbol"], "ok": False, "order": order, "error": error})
+                else:
+                    results.append(
+                        {"symbol": o["symbol"], "ok": True, "order": order, "error": None})
+        return results
+
     def cancel_order(self, order_id, symbol):
         if REAL_TRADING:
             return self.client.cancel_order(order_id, symbol)
@@ -64,5 +112,76 @@ class ExchangeClient:
         if REAL_TRADING:
             return self.client.fetch_order(order_id, symbol)
 
-
-exchange_client = ExchangeClient()
+    # --- Protective algo orders (OKX OCO: stop-loss + take-profit) ---
+
+    def _inst_id(self, symbol):
+        self.client.load_markets()
+        return self.client.market(symbol)["id"]
+
+    def create_protective_orders(self, symbol, side, amount, stop_price, tp_price):
+        """Reduce-only OCO closing a `side` position; triggers fill at market. Returns the algo id."""
+        if not REAL_TRADING:
+            return None
+        response = self.client.private_post_trade_order_algo({
+            "instId": self._inst_id(symbol),
+            "tdMode": "isolated",
+            "side": "sell" if side == "LONG" else "buy",
+            "ordType": "oco",
+            "sz": self.client.amount_to_precision(symbol, amount),
+            "reduceOnly": "true",
+            "slTriggerPx": self.client.price_to_precision(symbol, stop_price),
+            "slOrdPx": "-1",
+            "tpTriggerPx": self.client.price_to_precision(symbol, tp_price),
+            "tpOrdPx": "-1",
+        })
+        return response["data"][0]["algoId"]
+
+    def amend_protective_orders(self, symbol, algo_id, stop_price=None, tp_price=None, amount=None):
+        """Moves the triggers (and size) of a live OCO in place."""
+        if not REAL_TRADING:
+            return None
+        params = {"instId": self._inst_id(symbol), "algoId": algo_id}
+        if stop_price is not None:
+            params["newSlTriggerPx"] = self.client.price_to_precision(
+                symbol, stop_price)
+            params["newSlOrdPx"] = "-1"
+        if tp_price is not None:
+            params["newTpTriggerPx"] = self.client.price_to_precision(
+                symbol, tp_price)
+            params["newTpOrdPx"] = "-1"
+        if amount is not None:
+            params["newSz"] = self.client.amount_to_precision(symbol, amount)
+        return self.client.private_post_trade_amend_algos(params)
+
+    def cancel_protective_orders(self, symbol, algo_id):
+        if REAL_TRADING:
+            return self.client.private_post_trade_cancel_algos(
+                [{"instId": self._inst_id(symbol), "algoId": algo_id}])
+
+    def fetch_protective_order(self, symbol, algo_id):
+        """
+        {"id", "state": live/triggered/canceled/failed, "trigger": "sl"/"tp"/None,
+        "price": trigger price that fired}
+        """
+        if not REAL_TRADING:
+            return None
+        info = self.client.private_get_trade_order_algo({"algoId": algo_id})["data"][0]
+        state = ALGO_STATES.get(info.get("state"), "live")
+        # OKX reports which leg fired via actualSide ("sl"/"tp")
+        trigger = info.get("actualSide") or None
+        price = info.get("actualPx") or (
+            info.get("slTriggerPx") if trigger == "sl" else info.get("tpTriggerPx"))
+        return {
+            "id": algo_id,
+            "state": state,
+            "trigger": trigger,
+            "price": float(price) if price else None,
+        }
+
+
+if EXCHANGE_MODE == "replay":
+    from src.infrastructure.exchange.replay_client import ReplayExchangeClient
+    exchange_client = ReplayExchangeClient.from_store()
+else:
+    from src.infrastructure.exchange.tape import record
+    exchange_client = record(ExchangeClient())
@@ -0,0 +1,69 @@
+import threading
+from src.config.settings import FUNDING_FALLBACK_TTL_SECONDS
+from src.infrastructure.exchange.client import exchange_client
+from src.infrastructure.clock import clock
+
+
+class FundingCache:
+    """
+    Funding rates keyed by symbol. Each entry remembers the exchange's next
+    funding time and is only refetched once that time has passed.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.entries = {}  # symbol -> {"rate": float, "next_funding": ms}
+        self.lock = threading.Lock()
+
+    def _store(self, symbol, funding, now_ms):
+        next_funding = funding.get("fundingTimestamp") or funding.get(
+            "nextFundingTimestamp")
+        if not next_funding or next_funding <= now_ms:
+            next_funding = now_ms + FUNDING_FALLBACK_TTL_SECONDS * 1000
+        with self.lock:
+            self.entries[symbol] = {
+                "rate": float(funding.get("fundingRate") or 0.0),
+                "next_funding": next_funding,
+            }
+
+    def stale_symbols(self, symbols, now_ms=None):
+        now_ms = now_ms if now_ms is not None else clock.now_ms()
+        with self.lock:
+            return [
+                s for s in symbols
+                if s not in self.entries or self.entries[s]["next_funding"] <= now_ms
+            ]
+
+    def refresh(self, symbols):
+        now_ms = clock.now_ms()
+        stale = self.stale_symbols(symbols, now_ms)
+        if not stale:
+            return
+
+        try:
+            # One bulk call for the whole universe
+            rates = self.client.fetch_funding_rates(stale)
+            for symbol, funding in rates.items():
+                self._store(symbol, funding, now_ms)
+        except Exception as e:
+            print(f"⚠️ Bulk funding fetch failed, falling back per symbol: {e}")
+            for symbol in stale:
+                try:
+                    self._store(
+                        symbol, self.client.fetch_funding_rate(symbol), now_ms)
+                except:
+                    pass
+
+    def get_rate(self, symbol):
+        self.refresh([symbol])
+        with self.lock:
+            entry = self.entries.get(symbol)
+        return entry["rate"] if entry else 0.0
+
+    def rates(self, symbols):
+        self.refresh(symbols)
+        with self.lock:
+            return {s: self.entries[s]["rate"] if s in self.entries else 0.0 for s in symbols}
+
+
+funding_cache = FundingCache(exchange_client)
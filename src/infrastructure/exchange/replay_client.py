@@ -0,0 +1,330 @@
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import ccxt
+from src.config.settings import (
+    INITIAL_PAPER_BALANCE, TIMEFRAME, REPLAY_DATA_DIR, REPLAY_TIMEFRAME, REPLAY_START, REPLAY_END,
+)
+from src.infrastructure.clock import clock as default_clock
+from src.infrastructure.persistence.candle_store import CandleStore
+from src.infrastructure.exchange.ws_feed import to_inst_id
+from src.infrastructure.exchange.algo_book import LocalAlgoBook
+
+WARMUP_BARS = 100  # fetch_data needs this much history before the replay starts
+DAY_MS = 24 * 60 * 60 * 1000
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000
+PATH_X = np.array([0.0, 1 / 3, 2 / 3, 1.0])
+
+
+def parse_date(value):
+    if value is None:
+        return None
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+class ReplayExchangeClient:
+    """
+    Drop-in ExchangeClient backed by stored candles and the virtual clock.
+    Inside a candle the price walks open -> low -> high -> close (or
+    open -> high -> low -> close on down bars), so prices, tickers and the
+    still-forming candle only depend on the clock and every run is identical.
+    Orders are filled locally: market orders at the current price, limit
+    orders once the price path trades through them, `limit_fill_ratio` of
+    the order size per check so partial fills can be exercised. Protective
+    algo orders trigger on the range traded since they were last checked.
+    """
+
+    def __init__(self, series, timeframe=REPLAY_TIMEFRAME, clock=default_clock,
+                 balance=INITIAL_PAPER_BALANCE, limit_fill_ratio=1.0):
+        self.series = {s: np.asarray(rows, dtype=np.float64)
+                       for s, rows in series.items() if len(rows)}
+        self.timeframe = timeframe
+        self.tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        self.clock = clock
+        self.balance = balance
+        self.limit_fill_ratio = limit_fill_ratio
+        self.orders = {}
+        self.next_order_id = 1
+        self.algos = LocalAlgoBook()
+        self.algo_checked = {}  # algo id -> time of the last trigger check
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, directory=REPLAY_DATA_DIR, timeframe=REPLAY_TIMEFRAME, symbols=None,
+                   start_ms=parse_date(REPLAY_START), end_ms=parse_date(REPLAY_END)):
+        store = CandleStore(directory)
+        symbols = symbols or store.symbols(timeframe)
+        client = cls({s: store.read(s, timeframe)
+                     for s in symbols}, timeframe)
+        client.reset_clock(start_ms, end_ms)
+        print(
+            f"⏪ Replay: {len(client.series)} symbols from {directory} ({timeframe})")
+        return client
+
+    def reset_clock(self, start_ms=None, end_ms=None):
+        """Points the virtual clock at the replay window, defaulting to the whole data set."""
+        first = min(int(rows[0, 0]) for rows in self.series.values())
+        last = max(int(rows[-1, 0]) for rows in self.series.values())
+        warmup = WARMUP_BARS * ccxt.Exchange.parse_timeframe(TIMEFRAME) * 1000
+        self.clock.reset(start_ms or first + warmup, end_ms or last + self.tf_ms)
+
+    # --- Prices ---
+
+    def _bar_index(self, rows, now):
+        # Last bar that opened at or before `now`
+        return int(np.searchsorted(rows[:, 0], now, "right")) - 1
+
+    def _waypoints(self, row):
+        _, open_, high, low, close = row[:5]
+        if close >= open_:
+            return np.array([open_, low, high, close])
+        return np.array([open_, high, low, close])
+
+    def _progress(self, row, now):
+        return min(max((now - row[0]) / self.tf_ms, 0.0), 1.0)
+
+    def _partial(self, row, now):
+        """The candle as it looks at `now`: extremes visited so far, close = current price."""
+        f = self._progress(row, now)
+        points = self._waypoints(row)
+        price = float(np.interp(f, PATH_X, points))
+        seen = np.append(points[PATH_X <= f], price)
+        return np.array([row[0], row[1], seen.max(), seen.min(), price, row[5] * f])
+
+    def _price(self, symbol, now):
+        rows = self.series.get(symbol)
+        if rows is None:
+            raise ccxt.BadSymbol(f"replay has no data for {symbol}")
+        i = self._bar_index(rows, now)
+        if i < 0:
+            raise ccxt.BadSymbol(f"{symbol} has no data before {now}")
+        return float(self._partial(rows[i], now)[4])
+
+    # --- Market data ---
+
+    def fetch_ohlcv(self, symbol, timeframe, limit, since=None):
+        rows = self.series.get(symbol)
+        if rows is None:
+            raise ccxt.BadSymbol(f"replay has no data for {symbol}")
+        tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        if tf_ms % self.tf_ms:
+            raise ccxt.BadRequest(
+                f"replay data is {self.timeframe}, cannot build {timeframe}")
+
+        now = self.clock.now_ms()
+        hi = self._bar_index(rows, now) + 1
+        if since is not None:
+            lo = int(np.searchsorted(rows[:, 0], since, "left"))
+        else:
+            first_bucket = (now // tf_ms - limit + 1) * tf_ms
+            lo = int(np.searchsorted(rows[:, 0], first_bucket, "left"))
+        if hi <= lo:
+            return []
+
+        block = np.array(rows[lo:hi])
+        block[-1] = self._partial(block[-1], now)
+        if tf_ms != self.tf_ms:
+            buckets = block[:, 0].astype(np.int64) // tf_ms * tf_ms
+            _, starts = np.unique(buckets, return_index=True)
+            ends = np.r_[starts[1:], len(block)] - 1
+            block = np.column_stack([
+                buckets[starts],
+                block[starts, 1],
+                np.maximum.reduceat(block[:, 2], starts),
+                np.minimum.reduceat(block[:, 3], starts),
+                block[ends, 4],
+                np.add.reduceat(block[:, 5], starts),
+            ])
+        block = block[:limit] if since is not None else block[-limit:]
+        return [[int(b[0]), *map(float, b[1:])] for b in block]
+
+    def fetch_ticker(self, symbol):
+        now = self.clock.now_ms()
+        rows = self.series.get(symbol)
+        price = self._price(symbol, now)
+        day = rows[(rows[:, 0] > now - DAY_MS) & (rows[:, 0] <= now)]
+        open_24h = float(day[0, 1]) if len(day) else price
+        volume = float(day[:, 5].sum())
+        return {
+            "symbol": symbol,
+            "timestamp": now,
+            "last": price,
+            "close": price,
+            "bid": price,
+            "ask": price,
+            "open": open_24h,
+            "high": float(max(day[:, 2].max(), price)) if len(day) else price,
+            "low": float(min(day[:, 3].min(), price)) if len(day) else price,
+            "percentage": (price / open_24h - 1) * 100 if open_24h else 0.0,
+            "baseVolume": volume,
+            "info": {"instType": "SWAP", "instId": to_inst_id(symbol), "volCcy24h": str(volume)},
+        }
+
+    def fetch_tickers(self, symbols=None):
+        now = self.clock.now_ms()
+        tickers = {}
+        for symbol in symbols or self.series:
+            rows = self.series.get(symbol)
+            # Only symbols that are trading at this point of the replay
+            if rows is None or self._bar_index(rows, now) < 0 or rows[-1, 0] + self.tf_ms <= now:
+                continue
+            tickers[symbol] = self.fetch_ticker(symbol)
+        return tickers
+
+    def fetch_funding_rate(self, symbol):
+        now = self.clock.now_ms()
+        return {
+            "symbol": symbol,
+            "fundingRate": 0.0,
+            "fundingTimestamp": (now // FUNDING_INTERVAL_MS + 1) * FUNDING_INTERVAL_MS,
+        }
+
+    def fetch_funding_rates(self, symbols=None):
+        return {s: self.fetch_funding_rate(s) for s in symbols or self.series}
+
+    # --- Account ---
+
+    def fetch_balance(self):
+        # Margin is not modelled; the paper ledger in TradeManager tracks PnL
+        return self.balance
+
+    def set_leverage(self, symbol):
+        pass
+
+    # --- Orders ---
+
+    def _create_order(self, symbol, side, order_type, amount, price=None):
+        now = self.clock.now_ms()
+        with self.lock:
+            order_id = str(self.next_order_id)
+            self.next_order_id += 1
+            order = {
+                "id": order_id,
+                "symbol": symbol,
+                "side": side,
+                "type": order_type,
+                "amount": amount,
+                "price": price,
+                "timestamp": now,
+                "status": "open",
+                "filled": 0.0,
+                "remaining": amount,
+                "average": None,
+            }
+            self.orders[order_id] = order
+        self._match(order, now)
+        return dict(order)
+
+    def _fill(self, order, price, qty=None):
+        qty = order["remaining"] if qty is None else min(
+            qty, order["remaining"])
+        filled = order["filled"] + qty
+        average = ((order["average"] or 0.0) *
+                   order["filled"] + price * qty) / filled
+        remaining = order["amount"] - filled
+        if remaining <= order["amount"] * 1e-9:
+            remaining = 0.0
+        order.update(filled=filled, remaining=remaining, average=average,
+                     status="closed" if remaining == 0 else "open")
+
+    def _range(self, symbol, since, now):
+        """Lowest and highest price traded between `since` and `now`, and the current price."""
+        current = self._price(symbol, now)
+        rows = self.series[symbol]
+        i = self._bar_index(rows, now)
+        j = self._bar_index(rows, since)
+        lows = [current] + [r[3] for r in rows[j + 1:i]]
+        highs = [current] + [r[2] for r in rows[j + 1:i]]
+        if i > j:
+            partial = self._partial(rows[i], now)
+            lows.append(partial[3])
+            highs.append(partial[2])
+        return min(lows), max(highs), current
+
+    def _match(self, order, now):
+        if order["status"] != "open":
+            return
+        if order["type"] == "market":
+            self._fill(order, self._price(order["symbol"], now))
+            return
+
+        low, high, current = self._range(order["symbol"], order["timestamp"], now)
+        qty = order["amount"] * self.limit_fill_ratio
+        if order["side"] == "buy" and low <= order["price"]:
+            # Marketable right now: takes the current price, else rests at the limit
+            self._fill(order, min(current, order["price"]), qty)
+        elif order["side"] == "sell" and high >= order["price"]:
+            self._fill(order, max(current, order["price"]), qty)
+
+    def create_market_buy_order(self, symbol, amount):
+        return self._create_order(symbol, "buy", "market", amount)
+
+    def create_market_sell_order(self, symbol, amount):
+        return self._create_order(symbol, "sell", "market", amount)
+
+    def create_limit_buy_order(self, symbol, amount, price):
+        return self._create_order(symbol, "buy", "limit", amount, price)
+
+    def create_limit_sell_order(self, symbol, amount, price):
+        return self._create_order(symbol, "sell", "limit", amount, price)
+
+    def create_market_orders(self, orders):
+        results = []
+        for o in orders:
+            try:
+                order = self._create_order(
+                    o["symbol"], o["side"], "market", o["amount"])
+                results.append(
+                    {"symbol": o["symbol"], "ok": True, "order": order, "error": None})
+            except Exception as e:
+                results.append(
+                    {"symbol": o["symbol"], "ok": False, "order": None, "error": str(e)})
+        return results
+
+    def fetch_order(self, order_id, symbol):
+        order = self.orders.get(order_id)
+        if order is None:
+            raise ccxt.OrderNotFound(order_id)
+        self._match(order, self.clock.now_ms())
+        return dict(order)
+
+    def cancel_order(self, order_id, symbol):
+        order = self.orders.get(order_id)
+        if order is None:
+            raise ccxt.OrderNotFound(order_id)
+        self._match(order, self.clock.now_ms())
+        if order["status"] == "open":
+            order["status"] = "canceled"
+        return dict(order)
+
+    # --- Protective algo orders ---
+
+    def _check_algo(self, algo_id):
+        now = self.clock.now_ms()
+        order = self.algos.get(algo_id)
+        if order is None:
+            raise ccxt.OrderNotFound(algo_id)
+        low, high, _ = self._range(
+            order["symbol"], self.algo_checked.get(algo_id, now), now)
+        self.algo_checked[algo_id] = now
+        return self.algos.check(algo_id, low, high)
+
+    def create_protective_orders(self, symbol, side, amount, stop_price, tp_price):
+        order = self.algos.create(symbol, side, amount, stop_price, tp_price)
+        self.algo_checked[order["id"]] = self.clock.now_ms()
+        return order["id"]
+
+    def amend_protective_orders(self, symbol, algo_id, stop_price=None, tp_price=None, amount=None):
+        # Anything traded before the amend was judged against the old triggers
+        self._check_algo(algo_id)
+        return self.algos.amend(algo_id, stop_price, tp_price, amount)
+
+    def cancel_protective_orders(self, symbol, algo_id):
+        self._check_algo(algo_id)
+        return self.algos.cancel(algo_id)
+
+    def fetch_protective_order(self, symbol, algo_id):
+        return self._check_algo(algo_id)
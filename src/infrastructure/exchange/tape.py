@@ -0,0 +1,227 @@
+import os
+import re
+import gzip
+import json
+import heapq
+import atexit
+import inspect
+import threading
+import time
+import queue
+from src.config.settings import TAPE_DIR, TAPE_SEGMENT_MB, TAPE_FLUSH_SECONDS, TAPE_FLUSH_KB
+from src.infrastructure.clock import clock
+
+RECORDED_METHODS = {
+    "fetch_ohlcv", "fetch_ticker", "fetch_tickers", "fetch_funding_rate",
+    "fetch_funding_rates", "fetch_balance", "fetch_order", "cancel_order",
+    "create_market_buy_order", "create_market_sell_order",
+    "create_limit_buy_order", "create_limit_sell_order", "create_market_orders",
+    "create_protective_orders", "amend_protective_orders",
+    "cancel_protective_orders", "fetch_protective_order",
+}
+SEGMENT_PATTERN = re.compile(r"tape-(\d+)\.jsonl\.gz$")
+
+
+class TapeWriter:
+    """
+    Append-only market-data tape. Callers only enqueue; a background thread
+    serializes records to JSON lines and holds them until `flush_seconds`
+    after the first one or until they reach `flush_kb`, then appends the
+    batch to the current segment as one gzip member, rotating to a new
+    segment once it grows past `segment_mb`. A crash loses at most the
+    unflushed batch.
+    """
+
+    def __init__(self, directory, segment_mb=TAPE_SEGMENT_MB, flush_seconds=TAPE_FLUSH_SECONDS,
+                 flush_kb=TAPE_FLUSH_KB):
+        self.directory = directory
+        self.segment_bytes = int(segment_mb * 1024 * 1024)
+        self.flush_seconds = flush_seconds
+        self.flush_bytes = int(flush_kb * 1024)
+        self.queue = queue.SimpleQueue()
+        self.dropped = 0
+        self.written = 0
+        os.makedirs(directory, exist_ok=True)
+        existing = [int(m.group(1)) for m in map(SEGMENT_PATTERN.match, os.listdir(directory)) if m]
+        # Never append to a segment a previous run may have left torn
+        self.segment = max(existing, default=0) + 1
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def record(self, method, args, response=None, error=None):
+        record = {"t": clock.now_ms(), "m": method, "a": args}
+        if error is not None:
+            record["e"] = error
+        else:
+            record["r"] = response
+        self.queue.put(record)
+
+    def _path(self):
+        return os.path.join(self.directory, f"tape-{self.segment:06d}.jsonl.gz")
+
+    def _write(self, lines):
+        if not lines:
+            return
+        data = gzip.compress(("\n".join(lines) + "\n").encode())
+        path = self._path()
+        with open(path, "ab") as f:
+            f.write(data)
+            size = f.tell()
+        self.written += len(lines)
+        if size >= self.segment_bytes:
+            self.segment += 1
+
+    def _run(self):
+        lines, size, deadline = [], 0, None
+        while True:
+            # Idle until a record arrives, then until the batch is due
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self.queue.get(timeout=wait)
+            except queue.Empty:
+                record = False
+            stop = record is None
+            if record:
+                try:
+                    line = json.dumps(record, default=str)
+                    lines.append(line)
+                    size += len(line) + 1
+                except Exception:
+                    self.dropped += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if stop or size >= self.flush_bytes or (deadline is not None and time.monotonic() >= deadline):
+                try:
+                    self._write(lines)
+                except Exception as e:
+                    print(f"⚠️ Tape write failed: {e}")
+                lines, size, deadline = [], 0, None
+            if stop:
+                return
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=10)
+
+
+class RecordingClient:
+    """
+    Wraps ExchangeClient or AsyncExchangeClient and records every response
+    (or error) of the market-data and order methods to a TapeWriter.
+    Responses are handed to the writer thread as-is, so callers must not
+    mutate them afterwards.
+    """
+
+    def __init__(self, client, writer):
+        self.client = client
+        self.writer = writer
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in RECORDED_METHODS or not callable(attr):
+            return attr
+        writer = self.writer
+
+        if inspect.iscoroutinefunction(attr):
+            async def recorded_async(*args, **kwargs):
+                try:
+                    response = await attr(*args, **kwargs)
+                except Exception as e:
+                    writer.record(name, [args, kwargs], error=repr(e))
+                    raise
+                writer.record(name, [args, kwargs], response)
+                return response
+            return recorded_async
+
+        def recorded(*args, **kwargs):
+            try:
+                response = attr(*args, **kwargs)
+            except Exception as e:
+                writer.record(name, [args, kwargs], error=repr(e))
+                raise
+            writer.record(name, [args, kwargs], response)
+            return response
+        return recorded
+
+
+tape_writer = TapeWriter(TAPE_DIR) if TAPE_DIR else None
+
+
+def record(client):
+    """The client wrapped for recording when TAPE_DIR is set, else unchanged."""
+    return RecordingClient(client, tape_writer) if tape_writer else client
+
+
+def record_price(symbol, price, received_at):
+    # PriceFeed listener: WS prices are part of what the bot saw
+    tape_writer.record("ws_price", [symbol], price)
+
+
+class TapeReader:
+    """
+    Streams a tape back. Threads enqueue with call-time timestamps, so
+    records can be slightly out of order on disk; a `reorder_ms` window
+    restores time order without loading the tape into memory.
+    """
+
+    def __init__(self, directory, reorder_ms=10_000):
+        self.directory = directory
+        self.reorder_ms = reorder_ms
+
+    def segments(self):
+        names = [n for n in os.listdir(self.directory)
+                 if SEGMENT_PATTERN.match(n)]
+        return [os.path.join(self.directory, n) for n in sorted(names)]
+
+    def _raw(self):
+        for path in self.segments():
+            try:
+                with gzip.open(path, "rt") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+            except (EOFError, gzip.BadGzipFile) as e:
+                # Torn final member from a crash: keep what was readable
+                print(f"⚠️ Tape segment {path} is truncated: {e}")
+
+    def records(self, start_ms=None, end_ms=None, methods=None):
+        heap = []
+        seq = 0  # Keeps equal timestamps in write order
+        for record in self._raw():
+            if methods is not None and record["m"] not in methods:
+                continue
+            heapq.heappush(heap, (record["t"], seq, record))
+            seq += 1
+            while heap and heap[0][0] < record["t"] - self.reorder_ms:
+                yield from self._emit(heapq.heappop(heap)[2], start_ms, end_ms)
+        while heap:
+            yield from self._emit(heapq.heappop(heap)[2], start_ms, end_ms)
+
+    @staticmethod
+    def _emit(record, start_ms, end_ms):
+        if start_ms is not None and record["t"] < start_ms:
+            return
+        if end_ms is not None and record["t"] >= end_ms:
+            return
+        yield record
+
+    def candles(self, timeframe, start_ms=None, end_ms=None):
+        """
+        symbol -> [timestamp, o, h, l, c, v] rows from every recorded
+        fetch_ohlcv of `timeframe`, the latest response winning, for
+        ReplayExchangeClient.
+        """
+        bars = {}
+        for record in self.records(start_ms, end_ms, methods={"fetch_ohlcv"}):
+            args, kwargs = record["a"]
+            if "r" not in record or kwargs.get("timeframe", args[1] if len(args) > 1 else None) != timeframe:
+                continue
+            symbol = kwargs.get("symbol", args[0] if args else None)
+            series = bars.setdefault(symbol, {})
+            for bar in record["r"]:
+                series[bar[0]] = bar
+        return {s: [series[ts] for ts in sorted(series)] for s, series in bars.items()}
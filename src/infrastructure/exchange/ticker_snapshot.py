@@ -0,0 +1,53 @@
+import threading
+from src.config.settings import TICKER_TTL_SECONDS
+from src.infrastructure.exchange.client import exchange_client
+from src.infrastructure.clock import clock
+
+
+class TickerSnapshot:
+    """
+    Tick-scoped ticker cache around ExchangeClient. One bulk fetch_tickers per
+    tick fills it; every consumer then reads from it until entries go stale.
+    """
+
+    def __init__(self, client, ttl=TICKER_TTL_SECONDS):
+        self.client = client
+        self.ttl = ttl
+        self.tickers = {}  # symbol -> (fetched_at, ticker)
+        self.lock = threading.Lock()
+
+    def _store(self, tickers):
+        now = clock.monotonic()
+        with self.lock:
+            for symbol, ticker in tickers.items():
+                self.tickers[symbol] = (now, ticker)
+
+    def refresh(self, symbols=None):
+        if symbols is not None and not symbols:
+            return {}
+        tickers = self.client.fetch_tickers(symbols)
+        self._store(tickers)
+        return tickers
+
+    def fetch_tickers(self, symbols=None):
+        return self.refresh(symbols)
+
+    def fetch_ticker(self, symbol):
+        with self.lock:
+            cached = self.tickers.get(symbol)
+        if cached and clock.monotonic() - cached[0] <= self.ttl:
+            return cached[1]
+
+        ticker = self.client.fetch_ticker(symbol)
+        self._store({symbol: ticker})
+        return ticker
+
+    def invalidate(self, symbol=None):
+        with self.lock:
+            if symbol is None:
+                self.tickers.clear()
+            else:
+                self.tickers.pop(symbol, None)
+
+
+ticker_snapshot = TickerSnapshot(exchange_client)
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+import aiohttp
+from src.config.settings import WS_PUBLIC_URL, WS_CHANNEL, WS_PRICE_MAX_AGE
+
+
+def to_inst_id(symbol):
+    # "BTC/USDT:USDT" -> "BTC-USDT-SWAP"
+    base, rest = symbol.split("/")
+    quote = rest.split(":")[0]
+    return f"{base}-{quote}-SWAP"
+
+
+def from_inst_id(inst_id):
+    # "BTC-USDT-SWAP" -> "BTC/USDT:USDT"
+    base, quote = inst_id.split("-")[:2]
+    return f"{base}/{quote}:{quote}"
+
+
+class PriceFeed:
+    """
+    OKX public WebSocket ticker/trades subscriber. Runs its own asyncio loop in
+    a background thread and keeps a last-price table for the tracked symbols.
+    Point `url` at a local stand-in server (see ws_replay.py) to run offline.
+    """
+
+    def __init__(self, url=WS_PUBLIC_URL, channel=WS_CHANNEL):
+        self.url = url
+        self.channel = channel
+        self.prices = {}  # symbol -> (price, received_at)
+        self.symbols = set()
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.ws = None
+        self.running = False
+
+    # --- Public API (called from other threads) ---
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self.ws is not None:
+            asyncio.run_coroutine_threadsafe(self.ws.close(), self.loop)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def add_listener(self, callback):
+        # callback(symbol, price, received_at), called on the feed thread
+        self.listeners.append(callback)
+
+    def track(self, symbols):
+        """Subscribe to `symbols` and drop everything else."""
+        symbols = set(symbols)
+        with self.lock:
+            added = symbols - self.symbols
+            removed = self.symbols - symbols
+            self.symbols = symbols
+            for symbol in removed:
+                self.prices.pop(symbol, None)
+        self._send_threadsafe("unsubscribe", removed)
+        self._send_threadsafe("subscribe", added)
+
+    def subscribe(self, symbols):
+        with self.lock:
+            added = set(symbols) - self.symbols
+            self.symbols |= added
+        self._send_threadsafe("subscribe", added)
+
+    def get_price(self, symbol, max_age=WS_PRICE_MAX_AGE):
+        with self.lock:
+            entry = self.prices.get(symbol)
+        if entry is None or time.monotonic() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    # --- Feed thread ---
+
+    def _send_threadsafe(self, op, symbols):
+        if symbols and self.ws is not None and self.loop is not None:
+            asyncio.run_coroutine_threadsafe(
+                self._send(op, symbols), self.loop)
+
+    async def _send(self, op, symbols):
+        if not symbols or self.ws is None or self.ws.closed:
+            return
+        args = [{"channel": self.channel, "instId": to_inst_id(s)}
+                for s in sorted(symbols)]
+        await self.ws.send_str(json.dumps({"op": op, "args": args}))
+
+    def _handle(self, raw):
+        if raw == "pong":
+            return
+        msg = json.loads(raw)
+        if "event" in msg:
+            if msg["event"] == "error":
+                print(f"⚠️ WS Error: {msg.get('msg')}")
+            return
+
+        now = time.monotonic()
+        for item in msg.get("data", []):
+            symbol = from_inst_id(item["instId"])
+            price = float(item["last"] if "last" in item else item["px"])
+            with self.lock:
+                if symbol not in self.symbols:
+                    continue
+                self.prices[symbol] = (price, now)
+            for callback in self.listeners:
+                try:
+                    callback(symbol, price, now)
+                except Exception as e:
+                    print(f"⚠️ Price listener failed: {e}")
+
+    async def _connect(self, session):
+        async with session.ws_connect(self.url) as ws:
+            self.ws = ws
+            print(f"🔌 WS Connected: {self.url}")
+            # Resubscribe everything on every (re)connect
+            with self.lock:
+                symbols = set(self.symbols)
+            await self._send("subscribe", symbols)
+
+            while self.running:
+                try:
+                    msg = await ws.receive(timeout=25)
+                except asyncio.TimeoutError:
+                    # OKX drops idle connections after 30s
+                    await ws.send_str("ping")
+                    continue
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    self._handle(msg.data)
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.ERROR):
+                    break
+        self.ws = None
+
+    async def _main(self):
+        backoff = 1
+        async with aiohttp.ClientSession() as session:
+            while self.running:
+                try:
+                    await self._connect(session)
+                    backoff = 1
+                except Exception as e:
+                    print(f"⚠️ WS Disconnected: {e}")
+                self.ws = None
+                if not self.running:
+                    break
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._main())
+
+
+price_feed = PriceFeed()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+from aiohttp import web
+from src.infrastructure.exchange.ws_feed import to_inst_id
+
+
+class ReplayFeedServer:
+    """
+    Local stand-in for the OKX public WebSocket. Speaks the same
+    subscribe/unsubscribe protocol and pushes `ticks` ((symbol, price) pairs)
+    to subscribed clients, so PriceFeed can be exercised offline.
+    """
+
+    def __init__(self, ticks, host="127.0.0.1", port=8765, interval=0.01, channel="tickers"):
+        self.ticks = list(ticks)
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.channel = channel
+        self.loop = None
+        self.thread = None
+        self.runner = None
+        self.sockets = set()
+        self.ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/ws/v5/public"
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        subscribed = set()
+
+        async def pump():
+            for symbol, price in self.ticks:
+                await asyncio.sleep(self.interval)
+                inst_id = to_inst_id(symbol)
+                if inst_id not in subscribed:
+                    continue
+                key = "last" if self.channel == "tickers" else "px"
+                await ws.send_str(json.dumps({
+                    "arg": {"channel": self.channel, "instId": inst_id},
+                    "data": [{"instId": inst_id, key: str(price)}],
+                }))
+
+        task = asyncio.ensure_future(pump())
+        async for msg in ws:
+            if msg.data == "ping":
+                await ws.send_str("pong")
+                continue
+            req = json.loads(msg.data)
+            for arg in req.get("args", []):
+                if req["op"] == "subscribe":
+                    subscribed.add(arg["instId"])
+                else:
+                    subscribed.discard(arg["instId"])
+                await ws.send_str(json.dumps({"event": req["op"], "arg": arg}))
+        task.cancel()
+        self.sockets.discard(ws)
+        return ws
+
+    async def _shutdown(self):
+        for ws in list(self.sockets):
+            await ws.close()
+        await self.runner.cleanup()
+
+    async def _serve(self):
+        app = web.Application()
+        app.router.add_get("/ws/v5/public", self._handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        self.ready.set()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+        self.loop.run_forever()
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout=5)
+
+    def stop(self):
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(
+            self._shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
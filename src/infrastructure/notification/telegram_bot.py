@@ -20,7 +20,7 @@ class TelegramService:
         # Access shared state in a thread-safe way (mostly ok for reading)
         bal = self.bot_instance.get_current_balance()
         pnl = self.bot_instance.manager.state["total_pnl"]
-        trades = self.bot_instance.manager.state["trades"]
+        trades = dict(self.bot_instance.manager.state["trades"])
 
         msg = f"🤖 **Status Report**\n\n"
         msg += f"💳 Balance: ${bal:.2f}\n"
@@ -0,0 +1,218 @@
+import os
+import asyncio
+import argparse
+import threading
+from urllib.parse import quote, unquote
+import numpy as np
+import ccxt
+from src.config.settings import CANDLE_STORE_DIR, CANDLE_DOWNLOAD_CONCURRENCY, TIMEFRAME
+from src.infrastructure.clock import clock
+
+ROW_WIDTH = 6  # timestamp, open, high, low, close, volume
+ROW_BYTES = ROW_WIDTH * 8
+EMPTY = np.zeros((0, ROW_WIDTH), dtype=np.float64)
+
+
+class CandleStore:
+    """
+    On-disk candle history: one append-only file of float64
+    [timestamp, open, high, low, close, volume] rows per symbol and
+    timeframe, read back through np.memmap. Only closed candles are stored,
+    in ascending timestamp order, so a time range is a zero-copy slice.
+    File and directory names are percent-encoded, so symbols() returns
+    exactly the symbols that were stored.
+    """
+
+    def __init__(self, directory=CANDLE_STORE_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.upgraded = set()  # (symbol, timeframe) already checked for a legacy file
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def path(self, symbol, timeframe):
+        # "BTC/USDT:USDT" -> "BTC%2FUSDT%3AUSDT.f64"
+        path = os.path.join(self.directory, quote(timeframe, safe=""),
+                            f"{quote(symbol, safe='')}.f64")
+        if (symbol, timeframe) not in self.upgraded:
+            self._upgrade(symbol, timeframe, path)
+        return path
+
+    def _upgrade(self, symbol, timeframe, path):
+        # Stores written before the encoding replaced "/" and ":" with "_"
+        legacy = os.path.join(self.directory, timeframe,
+                              symbol.replace("/", "_").replace(":", "_") + ".f64")
+        if legacy != path and os.path.exists(legacy) and not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(legacy, path)
+        self.upgraded.add((symbol, timeframe))
+
+    def symbols(self, timeframe):
+        # Inverse of path()
+        try:
+            names = sorted(os.listdir(os.path.join(self.directory, quote(timeframe, safe=""))))
+        except FileNotFoundError:
+            return []
+        out = []
+        for name in names:
+            if not name.endswith(".f64"):
+                continue
+            name = name[:-4]
+            if "%" in name:
+                out.append(unquote(name))
+                continue
+            # Legacy name (symbols always contain "/"): best effort, upgraded on first path()
+            parts = name.split("_")
+            symbol = f"{parts[0]}/{parts[1]}"
+            if len(parts) > 2:
+                symbol += f":{parts[2]}"
+            out.append(symbol)
+        return out
+
+    def has(self, symbol, timeframe):
+        return self.enabled and os.path.exists(self.path(symbol, timeframe))
+
+    def _open(self, symbol, timeframe):
+        path = self.path(symbol, timeframe)
+        try:
+            rows = os.path.getsize(path) // ROW_BYTES
+        except FileNotFoundError:
+            return EMPTY
+        if rows == 0:
+            return EMPTY
+        # Sized to whole rows so a torn final write is ignored
+        return np.memmap(path, dtype=np.float64, mode="r", shape=(rows, ROW_WIDTH))
+
+    def last_ts(self, symbol, timeframe):
+        data = self._open(symbol, timeframe)
+        return int(data[-1, 0]) if len(data) else None
+
+    def read(self, symbol, timeframe, start=None, end=None):
+        """Rows with start <= timestamp < end (ms), as a read-only view of the file."""
+        data = self._open(symbol, timeframe)
+        ts = data[:, 0]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, "left"))
+        hi = len(data) if end is None else int(
+            np.searchsorted(ts, end, "left"))
+        return data[lo:hi]
+
+    def tail(self, symbol, timeframe, limit):
+        return self._open(symbol, timeframe)[-limit:]
+
+    def read_many(self, symbols, timeframe, start=None, end=None):
+        """symbol -> rows, in the shape backtest.engine.align_bars expects."""
+        return {s: self.read(s, timeframe, start, end) for s in symbols}
+
+    def append(self, symbol, timeframe, bars, now_ms=None):
+        """
+        Appends the closed bars newer than the stored history and returns how
+        many were written. The still-forming candle is never stored.
+        """
+        if not self.enabled or bars is None or len(bars) == 0:
+            return 0
+        bars = np.asarray(bars, dtype=np.float64).reshape(-1, ROW_WIDTH)
+        now_ms = now_ms if now_ms is not None else clock.now_ms()
+        tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+        with self.lock:
+            last = self.last_ts(symbol, timeframe)
+            keep = bars[:, 0] + tf_ms <= now_ms
+            if last is not None:
+                keep &= bars[:, 0] > last
+            new = bars[keep]
+            if len(new) == 0:
+                return 0
+            # Pages can overlap or arrive unsorted: dedupe and order before writing
+            _, idx = np.unique(new[:, 0], return_index=True)
+            new = new[idx]
+
+            path = self.path(symbol, timeframe)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab") as f:
+                size = f.tell()
+                if size % ROW_BYTES:
+                    f.truncate(size - size % ROW_BYTES)  # Drop a torn row
+                new.tofile(f)
+        return len(new)
+
+    async def _backfill(self, client, symbol, timeframe, since_ms, page_limit, semaphore):
+        tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        last = self.last_ts(symbol, timeframe)
+        # Resume from the stored history when there is one
+        if last is not None:
+            cursor = last + tf_ms
+        elif since_ms is not None:
+            cursor = since_ms
+        else:
+            cursor = clock.now_ms() - page_limit * tf_ms
+        written = 0
+        while True:
+            async with semaphore:
+                try:
+                    bars = await client.fetch_ohlcv(
+                        symbol, timeframe=timeframe, limit=page_limit, since=cursor)
+                except Exception as e:
+                    print(f"⚠️ Download failed for {symbol} at {cursor}: {e}")
+                    break
+            bars = [b for b in bars or [] if b[0] >= cursor]
+            if not bars:
+                break
+            written += self.append(symbol, timeframe, bars)
+            next_cursor = int(bars[-1][0]) + tf_ms
+            if next_cursor <= cursor:
+                break
+            cursor = next_cursor
+        return symbol, written
+
+    async def download(self, client, symbols, timeframe=TIMEFRAME, since_ms=None,
+                       concurrency=CANDLE_DOWNLOAD_CONCURRENCY, page_limit=100):
+        """
+        Backfills every symbol from since_ms (or from its last stored candle)
+        up to now, paging through the exchange with at most `concurrency`
+        requests in flight. Safe to interrupt and rerun.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(
+            *(self._backfill(client, s, timeframe, since_ms, page_limit, semaphore)
+              for s in symbols)
+        )
+        for symbol, written in results:
+            print(f"💾 {symbol} {timeframe}: +{written} candles")
+        return dict(results)
+
+
+candle_store = CandleStore()
+
+
+def main():
+    from src.infrastructure.exchange.async_client import AsyncExchangeClient
+
+    parser = argparse.ArgumentParser(
+        description="Download candle history into the local store")
+    parser.add_argument("symbols", nargs="+",
+                        help="e.g. BTC/USDT:USDT ETH/USDT:USDT")
+    parser.add_argument("--timeframe", default=TIMEFRAME)
+    parser.add_argument("--days", type=int, default=365,
+                        help="History to backfill for new symbols")
+    parser.add_argument("--dir", default=CANDLE_STORE_DIR or "data/candles")
+    parser.add_argument("--concurrency", type=int,
+                        default=CANDLE_DOWNLOAD_CONCURRENCY)
+    args = parser.parse_args()
+
+    store = CandleStore(args.dir)
+    since_ms = ccxt.Exchange.milliseconds() - args.days * 24 * 60 * 60 * 1000
+
+    async def run():
+        client = AsyncExchangeClient()
+        try:
+            await store.download(client, args.symbols, args.timeframe, since_ms, args.concurrency)
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
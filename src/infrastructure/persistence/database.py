@@ -0,0 +1,68 @@
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from src.config.settings import (
+    DB_HOST, DB_USER, DB_PASS, DB_NAME, DB_PORT, DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+)
+
+_engine = None
+_session_factory = None
+_lock = threading.Lock()
+_counters = {"connects": 0, "checkouts": 0, "invalidated": 0}
+
+
+def database_url():
+    if DATABASE_URL:
+        return DATABASE_URL
+    return f'postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+
+
+def _count(name):
+    def handler(*args):
+        _counters[name] += 1
+    return handler
+
+
+def get_engine():
+    """The process-wide engine; every repository shares its connection pool."""
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                engine = create_engine(
+                    database_url(),
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT,
+                    pool_recycle=DB_POOL_RECYCLE,
+                    pool_pre_ping=DB_POOL_PRE_PING,
+                )
+                event.listen(engine.pool, "connect", _count("connects"))
+                event.listen(engine.pool, "checkout", _count("checkouts"))
+                # Dead connections found by pre-ping or errors
+                event.listen(engine.pool, "invalidate", _count("invalidated"))
+                _session_factory = sessionmaker(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def get_session_factory():
+    get_engine()
+    return _session_factory
+
+
+def pool_stats():
+    """Connection pool usage, for the API and the dashboard."""
+    if _engine is None:
+        return {"initialized": False}
+    pool = _engine.pool
+    return {
+        "initialized": True,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        **_counters,
+    }
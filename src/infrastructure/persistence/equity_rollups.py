@@ -0,0 +1,116 @@
+import time
+import threading
+from datetime import timedelta
+from src.config.settings import EQUITY_COMPACT_INTERVAL_SECONDS, EQUITY_COMPACT_LAG_SECONDS
+from src.infrastructure.clock import clock
+from src.infrastructure.persistence.postgres_repo import (
+    EQUITY_TIERS, EQUITY_RETENTION_DAYS, bucket_start, to_datetime, to_iso,
+)
+
+BUCKETS_PER_BATCH = 1440  # Buckets per transaction (a day of 1m, two months of 1h)
+
+
+class EquityCompactor:
+    """
+    Background worker that folds raw equity rows into 1m OHLC rollups, 1m
+    into 1h and 1h into 1d, then prunes each tier past its retention.
+    Each tier has a watermark (stored in bot_state) before which it is
+    complete, so a pass only reads source rows newer than the last one,
+    and a tier only rolls up buckets its source tier has finished. Rows
+    are only pruned once the next tier has rolled them up.
+    """
+
+    def __init__(self, repo, interval=EQUITY_COMPACT_INTERVAL_SECONDS, lag=EQUITY_COMPACT_LAG_SECONDS):
+        self.repo = repo
+        self.interval = interval
+        self.lag = lag
+        self.running = False
+        self.thread = None
+        self.wake = threading.Event()
+        self.watermarks = {}
+        self.last_run_ms = None
+        self.written = 0
+        self.pruned = 0
+
+    def compact(self, now=None):
+        """One pass over every tier. Returns {tier: buckets written}."""
+        started = time.perf_counter()
+        now = to_datetime(now or clock.utcnow())
+        marks = self.repo.equity_watermarks()
+        # Raw rows younger than the lag may still be queued for writing
+        limit = now - timedelta(seconds=self.lag)
+        written = {}
+        for (source, _), (tier, seconds) in zip(EQUITY_TIERS, EQUITY_TIERS[1:]):
+            end = bucket_start(limit, seconds)
+            start = marks.get(tier)
+            if start is None:
+                oldest = self.repo.oldest_equity(source)
+                if oldest is None:
+                    break
+                start = bucket_start(oldest, seconds)
+            written[tier] = 0
+            while start < end:
+                stop = min(end, start + timedelta(seconds=seconds * BUCKETS_PER_BATCH))
+                written[tier] += self.repo.compact_equity(tier, source, start, stop)
+                start = stop
+            marks[tier] = start
+            limit = start
+
+        self.pruned += self.prune(now, marks)
+        self.written += sum(written.values())
+        self.watermarks = marks
+        self.last_run_ms = (time.perf_counter() - started) * 1000
+        return written
+
+    def prune(self, now, marks):
+        removed = 0
+        for i, (tier, seconds) in enumerate(EQUITY_TIERS):
+            days = EQUITY_RETENTION_DAYS[tier]
+            if days is None:
+                continue
+            cutoff = now - timedelta(days=days)
+            if i + 1 < len(EQUITY_TIERS):
+                # Never drop rows the next tier has not rolled up yet
+                rolled_up = marks.get(EQUITY_TIERS[i + 1][0])
+                if rolled_up is None:
+                    continue
+                cutoff = min(cutoff, rolled_up)
+            start = self.repo.oldest_equity(tier)
+            while start is not None and start < cutoff:
+                stop = min(cutoff, start + timedelta(seconds=seconds * BUCKETS_PER_BATCH))
+                removed += self.repo.prune_equity(tier, start, stop)
+                start = stop
+        return removed
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.wake.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+
+    def _run(self):
+        while self.running:
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️ Equity rollup pass failed: {e}")
+            self.wake.wait(self.interval)
+
+    def snapshot(self):
+        return {
+            "running": self.running,
+            "watermarks": {tier: to_iso(at) for tier, at in self.watermarks.items()},
+            "last_run_ms": self.last_run_ms,
+            "buckets_written": self.written,
+            "rows_pruned": self.pruned,
+        }
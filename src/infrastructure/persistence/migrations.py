@@ -0,0 +1,287 @@
+import time
+import argparse
+from sqlalchemy import text, inspect, DateTime
+from src.infrastructure.persistence.database import get_engine
+
+# Any constant works; every runner must use the same one
+MIGRATION_LOCK_ID = 72_010_001
+
+MIGRATIONS = []  # Ordered by version
+
+BACKFILL_BATCH_SIZE = 5000  # Rows per committed backfill batch
+
+
+def migration(version, description, transactional=True):
+    """
+    Registers a schema step. Steps run once, in version order, each in its
+    own transaction unless `transactional=False` (e.g. CREATE INDEX
+    CONCURRENTLY), and are recorded in schema_version.
+    """
+    def register(fn):
+        MIGRATIONS.append({"version": version, "description": description,
+                           "apply": fn, "transactional": transactional})
+        MIGRATIONS.sort(key=lambda m: m["version"])
+        return fn
+    return register
+
+
+def _columns(conn, table):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _timestamptz(conn):
+    return "TIMESTAMPTZ" if conn.dialect.name == "postgresql" else "TIMESTAMP"
+
+
+# The schema as first shipped. Pinned here rather than taken from the models,
+# so a new database walks through the same steps as an old one
+BASELINE_TABLES = [
+    """trades (
+        id {serial} NOT NULL, symbol VARCHAR, side VARCHAR, entry FLOAT, amount FLOAT,
+        margin FLOAT, best_price FLOAT, atr FLOAT, breakeven_active BOOLEAN,
+        dca_count INTEGER DEFAULT 0, status VARCHAR, created_at VARCHAR,
+        closed_at VARCHAR, pnl FLOAT, exit_reason VARCHAR, PRIMARY KEY (id))""",
+    """bot_state (key VARCHAR NOT NULL, value JSON, PRIMARY KEY (key))""",
+    """equity_history (
+        id {serial} NOT NULL, "timestamp" VARCHAR, balance FLOAT, equity FLOAT,
+        total_pnl FLOAT, PRIMARY KEY (id))""",
+    """users (username VARCHAR NOT NULL, password_hash VARCHAR, PRIMARY KEY (username))""",
+]
+
+
+@migration(1, "Create tables")
+def create_tables(conn):
+    # Leaves tables that already exist alone; the steps below bring old ones up to date
+    serial = "SERIAL" if conn.dialect.name == "postgresql" else "INTEGER"
+    for ddl in BASELINE_TABLES:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS " + ddl.format(serial=serial)))
+
+
+@migration(2, "trades: surrogate id primary key")
+def trades_id_key(conn):
+    if "id" in _columns(conn, "trades"):
+        return
+    print("⚠️ Migrating 'trades' table: Adding 'id' column and updating Primary Key...")
+    # The first schema keyed trades by symbol
+    conn.execute(text("ALTER TABLE trades DROP CONSTRAINT IF EXISTS trades_pkey"))
+    conn.execute(text("ALTER TABLE trades ADD COLUMN id SERIAL PRIMARY KEY"))
+
+
+@migration(3, "trades: DCA count and trade history columns")
+def trades_history_columns(conn):
+    existing = _columns(conn, "trades")
+    for name, ddl in [
+        ("dca_count", "INTEGER DEFAULT 0"),
+        ("created_at", "VARCHAR"),
+        ("closed_at", "VARCHAR"),
+        ("pnl", "FLOAT"),
+        ("exit_reason", "VARCHAR"),
+    ]:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE trades ADD COLUMN {name} {ddl}"))
+
+
+# ISO-string columns converted to timestamptz by steps 4-6
+TIMESTAMP_COLUMNS = [
+    ("trades", "created_at"),
+    ("trades", "closed_at"),
+    ("equity_history", "timestamp"),
+]
+
+
+def _is_typed(conn, table, column):
+    for c in inspect(conn).get_columns(table):
+        if c["name"] == column:
+            return isinstance(c["type"], DateTime)
+    return False
+
+
+def _pending_conversions(conn):
+    # Empty after a run; re-running a step is a no-op
+    return [(t, c) for t, c in TIMESTAMP_COLUMNS if not _is_typed(conn, t, c)]
+
+
+def _parse_expr(conn, column):
+    # Stored strings are naive UTC ISO-8601
+    if conn.dialect.name == "postgresql":
+        return f"""(NULLIF("{column}", '')::timestamp AT TIME ZONE 'UTC')"""
+    return f"""NULLIF(REPLACE("{column}", 'T', ' '), '')"""
+
+
+def _copy_rows(conn, table, column, lo=None, hi=None):
+    where = f'{column}_tz IS NULL AND "{column}" IS NOT NULL'
+    if lo is not None:
+        where += f" AND id > {lo} AND id <= {hi}"
+    return conn.execute(text(
+        f'UPDATE {table} SET {column}_tz = {_parse_expr(conn, column)} WHERE {where}')).rowcount
+
+
+@migration(4, "timestamps: add timestamptz shadow columns")
+def add_timestamp_columns(conn):
+    sql_type = _timestamptz(conn)
+    for table, column in _pending_conversions(conn):
+        if f"{column}_tz" not in _columns(conn, table):
+            # Nullable with no default: a catalog-only change, no table rewrite
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column}_tz {sql_type}"))
+
+
+@migration(5, "timestamps: backfill shadow columns in batches", transactional=False)
+def backfill_timestamps(conn):
+    # Autocommit per batch: short row locks, live writers are never blocked for long
+    for table, column in _pending_conversions(conn):
+        low, high = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM {table}")).one()
+        if low is None:
+            continue
+        copied = 0
+        for lo in range(low - 1, high, BACKFILL_BATCH_SIZE):
+            copied += _copy_rows(conn, table, column, lo, lo + BACKFILL_BATCH_SIZE)
+        print(f"   ↳ {table}.{column}: {copied} rows backfilled")
+
+
+@migration(6, "timestamps: swap shadow columns in")
+def swap_timestamp_columns(conn):
+    for table, column in _pending_conversions(conn):
+        # Rows written since the backfill, then a metadata-only swap
+        _copy_rows(conn, table, column)
+        conn.execute(text(f'ALTER TABLE {table} DROP COLUMN "{column}"'))
+        conn.execute(text(f'ALTER TABLE {table} RENAME COLUMN {column}_tz TO "{column}"'))
+
+
+INDEXES = [
+    ("ix_trades_status_symbol", "trades (status, symbol)"),
+    ("ix_trades_status_closed_at", "trades (status, closed_at)"),
+    ("ix_trades_open_symbol", "trades (symbol) WHERE status = 'OPEN'"),
+    ("ix_equity_history_timestamp", 'equity_history ("timestamp")'),
+]
+
+
+def _create_indexes(conn, indexes):
+    postgres = conn.dialect.name == "postgresql"
+    for name, target in indexes:
+        if postgres:
+            # An interrupted CONCURRENTLY build leaves an invalid index behind
+            valid = conn.execute(text(
+                "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name"), {"name": name}).scalar()
+            if valid is False:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target}"))
+        else:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {target}"))
+
+
+@migration(7, "trades/equity_history: status, symbol and time indexes", transactional=False)
+def create_indexes(conn):
+    _create_indexes(conn, INDEXES)
+
+
+@migration(8, "equity_rollups: 1m/1h/1d equity OHLC tiers")
+def create_equity_rollups(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS equity_rollups ("
+        f"tier VARCHAR NOT NULL, bucket {_timestamptz(conn)} NOT NULL, "
+        "open FLOAT, high FLOAT, low FLOAT, close FLOAT, balance FLOAT, total_pnl FLOAT, "
+        "PRIMARY KEY (tier, bucket))"))
+
+
+# Keyset order of closed trades, legacy rows without closed_at included
+CLOSED_ORDER_INDEXES = [
+    ("ix_trades_status_closed_order", "trades (status, (COALESCE(closed_at, created_at)), id)"),
+]
+
+
+@migration(9, "trades: closing-order index covering rows without closed_at", transactional=False)
+def create_closed_order_index(conn):
+    _create_indexes(conn, CLOSED_ORDER_INDEXES)
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, description VARCHAR, "
+        "applied_at VARCHAR, duration_ms FLOAT)"))
+
+
+def current_version(conn):
+    _ensure_version_table(conn)
+    return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def _lock(conn):
+    # Concurrent runners (API + bot starting together) queue here
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+def _unlock(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+def run_migrations(engine=None, target=None):
+    """Applies every pending step up to `target` (default: all). Returns the versions applied."""
+    engine = engine or get_engine()
+    started = time.perf_counter()
+    applied = []
+    # The lock is held on its own autocommit connection for the whole run
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        _lock(lock_conn)
+        try:
+            with engine.begin() as conn:
+                version = current_version(conn)
+            for step in MIGRATIONS:
+                if step["version"] <= version or (target is not None and step["version"] > target):
+                    continue
+                step_started = time.perf_counter()
+                if step["transactional"]:
+                    with engine.begin() as conn:
+                        step["apply"](conn)
+                else:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        step["apply"](conn)
+                duration_ms = (time.perf_counter() - step_started) * 1000
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        "INSERT INTO schema_version (version, description, applied_at, duration_ms) "
+                        "VALUES (:v, :d, :at, :ms)"),
+                        {"v": step["version"], "d": step["description"],
+                         "at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()), "ms": duration_ms})
+                applied.append(step["version"])
+                print(
+                    f"🗄️ Migration {step['version']} ({step['description']}) applied in {duration_ms:.1f}ms")
+        finally:
+            _unlock(lock_conn)
+
+    total_ms = (time.perf_counter() - started) * 1000
+    if applied:
+        print(f"✅ Schema migrated to version {applied[-1]} in {total_ms:.1f}ms")
+    else:
+        print(f"✅ Schema up to date (version {version}, checked in {total_ms:.1f}ms)")
+    return applied
+
+
+def status(engine=None):
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        version = current_version(conn)
+    pending = [m for m in MIGRATIONS if m["version"] > version]
+    return {"version": version, "latest": MIGRATIONS[-1]["version"],
+            "pending": [(m["version"], m["description"]) for m in pending]}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true",
+                        help="Show the schema version and pending steps only")
+    parser.add_argument("--target", type=int,
+                        help="Stop after this version")
+    args = parser.parse_args()
+    if args.status:
+        print(status())
+    else:
+        run_migrations(target=args.target)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
-from sqlalchemy import create_engine, Column, String, Float, Boolean, Integer, JSON
+from sqlalchemy import Column, String, Float, Boolean, Integer, JSON, DateTime, Index, text, func, tuple_
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from src.config.settings import DB_HOST, DB_USER, DB_PASS, DB_NAME, DB_PORT
+import threading
+from src.infrastructure.persistence.database import get_engine, get_session_factory
 import json
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from src.infrastructure.clock import clock
+from src.config.settings import EQUITY_RAW_RETENTION_DAYS, EQUITY_ROLLUP_RETENTION_DAYS, EQUITY_SERIES_MAX_POINTS, STREAM_BATCH_SIZE
 
 Base = declarative_base()
 
@@ -21,11 +23,29 @@ class Trade(Base):
     breakeven_active = Column(Boolean)
     dca_count = Column(Integer, default=0)
     status = Column(String, default="OPEN")
-    created_at = Column(String, default=datetime.utcnow().isoformat)
-    closed_at = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    closed_at = Column(DateTime(timezone=True), nullable=True)
     pnl = Column(Float, nullable=True)
     exit_reason = Column(String, nullable=True)
 
+    # Mirrored by migrations 7 and 9 for databases created before these existed
+    __table_args__ = (
+        Index("ix_trades_status_symbol", "status", "symbol"),
+        # Closed-trade history by time window
+        Index("ix_trades_status_closed_at", "status", "closed_at"),
+        # Closing order, legacy rows without closed_at included (see CLOSED_ORDER)
+        Index("ix_trades_status_closed_order", "status",
+              func.coalesce(closed_at, created_at), "id"),
+        # Open trades are a handful of rows among the whole history
+        Index("ix_trades_open_symbol", "symbol",
+              postgresql_where=text("status = 'OPEN'"),
+              sqlite_where=text("status = 'OPEN'")),
+    )
+
+
+# Trades closed before closed_at was recorded sort by when they opened
+CLOSED_ORDER = func.coalesce(Trade.closed_at, Trade.created_at)
+
 
 class BotState(Base):
     __tablename__ = 'bot_state'
@@ -36,11 +56,28 @@ class BotState(Base):
 class EquityHistory(Base):
     __tablename__ = 'equity_history'
     id = Column(Integer, primary_key=True, autoincrement=True)
-    timestamp = Column(String)
+    timestamp = Column(DateTime(timezone=True))
     balance = Column(Float)
     equity = Column(Float)
     total_pnl = Column(Float)
 
+    __table_args__ = (
+        Index("ix_equity_history_timestamp", "timestamp"),
+    )
+
+
+class EquityRollup(Base):
+    """OHLC of equity per bucket; balance and total_pnl are the bucket's last values."""
+    __tablename__ = 'equity_rollups'
+    tier = Column(String, primary_key=True)  # '1m', '1h' or '1d'
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Bucket start
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    balance = Column(Float)
+    total_pnl = Column(Float)
+
 
 class User(Base):
     __tablename__ = 'users'
@@ -48,48 +85,42 @@ class User(Base):
     password_hash = Column(String)
 
 
+def to_datetime(value):
+    """ISO string (naive means UTC) or datetime -> aware UTC datetime."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_iso(value):
+    """Stored timestamp -> the naive UTC ISO string callers have always received."""
+    if value is None:
+        return None
+    return to_datetime(value).replace(tzinfo=None).isoformat()
+
+
+def bucket_start(value, seconds):
+    """Start of the UTC-aligned bucket of `seconds` holding `value`."""
+    epoch = int(to_datetime(value).timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(epoch, timezone.utc)
+
+
+# Equity tiers, finest first: (name, seconds per row). Raw rows come about
+# once per trading loop; each rollup tier is built from the one before it.
+EQUITY_TIERS = [("raw", 10), ("1m", 60), ("1h", 3600), ("1d", 86400)]
+EQUITY_RETENTION_DAYS = {"raw": EQUITY_RAW_RETENTION_DAYS, **EQUITY_ROLLUP_RETENTION_DAYS}
+ROLLUP_WATERMARKS_KEY = "equity_rollup_watermarks"
+
+
 class PostgresRepository:
     def __init__(self):
-        self.engine = create_engine(
-            f'postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
-
-        # Schema Migration
-        try:
-            from sqlalchemy import text, inspect
-            with self.engine.connect() as conn:
-                # Check if 'id' column exists in trades
-                result = conn.execute(text(
-                    "SELECT column_name FROM information_schema.columns WHERE table_name='trades' AND column_name='id'"))
-                if not result.fetchone():
-                    print(
-                        "⚠️ Migrating 'trades' table: Adding 'id' column and updating Primary Key...")
-                    # 1. Drop existing primary key (symbol)
-                    # Note: Constraint name is usually trades_pkey but good to be sure.
-                    conn.execute(
-                        text("ALTER TABLE trades DROP CONSTRAINT IF EXISTS trades_pkey"))
-                    # 2. Add id column as SERIAL PRIMARY KEY
-                    conn.execute(
-                        text("ALTER TABLE trades ADD COLUMN id SERIAL PRIMARY KEY"))
-                    conn.commit()
-                    print("✅ Migration: 'trades' table updated.")
-
-                # Other column checks (idempotent)
-                conn.execute(
-                    text("ALTER TABLE trades ADD COLUMN IF NOT EXISTS dca_count INTEGER DEFAULT 0"))
-                conn.execute(
-                    text("ALTER TABLE trades ADD COLUMN IF NOT EXISTS created_at VARCHAR"))
-                conn.execute(
-                    text("ALTER TABLE trades ADD COLUMN IF NOT EXISTS closed_at VARCHAR"))
-                conn.execute(
-                    text("ALTER TABLE trades ADD COLUMN IF NOT EXISTS pnl FLOAT"))
-                conn.execute(
-                    text("ALTER TABLE trades ADD COLUMN IF NOT EXISTS exit_reason VARCHAR"))
-                conn.commit()
-        except Exception as e:
-            print(f"Migration Warning: {e}")
-
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        # Shared engine and pool; the schema is managed by migrations.py
+        self.engine = get_engine()
+        self.Session = get_session_factory()
 
     def create_user(self, username, password):
         import bcrypt
@@ -135,8 +166,7 @@ class PostgresRepository:
         session.close()
         return result
 
-    def save_trade(self, trade_data):
-        session = self.Session()
+    def _save_trade(self, session, trade_data):
         # Look for EXISTING OPEN trade for this symbol to update
         # If no OPEN trade exists, we create a new row (History preservation)
         trade = session.query(Trade).filter_by(
@@ -145,10 +175,8 @@ class PostgresRepository:
         if not trade:
             trade = Trade(symbol=trade_data['symbol'])
             # Only set created_at for new trades
-            if 'created_at' in trade_data:
-                trade.created_at = trade_data['created_at']
-            else:
-                trade.created_at = datetime.utcnow().isoformat()
+            trade.created_at = to_datetime(
+                trade_data.get('created_at') or clock.utcnow())
 
         trade.side = trade_data['side']
         trade.entry = float(trade_data['entry'])
@@ -163,44 +191,88 @@ class PostgresRepository:
         trade.status = 'OPEN'
 
         session.add(trade)
+        # Later operations in the same batch must see this row
+        session.flush()
+
+    def save_trade(self, trade_data):
+        session = self.Session()
+        self._save_trade(session, trade_data)
         session.commit()
         session.close()
 
-    def close_trade(self, symbol, pnl, exit_reason):
-        session = self.Session()
-        trade = session.query(Trade).filter_by(symbol=symbol).first()
+    def _close_trade(self, session, symbol, pnl, exit_reason, closed_at=None):
+        trade = session.query(Trade).filter_by(
+            symbol=symbol, status='OPEN').first()
         if trade:
             trade.status = 'CLOSED'
             trade.pnl = float(pnl)
             trade.exit_reason = str(exit_reason)
-            trade.closed_at = datetime.utcnow().isoformat()
-            session.commit()
+            trade.closed_at = to_datetime(closed_at or clock.utcnow())
+            session.flush()
+
+    def close_trade(self, symbol, pnl, exit_reason, closed_at=None):
+        session = self.Session()
+        self._close_trade(session, symbol, pnl, exit_reason, closed_at)
+        session.commit()
         session.close()
 
-    def load_closed_trades(self, start_date=None):
+    def _stream(self, build, limit=None):
+        """
+        Yields rows of `build(session)` through a server-side cursor,
+        STREAM_BATCH_SIZE at a time. The session is only opened once
+        iteration starts, and closed when it ends or is abandoned.
+        """
+        session = self.Session()
+        try:
+            query = build(session)
+            if limit is not None:
+                query = query.limit(limit)
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                yield row
+        finally:
+            session.close()
+
+    def _keyset(self, model, at, after_id):
+        """Filter for rows after `after_id` in (at, id) order, the keyset cursor."""
         session = self.Session()
-        query = session.query(Trade).filter_by(status='CLOSED')
+        last = session.query(at).filter(model.id == after_id).first()
+        session.close()
+        if last is None:
+            raise ValueError(f"Unknown cursor id {after_id}")
+        return tuple_(at, model.id) > tuple_(last[0], after_id)
+
+    def iter_closed_trades(self, start_date=None, after_id=None, limit=None):
+        """
+        Closed trades in closing order (CLOSED_ORDER) as a generator. Pass
+        the last row's `id` as `after_id` to continue after it. Bad cursors
+        raise here, before the first row.
+        """
+        filters = [Trade.status == 'CLOSED']
         if start_date:
-            from sqlalchemy import and_
-            # closed_at is ISO string, so lexicographical comparison works for standard ISO8601
-            query = query.filter(Trade.closed_at >= start_date)
+            filters.append(CLOSED_ORDER >= to_datetime(start_date))
+        if after_id is not None:
+            filters.append(self._keyset(Trade, CLOSED_ORDER, after_id))
+
+        def build(session):
+            return session.query(
+                Trade.id, Trade.symbol, Trade.side, Trade.entry, Trade.amount, Trade.margin,
+                Trade.pnl, Trade.exit_reason, Trade.created_at, Trade.closed_at
+            ).filter(*filters).order_by(CLOSED_ORDER, Trade.id)
+        return ({
+            "id": t.id,
+            "symbol": t.symbol,
+            "side": t.side,
+            "entry": t.entry,
+            "amount": t.amount,
+            "margin": t.margin,
+            "pnl": t.pnl,
+            "exit_reason": t.exit_reason,
+            "created_at": to_iso(t.created_at),
+            "closed_at": to_iso(t.closed_at)
+        } for t in self._stream(build, limit))
 
-        trades = query.all()
-        result = []
-        for t in trades:
-            result.append({
-                "symbol": t.symbol,
-                "side": t.side,
-                "entry": t.entry,
-                "amount": t.amount,
-                "margin": t.margin,
-                "pnl": t.pnl,
-                "exit_reason": t.exit_reason,
-                "created_at": t.created_at,
-                "closed_at": t.closed_at
-            })
-        session.close()
-        return result
+    def load_closed_trades(self, start_date=None):
+        return list(self.iter_closed_trades(start_date))
 
     def load_state_value(self, key, default=None):
         session = self.Session()
@@ -208,42 +280,254 @@ class PostgresRepository:
         session.close()
         return item.value if item else default
 
-    def save_state_value(self, key, value):
-        session = self.Session()
+    def _save_state_value(self, session, key, value):
         item = session.query(BotState).filter_by(key=key).first()
         if not item:
             item = BotState(key=key)
         item.value = value
         session.add(item)
+        session.flush()
+
+    def save_state_value(self, key, value):
+        session = self.Session()
+        self._save_state_value(session, key, value)
         session.commit()
         session.close()
 
-    def log_equity(self, balance, equity, total_pnl):
-        session = self.Session()
+    def _log_equity(self, session, balance, equity, total_pnl, timestamp=None):
         entry = EquityHistory(
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=to_datetime(timestamp or clock.utcnow()),
             balance=balance,
             equity=equity,
             total_pnl=total_pnl
         )
         session.add(entry)
+
+    def log_equity(self, balance, equity, total_pnl, timestamp=None):
+        session = self.Session()
+        self._log_equity(session, balance, equity, total_pnl, timestamp)
         session.commit()
         session.close()
 
-    def load_equity_history(self, start_date=None):
+    def apply_batch(self, ops):
+        """
+        Applies queued writes in order, in one transaction. Each op is
+        (method name, args) for save_trade, close_trade, save_state_value
+        or log_equity.
+        """
         session = self.Session()
-        query = session.query(EquityHistory)
+        try:
+            for name, args in ops:
+                getattr(self, f"_{name}")(session, *args)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def iter_equity_history(self, start_date=None, after_id=None, limit=None):
+        """Raw equity rows in time order as a generator; keyset cursor as in iter_closed_trades."""
+        filters = []
         if start_date:
-            query = query.filter(EquityHistory.timestamp >= start_date)
-
-        history = query.all()
-        result = []
-        for h in history:
-            result.append({
-                "timestamp": h.timestamp,
-                "balance": h.balance,
-                "equity": h.equity,
-                "total_pnl": h.total_pnl
-            })
+            filters.append(EquityHistory.timestamp >= to_datetime(start_date))
+        if after_id is not None:
+            filters.append(self._keyset(
+                EquityHistory, EquityHistory.timestamp, after_id))
+
+        def build(session):
+            return session.query(
+                EquityHistory.id, EquityHistory.timestamp, EquityHistory.balance,
+                EquityHistory.equity, EquityHistory.total_pnl
+            ).filter(*filters).order_by(EquityHistory.timestamp, EquityHistory.id)
+        return ({
+            "id": h.id,
+            "timestamp": to_iso(h.timestamp),
+            "balance": h.balance,
+            "equity": h.equity,
+            "total_pnl": h.total_pnl
+        } for h in self._stream(build, limit))
+
+    def load_equity_history(self, start_date=None):
+        """
+        Raw rows only. The compactor prunes them after
+        EQUITY_RAW_RETENTION_DAYS, so longer ranges read load_equity_series.
+        """
+        return list(self.iter_equity_history(start_date))
+
+    # --- Equity rollups ---
+
+    def _equity_query(self, session, tier, start=None, end=None, after=None):
+        """(timestamp, open, high, low, close, balance, total_pnl) rows of one tier, oldest first."""
+        if tier == "raw":
+            at = EquityHistory.timestamp
+            equity = EquityHistory.equity
+            query = session.query(at, equity, equity, equity, equity,
+                                  EquityHistory.balance, EquityHistory.total_pnl)
+        else:
+            at = EquityRollup.bucket
+            query = session.query(at, EquityRollup.open, EquityRollup.high, EquityRollup.low,
+                                  EquityRollup.close, EquityRollup.balance, EquityRollup.total_pnl
+                                  ).filter(EquityRollup.tier == tier)
+        if start is not None:
+            query = query.filter(at >= start)
+        if end is not None:
+            query = query.filter(at < end)
+        if after is not None:
+            query = query.filter(at > after)
+        return query.order_by(at)
+
+    def oldest_equity(self, tier):
+        session = self.Session()
+        if tier == "raw":
+            oldest = session.query(func.min(EquityHistory.timestamp)).scalar()
+        else:
+            oldest = session.query(func.min(EquityRollup.bucket)).filter(
+                EquityRollup.tier == tier).scalar()
         session.close()
-        return result
+        return to_datetime(oldest)
+
+    def equity_watermarks(self):
+        """tier -> datetime before which that tier is complete."""
+        marks = self.load_state_value(ROLLUP_WATERMARKS_KEY, {}) or {}
+        return {tier: to_datetime(at) for tier, at in marks.items()}
+
+    def compact_equity(self, tier, source, start, end):
+        """
+        Rebuilds `tier` buckets in [start, end) from `source` rows and moves
+        the tier's watermark to `end`, in one transaction, so a crash never
+        leaves a range half rolled up. Returns the number of buckets written.
+        """
+        seconds = dict(EQUITY_TIERS)[tier]
+        session = self.Session()
+        try:
+            buckets = {}
+            for at, open_, high, low, close, balance, total_pnl in self._equity_query(session, source, start, end).all():
+                key = bucket_start(at, seconds)
+                rollup = buckets.get(key)
+                if rollup is None:
+                    rollup = buckets[key] = EquityRollup(
+                        tier=tier, bucket=key, open=open_, high=high, low=low)
+                rollup.high = max(rollup.high, high)
+                rollup.low = min(rollup.low, low)
+                rollup.close = close
+                rollup.balance = balance
+                rollup.total_pnl = total_pnl
+            session.query(EquityRollup).filter(
+                EquityRollup.tier == tier, EquityRollup.bucket >= start, EquityRollup.bucket < end
+            ).delete(synchronize_session=False)
+            session.add_all(buckets.values())
+
+            item = session.query(BotState).filter_by(key=ROLLUP_WATERMARKS_KEY).first()
+            marks = dict(item.value) if item and item.value else {}
+            marks[tier] = to_iso(end)
+            self._save_state_value(session, ROLLUP_WATERMARKS_KEY, marks)
+            session.commit()
+            return len(buckets)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def prune_equity(self, tier, start, end):
+        """Deletes `tier` rows in [start, end). Returns the number of rows removed."""
+        session = self.Session()
+        if tier == "raw":
+            query = session.query(EquityHistory).filter(
+                EquityHistory.timestamp >= start, EquityHistory.timestamp < end)
+        else:
+            query = session.query(EquityRollup).filter(
+                EquityRollup.tier == tier, EquityRollup.bucket >= start, EquityRollup.bucket < end)
+        removed = query.delete(synchronize_session=False)
+        session.commit()
+        session.close()
+        return removed
+
+    def oldest_equity_point(self):
+        """
+        Time of the oldest equity data in any tier. A rollup bucket starts
+        before the data it holds, so a coarser tier only counts when its
+        oldest bucket ends before the finer tiers' data begins (the finer
+        rows were pruned).
+        """
+        begin = None
+        for tier, seconds in EQUITY_TIERS:
+            oldest = self.oldest_equity(tier)
+            if oldest is not None and (begin is None or oldest + timedelta(seconds=seconds) <= begin):
+                begin = oldest
+        return begin
+
+    def equity_series_tier(self, start_date=None, max_points=EQUITY_SERIES_MAX_POINTS):
+        """Index into EQUITY_TIERS of the tier iter_equity_series reads for `start_date`."""
+        now = to_datetime(clock.utcnow())
+        begin = to_datetime(start_date) or self.oldest_equity_point() or now
+        span = (now - begin).total_seconds()
+        for i, (tier, seconds) in enumerate(EQUITY_TIERS):
+            days = EQUITY_RETENTION_DAYS[tier]
+            kept = days is None or begin >= now - timedelta(days=days)
+            if kept and span / seconds <= max_points:
+                return i
+        return len(EQUITY_TIERS) - 1
+
+    def iter_equity_series(self, start_date=None, after=None, limit=None, max_points=EQUITY_SERIES_MAX_POINTS):
+        """
+        Equity curve since `start_date` (default: everything) for charts and
+        stats, as a generator. Uses the finest tier that still holds the
+        whole range and yields at most about `max_points` rows, e.g. 1m for
+        a day, 1h for a week or month, 1d beyond that. Rows past that tier's
+        watermark (the current, not yet rolled up buckets) come from the
+        finer tiers, down to raw rows for the last minute. Timestamps are
+        unique (one rollup per bucket, one microsecond-stamped raw row per
+        loop), so the last one is the cursor for `after`.
+        """
+        start = to_datetime(start_date)
+        after = to_datetime(after)
+        chosen = self.equity_series_tier(start, max_points)
+
+        marks = self.equity_watermarks()
+        pieces = []  # (tier, start, end), coarsest first
+        cursor = start
+        for tier, _ in reversed(EQUITY_TIERS[:chosen + 1]):
+            end = marks.get(tier) if tier != "raw" else None
+            if tier != "raw" and (end is None or (cursor is not None and end <= cursor)):
+                continue
+            pieces.append((tier, cursor, end))
+            cursor = end
+        return self._stream_equity(pieces, after, limit)
+
+    def _stream_equity(self, pieces, after, limit):
+        for tier, start, end in pieces:
+            if limit is not None and limit <= 0:
+                return
+            def build(session, tier=tier, start=start, end=end):
+                return self._equity_query(session, tier, start, end, after)
+            for at, open_, high, low, close, balance, total_pnl in self._stream(build, limit):
+                if limit is not None:
+                    limit -= 1
+                yield {
+                    "timestamp": to_iso(at),
+                    "balance": balance,
+                    "equity": close,
+                    "total_pnl": total_pnl,
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                }
+
+    def load_equity_series(self, start_date=None, max_points=EQUITY_SERIES_MAX_POINTS):
+        return list(self.iter_equity_series(start_date, max_points=max_points))
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_repository():
+    """The process-wide repository shared by the bot, the API and the dashboard."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = PostgresRepository()
+    return _repository
@@ -1,13 +1,26 @@
-from datetime import datetime
-from src.config.settings import TRAILING_STOP_PCT, TAKE_PROFIT_PCT, ATR_MULTIPLIER, INITIAL_PAPER_BALANCE, REAL_TRADING, BREAKEVEN_TRIGGER_PCT, MAX_DAILY_LOSS_PCT, LEVERAGE, TRAILING_ROI_ACTIVATION
+from src.config.settings import INITIAL_PAPER_BALANCE, REAL_TRADING, MAX_DAILY_LOSS_PCT, LEVERAGE, USE_WRITE_BEHIND
 from src.infrastructure.exchange.client import exchange_client
-from src.infrastructure.persistence.postgres_repo import PostgresRepository
+from src.infrastructure.persistence.postgres_repo import get_repository
+from src.infrastructure.persistence.write_behind import WriteBehindQueue
+from src.infrastructure.clock import clock
+from src.domain.trading.exit_rules import (
+    resolve_params, position_pnl, position_roi, trail_best_price,
+    breakeven_trigger, stop_price, take_profit_price, exit_hits,
+)
 
 
 class TradeManager:
-    def __init__(self, exchange_client=None):
-        self.repo = PostgresRepository()
+    def __init__(self, exchange_client=None, tickers=None):
+        self.repo = get_repository()
+        if USE_WRITE_BEHIND:
+            # Writes are queued and flushed by a background thread
+            self.repo = WriteBehindQueue(self.repo)
         self.exchange_client = exchange_client
+        # Price source for equity, defaults to hitting the exchange directly
+        self.tickers = tickers or exchange_client
+        self.params = resolve_params()
+        # Called with (symbol, trade) when a trade's stop, target or size moves
+        self.on_trade_update = None
         self.state = self.load_state()
 
     def load_state(self):
@@ -18,7 +31,7 @@ class TradeManager:
         daily_start = self.repo.load_state_value(
             "daily_start_balance", paper_bal)
         last_reset = self.repo.load_state_value(
-            "last_reset_date", str(datetime.utcnow().date()))
+            "last_reset_date", str(clock.utcnow().date()))
 
         return {
             "trades": trades,
@@ -39,11 +52,23 @@ class TradeManager:
             "last_reset_date", self.state["last_reset_date"])
         # Trades are saved individually on add/update
 
+    def flush(self):
+        """Writes queued persistence now (shutdown, or before reading the DB back)."""
+        if isinstance(self.repo, WriteBehindQueue):
+            self.repo.flush()
+
     def add_trade(self, symbol, data):
         self.state["trades"][symbol] = data
         self.repo.save_trade(data)
         self.save_state()
 
+    def _trade_updated(self, symbol, trade):
+        if self.on_trade_update:
+            try:
+                self.on_trade_update(symbol, trade)
+            except Exception as e:
+                print(f"⚠️ Trade update hook failed for {symbol}: {e}")
+
     def update_trade_entry(self, symbol, new_entry, new_amount, new_margin):
         if symbol not in self.state["trades"]:
             return
@@ -57,6 +82,7 @@ class TradeManager:
         self.state["trades"][symbol] = trade
         self.repo.save_trade(trade)
         self.save_state()
+        self._trade_updated(symbol, trade)
 
     def remove_trade(self, symbol, pnl, exit_reason="Unknown"):
         if symbol in self.state["trades"]:
@@ -78,36 +104,29 @@ class TradeManager:
         best = trade["best_price"]
         amount = trade["amount"]
         margin = trade.get("margin", (amount * entry) / LEVERAGE)
+        is_long = side == "LONG"
 
         # Calculate ROI to check activation
-        if side == "LONG":
-            pnl = (current_price - entry) * amount
-            roi_pct = (pnl / margin) if margin > 0 else 0
-        else:
-            pnl = (entry - current_price) * amount
-            roi_pct = (pnl / margin) if margin > 0 else 0
+        pnl = position_pnl(is_long, entry, amount, current_price)
+        roi_pct = float(position_roi(pnl, margin))
 
         # Only update "best_price" (Trailing High Water Mark) is ROI > Activation
         # This keeps the Stop Loss loose/breakeven until we hit big profit
+        _, updated = trail_best_price(
+            is_long, best, current_price, roi_pct, self.params)
 
-        updated = False
-
-        if roi_pct >= TRAILING_ROI_ACTIVATION:
-            if side == "LONG" and current_price > best:
-                trade["best_price"] = current_price
-                updated = True
+        if updated:
+            trade["best_price"] = current_price
+            if is_long:
                 print(
                     f"📈 Trailing Stop Updated (Long): New High ${current_price:.4f} (ROI: {roi_pct*100:.1f}%)")
-            elif side == "SHORT" and current_price < best:
-                trade["best_price"] = current_price
-                updated = True
+            else:
                 print(
                     f"📉 Trailing Stop Updated (Short): New Low ${current_price:.4f} (ROI: {roi_pct*100:.1f}%)")
-
-        if updated:
             self.state["trades"][symbol] = trade
             self.repo.save_trade(trade)  # Update DB
             self.save_state()
+            self._trade_updated(symbol, trade)
 
     def check_exit_conditions(self, symbol, current_price):
         if symbol not in self.state["trades"]:
@@ -118,61 +137,43 @@ class TradeManager:
         best = trade.get("best_price", entry)
         atr = trade.get("atr", 0.0)
         breakeven = trade.get("breakeven_active", False)
+        if side not in ("LONG", "SHORT"):
+            return None, 0.0
+        is_long = side == "LONG"
 
         # Calculate PnL / ROI for Breakeven Check
-        if side == "LONG":
-            pnl = (current_price - entry) * trade["amount"]
-        else:
-            pnl = (entry - current_price) * trade["amount"]
+        pnl = position_pnl(is_long, entry, trade["amount"], current_price)
 
         margin = trade.get("margin", 0)
         if margin == 0:
             margin = (trade["amount"] * entry) / LEVERAGE
-        roi_pct = (pnl / margin) if margin > 0 else 0
+        roi_pct = float(position_roi(pnl, margin))
 
         # Trigger Breakeven
-        if not breakeven and roi_pct >= BREAKEVEN_TRIGGER_PCT:
+        if breakeven_trigger(breakeven, roi_pct, self.params):
             trade["breakeven_active"] = True
             breakeven = True
             self.state["trades"][symbol] = trade
             self.repo.save_trade(trade)  # Persist flag
             self.save_state()
+            self._trade_updated(symbol, trade)
             print(
                 f"🛡️ Breakeven Triggered for {symbol} (ROI: {roi_pct*100:.2f}%)")
 
-        if side == "LONG":
-            stop_price = best * (1 - TRAILING_STOP_PCT)
-            if atr > 0:
-                stop_price = best - (atr * ATR_MULTIPLIER)
-
-            # If Breakeven is active, Stop must be at least Entry
-            if breakeven:
-                stop_price = max(stop_price, entry)
-
-            if current_price < stop_price:
-                return "STOP_LOSS", stop_price
-            tp_price = entry * (1 + TAKE_PROFIT_PCT)
-            if current_price >= tp_price:
-                return "TAKE_PROFIT", tp_price
-        elif side == "SHORT":
-            stop_price = best * (1 + TRAILING_STOP_PCT)
-            if atr > 0:
-                stop_price = best + (atr * ATR_MULTIPLIER)
-
-            # If Breakeven is active, Stop must be at most Entry
-            if breakeven:
-                stop_price = min(stop_price, entry)
-
-            if current_price > stop_price:
-                return "STOP_LOSS", stop_price
-            tp_price = entry * (1 - TAKE_PROFIT_PCT)
-            if current_price <= tp_price:
-                return "TAKE_PROFIT", tp_price
+        # Stop: ATR-based when known, else trailing %; never past entry once breakeven
+        stop = float(stop_price(is_long, entry, best,
+                     atr, breakeven, self.params))
+        tp_price = float(take_profit_price(is_long, entry, self.params))
+        stop_hit, tp_hit = exit_hits(is_long, current_price, stop, tp_price)
 
+        if stop_hit:
+            return "STOP_LOSS", stop
+        if tp_hit:
+            return "TAKE_PROFIT", tp_price
         return None, 0.0
 
     def reset_daily_stats_if_needed(self):
-        current_date = str(datetime.utcnow().date())
+        current_date = str(clock.utcnow().date())
         if self.state.get("last_reset_date") != current_date:
             print(
                 f"🔄 New Day Detected: Resetting Daily Stats ({current_date})")
@@ -203,9 +204,10 @@ class TradeManager:
         # Calculate Equity
         unrealized_pnl = 0.0
         if self.exchange_client:
-            for symbol, trade in self.state["trades"].items():
+            # Snapshot: the exit engine may close trades while tickers are fetched
+            for symbol, trade in list(self.state["trades"].items()):
                 try:
-                    ticker = self.exchange_client.fetch_ticker(symbol)
+                    ticker = self.tickers.fetch_ticker(symbol)
                     current_price = ticker["last"]
                     if trade["side"] == "LONG":
                         pnl = (current_price -
@@ -243,7 +245,7 @@ class TradeManager:
         # For safety/speed let's just use the PnL from the active trades we might have just updated in the bot loop?
         # The bot loop updates trade["unrealized_pnl"]!
 
-        for trade in self.state["trades"].values():
+        for trade in list(self.state["trades"].values()):
             unrealized_pnl += trade.get("unrealized_pnl", 0.0)
 
         current_equity = current_bal + unrealized_pnl
@@ -0,0 +1,144 @@
+import copy
+import atexit
+import threading
+from src.config.settings import PERSIST_FLUSH_SECONDS
+from src.infrastructure.clock import clock
+
+# Reads of rows the queue may still hold; they flush it first
+FLUSHED_READS = {
+    "load_trades", "load_closed_trades", "iter_closed_trades",
+    "load_equity_history", "iter_equity_history", "load_equity_series", "iter_equity_series",
+}
+
+
+class WriteBehindQueue:
+    """
+    Write-behind front for PostgresRepository. Writes only update an
+    in-memory pending map, keyed so that repeated updates replace each
+    other: one entry per state key and per trade, where a trade's key
+    carries a per-symbol generation bumped on close, so a reopened symbol
+    never merges into the row that was just closed. A worker thread writes
+    the pending map in one transaction at most every `flush_seconds`;
+    flush() does the same synchronously (shutdown). Trade and equity reads
+    flush first so they see every earlier write; state values that are
+    still pending are answered from the queue.
+    """
+
+    def __init__(self, repo, flush_seconds=PERSIST_FLUSH_SECONDS):
+        self.repo = repo
+        self.flush_seconds = flush_seconds
+        self.pending = {}  # key -> (method name, args), in first-write order
+        self.generations = {}  # symbol -> trade generation
+        self.sequence = 0  # Keys for writes that never merge (equity rows)
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # One batch in flight at a time
+        self.wake = threading.Event()
+        self.running = True
+        self.flushed = 0
+        self.failures = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        # load_* and anything else not queued
+        attr = getattr(self.repo, name)
+        if name not in FLUSHED_READS:
+            return attr
+
+        def flushed_read(*args, **kwargs):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Persistence flush before {name} failed, reading stored rows: {e}")
+            return attr(*args, **kwargs)
+        return flushed_read
+
+    def _put(self, key, op):
+        with self.lock:
+            self.pending[key] = op
+
+    # --- Queued writes ---
+
+    def save_trade(self, trade_data):
+        symbol = trade_data["symbol"]
+        data = dict(trade_data)
+        # Row creation time is when the trade happened, not when it is flushed
+        data.setdefault("created_at", clock.utcnow().isoformat())
+        with self.lock:
+            generation = self.generations.get(symbol, 0)
+            key = ("trade", symbol, generation)
+            if key in self.pending:
+                data["created_at"] = self.pending[key][1][0]["created_at"]
+            self.pending[key] = ("save_trade", (data,))
+
+    def close_trade(self, symbol, pnl, exit_reason):
+        with self.lock:
+            generation = self.generations.get(symbol, 0)
+            self.pending[("close", symbol, generation)] = (
+                "close_trade", (symbol, pnl, exit_reason, clock.utcnow().isoformat()))
+            self.generations[symbol] = generation + 1
+
+    def save_state_value(self, key, value):
+        self._put(("state", key), ("save_state_value",
+                  (key, copy.deepcopy(value))))
+
+    def log_equity(self, balance, equity, total_pnl):
+        with self.lock:
+            self.sequence += 1
+            self.pending[("equity", self.sequence)] = (
+                "log_equity", (balance, equity, total_pnl, clock.utcnow().isoformat()))
+
+    def load_state_value(self, key, default=None):
+        with self.lock:
+            op = self.pending.get(("state", key))
+        if op is not None:
+            return copy.deepcopy(op[1][1])
+        return self.repo.load_state_value(key, default)
+
+    # --- Flushing ---
+
+    def flush(self):
+        """Writes everything pending in one transaction. Returns the number of writes."""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return 0
+            try:
+                self.repo.apply_batch(list(batch.values()))
+            except Exception:
+                self.failures += 1
+                with self.lock:
+                    # Put the batch back ahead of newer writes; newer values win
+                    merged = dict(batch)
+                    merged.update(self.pending)
+                    self.pending = merged
+                raise
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _run(self):
+        while self.running:
+            self.wake.wait(self.flush_seconds)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Persistence flush failed, retrying: {e}")
+
+    def close(self):
+        """Stops the worker and writes whatever is still pending."""
+        if not self.running:
+            return
+        self.running = False
+        self.wake.set()
+        self.thread.join(timeout=10)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ Final persistence flush failed: {e}")
+
+    def backlog(self):
+        with self.lock:
+            return len(self.pending)
@@ -5,7 +5,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import BaseModel
 from src.config.settings import JWT_SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
-from src.infrastructure.persistence.postgres_repo import PostgresRepository
+from src.infrastructure.persistence.postgres_repo import get_repository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -46,7 +46,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
 
     # Verify user exists in DB
-    repo = PostgresRepository()
+    repo = get_repository()
     session = repo.Session()
     from src.infrastructure.persistence.postgres_repo import User
     user = session.query(User).filter_by(username=token_data.username).first()
@@ -1,10 +1,17 @@
+import io
+import csv
+import json
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta, datetime
 from typing import Optional
 from src.interfaces.api.auth import Token, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
-from src.infrastructure.persistence.postgres_repo import PostgresRepository, User
+from src.infrastructure.persistence.postgres_repo import PostgresRepository, User, get_repository
+from src.infrastructure.persistence.database import pool_stats
 from src.application.bot import TradingBot
+from src.domain.analysis.performance import compute_performance
+from src.config.settings import STREAM_BATCH_SIZE
 
 router = APIRouter()
 
@@ -12,7 +19,7 @@ router = APIRouter()
 
 
 def get_repo():
-    return PostgresRepository()
+    return get_repository()
 
 # Global Bot Instance (injected strictly speaking, but simpler here)
 # We will rely on app.state or a global variable set in api.py
@@ -40,6 +47,52 @@ def get_cutoff_date(timeframe: str) -> Optional[str]:
     return None
 
 
+STREAM_MEDIA_TYPES = {"json": "application/json",
+                      "ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _encode(rows, fmt):
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    elif fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row) + "\n"
+    else:
+        yield "["
+        for i, row in enumerate(rows):
+            yield ("," if i else "") + json.dumps(row)
+        yield "]"
+
+
+def _chunks(parts):
+    # One write per STREAM_BATCH_SIZE rows instead of one per row
+    batch = []
+    for part in parts:
+        batch.append(part)
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_rows(rows, fmt, name):
+    """Streams a row generator as a JSON array, NDJSON or CSV; memory stays flat whatever its length."""
+    headers = {}
+    if fmt == "csv":
+        headers["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return StreamingResponse(_chunks(_encode(rows, fmt)), media_type=STREAM_MEDIA_TYPES[fmt], headers=headers)
+
+
 @router.post("/auth/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     repo = get_repo()
@@ -73,6 +126,17 @@ async def stop_bot(current_user: User = Depends(get_current_user), bot: TradingB
     return {"status": "stopped", "message": "Bot stopping..."}
 
 
+@router.post("/bot/flatten")
+async def flatten_positions(current_user: User = Depends(get_current_user), bot: TradingBot = Depends(get_bot)):
+    closed, failed = bot.flatten_all("MANUAL_FLATTEN")
+    return {"status": "flattened" if not failed else "partial", "closed": closed, "failed": failed}
+
+
+@router.get("/system/db-pool")
+async def get_db_pool(current_user: User = Depends(get_current_user)):
+    return pool_stats()
+
+
 @router.get("/trades/active")
 async def get_active_trades(current_user: User = Depends(get_current_user), repo: PostgresRepository = Depends(get_repo), bot: TradingBot = Depends(get_bot)):
     # Try to get real-time state from Bot memory if running
@@ -86,21 +150,36 @@ async def get_active_trades(current_user: User = Depends(get_current_user), repo
 @router.get("/trades/history")
 async def get_trade_history(
     timeframe: str = Query("all", regex="^(daily|weekly|monthly|all)$"),
+    format: str = Query("json", regex="^(json|ndjson|csv)$"),
+    after: Optional[str] = Query(None, description="Last timestamp of the previous page"),
+    limit: Optional[int] = Query(None, ge=1),
     current_user: User = Depends(get_current_user),
     repo: PostgresRepository = Depends(get_repo)
 ):
     start_date = get_cutoff_date(timeframe)
-    return repo.load_equity_history(start_date)
+    try:
+        # Downsampled to the tier that fits the range (see iter_equity_series)
+        rows = repo.iter_equity_series(start_date, after=after, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_rows(rows, format, f"equity_{timeframe}")
 
 
 @router.get("/trades/closed")
 async def get_closed_trades(
     timeframe: str = Query("all", regex="^(daily|weekly|monthly|all)$"),
+    format: str = Query("json", regex="^(json|ndjson|csv)$"),
+    after_id: Optional[int] = Query(None, description="Last id of the previous page"),
+    limit: Optional[int] = Query(None, ge=1),
     current_user: User = Depends(get_current_user),
     repo: PostgresRepository = Depends(get_repo)
 ):
     start_date = get_cutoff_date(timeframe)
-    return repo.load_closed_trades(start_date)
+    try:
+        rows = repo.iter_closed_trades(start_date, after_id=after_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return stream_rows(rows, format, f"closed_trades_{timeframe}")
 
 
 @router.get("/stats/performance")
@@ -113,68 +192,7 @@ async def get_performance_stats(
     start_date = get_cutoff_date(timeframe)
 
     closed_trades = repo.load_closed_trades(start_date)
-    equity_history = repo.load_equity_history(start_date)
-
-    # 2. Basic Metrics Calculation
-    total_closed = len(closed_trades)
-    wins = [t for t in closed_trades if t['pnl'] is not None and t['pnl'] > 0]
-    losses = [t for t in closed_trades if t['pnl']
-              is not None and t['pnl'] <= 0]
-
-    # Recalculate metrics based on filtered data
-    total_pnl = sum(t['pnl'] for t in closed_trades if t['pnl'] is not None)
-
-    win_rate = (len(wins) / total_closed * 100) if total_closed > 0 else 0.0
-
-    gross_profit = sum(t['pnl'] for t in wins if t['pnl'] is not None)
-    gross_loss = abs(sum(t['pnl'] for t in losses if t['pnl'] is not None))
-    profit_factor = (
-        gross_profit / gross_loss) if gross_loss > 0 else gross_profit
-
-    # 3. Max Drawdown Calculation
-    max_drawdown = 0.0
-    if equity_history:
-        peak = -float('inf')
-        drawdowns = []
-        for entry in equity_history:
-            equity = entry['equity']
-            if equity > peak:
-                peak = equity
-            drawdown = (peak - equity) / peak if peak > 0 else 0.0
-            drawdowns.append(drawdown)
-        max_drawdown = max(drawdowns) * 100 if drawdowns else 0.0
-
-    # Filter for Week/Month
-    now = datetime.utcnow()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-
-    weekly_pnl = sum(t['pnl'] for t in closed_trades
-                     if t['closed_at'] and datetime.fromisoformat(t['closed_at']) >= week_ago and t['pnl'])
-    monthly_pnl = sum(t['pnl'] for t in closed_trades
-                      if t['closed_at'] and datetime.fromisoformat(t['closed_at']) >= month_ago and t['pnl'])
-
-    # 4. Averages and Current State
-    avg_win = (sum(t['pnl'] for t in wins) / len(wins)) if wins else 0.0
-    avg_loss = (sum(t['pnl'] for t in losses) / len(losses)) if losses else 0.0
-
-    current_equity = 0.0
-    current_balance = 0.0
-    if equity_history:
-        last_entry = equity_history[-1]
-        current_equity = last_entry['equity']
-        current_balance = last_entry['balance']
-
-    return {
-        "total_pnl": total_pnl,
-        "win_rate": win_rate,
-        "profit_factor": profit_factor,
-        "max_drawdown": max_drawdown,
-        "total_trades": total_closed,
-        "wins": len(wins),
-        "losses": len(losses),
-        "avg_win": round(avg_win, 2),
-        "avg_loss": round(avg_loss, 2),
-        "current_equity": current_equity,
-        "current_balance": current_balance
-    }
+    equity_history = repo.load_equity_series(start_date)
+
+    # 2. Metrics (same computation the backtester reports)
+    return compute_performance(closed_trades, equity_history)
@@ -0,0 +1,17 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.infrastructure.persistence.migrations import run_migrations
+from src.infrastructure.persistence.postgres_repo import PostgresRepository
+
+
+@pytest.fixture
+def sqlite_repo(tmp_path):
+    """PostgresRepository over a migrated SQLite file instead of the shared pool."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'repo.db'}")
+    run_migrations(engine)
+    repo = PostgresRepository.__new__(PostgresRepository)
+    repo.engine = engine
+    repo.Session = sessionmaker(bind=engine)
+    yield repo
+    engine.dispose()
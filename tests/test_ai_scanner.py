@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.domain.analysis import ai_scanner
+from src.domain.analysis.ai_scanner import ModelCache, get_ai_signal
+from src.domain.analysis.indicators import IndicatorEngine
+
+SYMBOL = "BTC/USDT:USDT"
+
+
+class RecordingForest:
+    """Stands in for RandomForestClassifier and keeps what each fit saw."""
+
+    fits = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def fit(self, X, y):
+        RecordingForest.fits.append((np.array(X), np.array(y)))
+
+    def predict_proba(self, X):
+        return np.array([[0.5, 0.5]] * len(X))
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    RecordingForest.fits = []
+    monkeypatch.setattr(ai_scanner, "RandomForestClassifier", RecordingForest)
+    monkeypatch.setattr(ai_scanner, "model_cache", ModelCache(directory=None))
+    monkeypatch.setattr(ai_scanner, "indicator_engine", IndicatorEngine())
+
+
+def frame(funding=0.0001, n=120, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        "timestamp": np.arange(n, dtype=np.int64) * 900_000 + 1_700_000_100_000,
+        "open": close, "high": close * 1.004, "low": close * 0.996,
+        "close": close, "volume": rng.uniform(100, 200, n), "Funding": funding,
+    })
+
+
+def test_training_labels_only_use_closed_bars():
+    df = frame()
+    get_ai_signal(df)
+    # Forming bar ticks: the training set must not change
+    moved = df.copy()
+    moved.loc[len(df) - 1, "close"] *= 1.05
+    get_ai_signal(moved)
+
+    (X_a, y_a), (X_b, y_b) = RecordingForest.fits
+    np.testing.assert_array_equal(y_a, y_b)
+    np.testing.assert_array_equal(X_a, X_b)
+    # The newest training label compares the last two closed bars
+    close = df["close"].to_numpy()
+    assert y_a[-1] == int(close[-2] > close[-3])
+
+
+def test_cached_model_is_refit_when_funding_changes():
+    get_ai_signal(frame(0.0001), SYMBOL)
+    get_ai_signal(frame(0.0001), SYMBOL)
+    assert len(RecordingForest.fits) == 1
+
+    get_ai_signal(frame(-0.0003), SYMBOL)
+    assert len(RecordingForest.fits) == 2
+    assert (RecordingForest.fits[1][0][:, -1] == -0.0003).all()
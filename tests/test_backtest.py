@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from src.domain.backtest.engine import Backtester
+
+T0 = 1_700_006_400_000  # Midnight UTC
+BAR_MS = 900_000
+PARAMS = {
+    "leverage": 10,
+    "roe_target": 0.5,  # Take profit 5% from entry
+    "trailing_stop_pct": 0.02,
+    "trailing_roi_activation": 100.0,  # Keep the stop anchored at entry
+    "breakeven_trigger_pct": 0.1,  # 1% in favour at 10x
+    "atr_multiplier": 2.0,
+    "risk_per_trade_pct": 0.5,
+    "min_trade_size": 1.0,
+    "max_positions": 1,
+    "confidence_threshold": 0.6,
+    "max_daily_loss_pct": 1.0,
+    "dca_step_pct": 1.0,
+    "max_dca": 0,
+}
+# Signal bar: intrabar prices pass both 95.5 and 100.5 before closing at 100
+ENTRY_BAR = (96.0, 100.5, 95.5, 100.0)
+
+
+def run(bars, prob_up=None):
+    """One symbol, LONG signal on the first bar only, 100 balance -> 5 units at 100."""
+    open_, high, low, close = (np.array([[b[k] for b in bars]]) for k in range(4))
+    if prob_up is None:
+        prob_up = np.array([[0.9] + [0.5] * (len(bars) - 1)])
+    timestamps = T0 + np.arange(len(bars)) * BAR_MS
+    return Backtester(PARAMS, initial_balance=100.0).run(
+        ["BTC/USDT:USDT"], timestamps, open_, high, low, close, prob_up, None)
+
+
+def test_take_profit():
+    # Up bar: 100 -> 99.5 -> 106 -> 105
+    result = run([ENTRY_BAR, (100.0, 106.0, 99.5, 105.0)])
+    [trade] = result["trades"]
+    assert trade["side"] == "LONG"
+    assert (trade["entry"], trade["amount"], trade["margin"]) == (100.0, 5.0, 50.0)
+    assert trade["exit_reason"] == "TAKE_PROFIT ($105.0000)"
+    assert trade["exit_price"] == 106.0
+    assert trade["pnl"] == pytest.approx(30.0)
+    assert result["equity"][-1]["balance"] == pytest.approx(130.0)
+    assert result["open_trades"] == []
+
+
+def test_stop_loss():
+    # Down bar: 100 -> 100.5 -> 97 -> 97.5; the 2% stop sits at 98
+    result = run([ENTRY_BAR, (100.0, 100.5, 97.0, 97.5)])
+    [trade] = result["trades"]
+    assert trade["exit_reason"] == "STOP_LOSS ($98.0000)"
+    assert trade["exit_price"] == 97.0
+    assert trade["pnl"] == pytest.approx(-15.0)
+
+
+def test_breakeven_moves_the_stop_to_entry():
+    result = run([
+        ENTRY_BAR,
+        (100.0, 102.0, 99.9, 100.5),  # Reaches +2%: breakeven arms
+        (100.5, 100.6, 99.0, 99.5),  # Would not reach the 98 stop
+    ])
+    [trade] = result["trades"]
+    assert trade["exit_reason"] == "STOP_LOSS ($100.0000)"
+    assert trade["exit_price"] == 99.0
+    assert trade["pnl"] == pytest.approx(-5.0)
+    assert trade["closed_at"] == "2023-11-15T00:30:00"
+
+
+def test_entries_are_taken_once_per_bar_at_the_close():
+    # Signal on every bar but the position closes intrabar on bar 1:
+    # the re-entry waits for bar 1's close instead of its later path points
+    bars = [ENTRY_BAR, (100.0, 106.0, 99.5, 103.0), (103.0, 103.5, 102.5, 103.0)]
+    result = run(bars, prob_up=np.array([[0.9, 0.9, 0.5]]))
+    assert [t["entry"] for t in result["trades"]] == [100.0]
+    [reopened] = result["open_trades"]
+    assert reopened["entry"] == 103.0
+    assert reopened["created_at"] == "2023-11-15T00:15:00"
+    assert [e["timestamp"] for e in result["equity"]] == [
+        "2023-11-15T00:00:00", "2023-11-15T00:15:00", "2023-11-15T00:30:00"]
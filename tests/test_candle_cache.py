@@ -0,0 +1,26 @@
+import os
+from src.infrastructure.exchange.candle_cache import CandleCache
+from src.infrastructure.persistence.candle_store import CandleStore
+
+SYMBOL = "BTC/USDT:USDT"
+BARS = [[1_700_000_000_000 + i * 60_000, 1, 2, 0.5, 1.5, 10] for i in range(3)]
+
+
+def test_write_through_skips_empty_series_file(tmp_path):
+    store = CandleStore(str(tmp_path))
+    path = store.path(SYMBOL, "1m")
+    os.makedirs(os.path.dirname(path))
+    open(path, "wb").close()  # e.g. a download that died before its first write
+
+    CandleCache(store=store)._write_through(SYMBOL, "1m", BARS)
+
+    assert os.path.getsize(path) == 0
+
+
+def test_write_through_appends_contiguous_bars(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append(SYMBOL, "1m", BARS[:1])
+
+    CandleCache(store=store)._write_through(SYMBOL, "1m", BARS[1:])
+
+    assert store.last_ts(SYMBOL, "1m") == BARS[-1][0]
@@ -0,0 +1,38 @@
+import os
+import numpy as np
+from src.infrastructure.persistence.candle_store import CandleStore
+
+BARS = [[1_700_000_000_000 + i * 60_000, 1, 2, 0.5, 1.5, 10] for i in range(3)]
+NOW = 1_800_000_000_000
+
+
+def test_symbols_round_trip_names_with_underscores(tmp_path):
+    store = CandleStore(str(tmp_path))
+    symbols = ["BTC/USDT:USDT", "1000_PEPE/USDT:USDT", "ETH/USDT", "A%B/USDT:USDT"]
+    for symbol in symbols:
+        store.append(symbol, "1m", BARS, now_ms=NOW)
+    # Timeframe names are encoded the same way
+    path = store.path("BTC/USDT:USDT", "1m_utc")
+    os.makedirs(os.path.dirname(path))
+    np.asarray(BARS, dtype=np.float64).tofile(path)
+
+    assert sorted(store.symbols("1m")) == sorted(symbols)
+    assert store.symbols("1m_utc") == ["BTC/USDT:USDT"]
+    for symbol in symbols:
+        np.testing.assert_array_equal(store.read(symbol, "1m"), BARS)
+
+
+def test_legacy_file_is_moved_to_the_encoded_name(tmp_path):
+    legacy = tmp_path / "1m" / "BTC_USDT_USDT.f64"
+    os.makedirs(legacy.parent)
+    np.asarray(BARS[:2], dtype=np.float64).tofile(legacy)
+
+    store = CandleStore(str(tmp_path))
+    assert store.symbols("1m") == ["BTC/USDT:USDT"]
+    assert store.last_ts("BTC/USDT:USDT", "1m") == BARS[1][0]
+    assert not legacy.exists()
+
+    # History continues in the same file
+    assert store.append("BTC/USDT:USDT", "1m", BARS, now_ms=NOW) == 1
+    assert os.listdir(legacy.parent) == ["BTC%2FUSDT%3AUSDT.f64"]
+    np.testing.assert_array_equal(store.read("BTC/USDT:USDT", "1m"), BARS)
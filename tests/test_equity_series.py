@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import pytest
+import src.infrastructure.persistence.postgres_repo as postgres_repo
+from src.infrastructure.persistence.postgres_repo import (
+    EQUITY_TIERS, ROLLUP_WATERMARKS_KEY, EquityHistory, EquityRollup, bucket_start, to_datetime, to_iso,
+)
+
+TIERS = [tier for tier, _ in EQUITY_TIERS]
+# Late in the UTC day, so a day bucket starts well before the last hours' rows
+NOW = datetime(2026, 3, 10, 23, 30)
+
+
+class FixedClock:
+    def utcnow(self):
+        return NOW
+
+
+@pytest.fixture(autouse=True)
+def fixed_clock(monkeypatch):
+    monkeypatch.setattr(postgres_repo, "clock", FixedClock())
+
+
+def add_raw(repo, start, count, spacing=timedelta(seconds=10)):
+    session = repo.Session()
+    session.add_all(EquityHistory(timestamp=start + spacing * i, balance=100.0,
+                                  equity=100.0 + i, total_pnl=0.0) for i in range(count))
+    session.commit()
+    session.close()
+
+
+def add_rollups(repo, tier, start, count):
+    seconds = dict(EQUITY_TIERS)[tier]
+    first = bucket_start(start, seconds)
+    session = repo.Session()
+    session.add_all(EquityRollup(tier=tier, bucket=first + timedelta(seconds=seconds * i),
+                                 open=1.0, high=1.0, low=1.0, close=1.0, balance=1.0, total_pnl=0.0)
+                    for i in range(count))
+    session.commit()
+    session.close()
+
+
+def test_short_raw_history_reads_raw_rows(sqlite_repo):
+    now = to_datetime(NOW)
+    add_raw(sqlite_repo, now - timedelta(minutes=84), 500)
+    # Rolled-up buckets of the same rows start on the minute/hour/day boundary
+    for tier in ("1m", "1h", "1d"):
+        add_rollups(sqlite_repo, tier, now - timedelta(minutes=84), 1)
+    sqlite_repo.save_state_value(ROLLUP_WATERMARKS_KEY, {
+        tier: to_iso(bucket_start(now - timedelta(minutes=84), seconds) + timedelta(seconds=seconds))
+        for tier, seconds in EQUITY_TIERS[1:]})
+
+    assert TIERS[sqlite_repo.equity_series_tier()] == "raw"
+    assert len(sqlite_repo.load_equity_series()) == 500
+
+
+def test_pruned_raw_history_reads_the_tier_holding_it(sqlite_repo):
+    now = to_datetime(NOW)
+    add_raw(sqlite_repo, now - timedelta(days=6), 10)
+    # Raw rows before a week ago were pruned; the 1m tier still has 20 days
+    add_rollups(sqlite_repo, "1m", now - timedelta(days=20), 10)
+
+    assert sqlite_repo.oldest_equity_point() == bucket_start(now - timedelta(days=20), 60)
+    assert TIERS[sqlite_repo.equity_series_tier()] == "1h"
+
+
+def test_caller_start_overrides_stored_range(sqlite_repo):
+    now = to_datetime(NOW)
+    add_raw(sqlite_repo, now - timedelta(days=6), 10)
+    add_rollups(sqlite_repo, "1d", now - timedelta(days=400), 10)
+
+    assert TIERS[sqlite_repo.equity_series_tier()] == "1d"
+    assert TIERS[sqlite_repo.equity_series_tier(now - timedelta(hours=2))] == "raw"
+    assert TIERS[sqlite_repo.equity_series_tier(now - timedelta(days=1))] == "1m"
+    assert TIERS[sqlite_repo.equity_series_tier(now - timedelta(days=3))] == "1h"
+
+
+def test_empty_history_reads_raw(sqlite_repo):
+    assert TIERS[sqlite_repo.equity_series_tier()] == "raw"
+    assert sqlite_repo.load_equity_series() == []
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+import pytest
+from src.domain.analysis.indicators import (
+    rsi, sma, atr, ema, compute_features, EmaState, IndicatorState, IndicatorEngine,
+    FEATURE_NAMES,
+)
+
+RTOL = 1e-9
+ATOL = 1e-9
+BARS = 300
+EMA_LENGTHS = (9, 50)
+
+
+def make_ohlcv(seed, n=BARS):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.005, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.005, n))
+    volume = rng.uniform(1_000, 5_000, n)
+    timestamp = np.arange(n, dtype=np.int64) * 60_000 + 1_700_000_000_000
+    return pd.DataFrame({"timestamp": timestamp, "open": open_, "high": high,
+                         "low": low, "close": close, "volume": volume})
+
+
+def reference(df):
+    """The pandas_ta features the strategy was originally built on."""
+    out = {
+        "RSI": ta.rsi(df["close"], length=14),
+        "SMA": ta.sma(df["close"], length=20),
+        "ATR": ta.atr(df["high"], df["low"], df["close"], length=14),
+        "Returns": df["close"].pct_change(),
+        "Vol_Change": df["volume"].pct_change(),
+    }
+    for n in EMA_LENGTHS:
+        out[f"EMA_{n}"] = ta.ema(df["close"], length=n)
+    return {name: series.to_numpy(dtype=np.float64) for name, series in out.items()}
+
+
+def assert_matches(actual, expected):
+    actual = np.asarray(actual, dtype=np.float64)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=RTOL, atol=ATOL, equal_nan=True)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return [make_ohlcv(seed) for seed in range(3)]
+
+
+def test_single_indicators_match_pandas_ta(frames):
+    for df in frames:
+        expected = reference(df)
+        assert_matches(rsi(df["close"])[0], expected["RSI"])
+        assert_matches(sma(df["close"])[0], expected["SMA"])
+        assert_matches(atr(df["high"], df["low"], df["close"])[0], expected["ATR"])
+        for n in EMA_LENGTHS:
+            assert_matches(ema(df["close"], n)[0], expected[f"EMA_{n}"])
+
+
+def test_compute_features_batched_matches_pandas_ta(frames):
+    stack = {col: np.stack([df[col].to_numpy() for df in frames])
+             for col in ("high", "low", "close", "volume")}
+    feats = compute_features(stack["high"], stack["low"], stack["close"], stack["volume"])
+    assert set(feats) == set(FEATURE_NAMES)
+    for row, df in enumerate(frames):
+        expected = reference(df)
+        for name in FEATURE_NAMES:
+            assert_matches(feats[name][row], expected[name])
+
+
+def test_short_series_is_all_nan():
+    df = make_ohlcv(7, n=10)
+    assert np.isnan(sma(df["close"])).all()
+    assert np.isnan(atr(df["high"], df["low"], df["close"])).all()
+    assert np.isnan(ema(df["close"], 20)).all()
+
+
+def test_ema_state_matches_pandas_ta(frames):
+    for n in EMA_LENGTHS:
+        df = frames[0]
+        state = EmaState(n)
+        values = [state.update(x) for x in df["close"]]
+        values = [np.nan if v is None else v for v in values]
+        assert_matches(values, reference(df)[f"EMA_{n}"])
+
+
+def test_indicator_state_update_matches_pandas_ta(frames):
+    for df in frames:
+        expected = reference(df)
+        state = IndicatorState(ema_lengths=EMA_LENGTHS)
+        rows = [state.update(bar) for bar in df.itertuples(index=False, name=None)]
+        for name in expected:
+            assert_matches([row[name] for row in rows], expected[name])
+        assert state.n_bars == len(df)
+        assert state.last_ts == df["timestamp"].iloc[-1]
+
+
+def test_indicator_state_preview_does_not_commit(frames):
+    df = frames[1]
+    bars = list(df.itertuples(index=False, name=None))
+    state = IndicatorState(ema_lengths=EMA_LENGTHS)
+    for bar in bars[:-1]:
+        state.update(bar)
+    previewed = state.preview(bars[-1])
+    assert state.last_ts == bars[-2][0]
+    committed = state.update(bars[-1])
+    for name in committed:
+        assert previewed[name] == pytest.approx(committed[name], rel=RTOL, nan_ok=True)
+
+
+def window_args(df, lo, hi):
+    return tuple(df[col].to_numpy()[lo:hi]
+                 for col in ("timestamp", "high", "low", "close", "volume"))
+
+
+def test_engine_window_first_call_matches_compute_features(frames):
+    df = frames[0]
+    args = window_args(df, 0, 100)
+    feats = IndicatorEngine().window("BTC", *args)
+    expected = compute_features(*args[1:])
+    for name in FEATURE_NAMES:
+        assert_matches(feats[name], expected[name][0])
+
+
+def test_engine_window_slides_with_full_history(frames):
+    # Sliding windows keep the state, so every value equals the full-series
+    # pandas_ta one, not a restart at the window start
+    df = frames[2]
+    expected = reference(df)
+    engine = IndicatorEngine()
+    size = 100
+    engine.window("BTC", *window_args(df, 0, size))
+    for end in range(size + 1, BARS, 7):
+        feats = engine.window("BTC", *window_args(df, end - size, end))
+        for name in ("RSI", "ATR", "Returns", "Vol_Change", "SMA"):
+            assert_matches(feats[name], expected[name][end - size:end])
+
+
+def test_engine_window_reseeds_after_gap(frames):
+    df = frames[0]
+    engine = IndicatorEngine()
+    engine.window("BTC", *window_args(df, 0, 100))
+    # Jumps past the last seen bar: recomputed from the window alone
+    args = window_args(df, 150, 250)
+    feats = engine.window("BTC", *args)
+    expected = compute_features(*args[1:])
+    for name in FEATURE_NAMES:
+        assert_matches(feats[name], expected[name][0])
+
+
+def test_engine_evicts_least_recently_used(frames):
+    engine = IndicatorEngine(max_symbols=2)
+    for symbol in ("A", "B", "C"):
+        engine.window(symbol, *window_args(frames[0], 0, 50))
+    assert list(engine.states) == ["B", "C"]
+    assert set(engine.buffers) == {"B", "C"}
@@ -0,0 +1,76 @@
+from sqlalchemy import (
+    create_engine, inspect, text, MetaData, Table, Column, String, Float, Boolean, Integer, JSON,
+)
+from src.infrastructure.persistence.migrations import run_migrations, MIGRATIONS
+from src.infrastructure.persistence.postgres_repo import Base
+
+
+def baseline_metadata():
+    """The models as first shipped: ISO-string timestamps, no indexes."""
+    metadata = MetaData()
+    Table("trades", metadata,
+          Column("id", Integer, primary_key=True, autoincrement=True),
+          Column("symbol", String), Column("side", String), Column("entry", Float),
+          Column("amount", Float), Column("margin", Float), Column("best_price", Float),
+          Column("atr", Float), Column("breakeven_active", Boolean),
+          Column("dca_count", Integer, default=0), Column("status", String, default="OPEN"),
+          Column("created_at", String), Column("closed_at", String, nullable=True),
+          Column("pnl", Float, nullable=True), Column("exit_reason", String, nullable=True))
+    Table("bot_state", metadata,
+          Column("key", String, primary_key=True), Column("value", JSON))
+    Table("equity_history", metadata,
+          Column("id", Integer, primary_key=True, autoincrement=True),
+          Column("timestamp", String), Column("balance", Float),
+          Column("equity", Float), Column("total_pnl", Float))
+    Table("users", metadata,
+          Column("username", String, primary_key=True), Column("password_hash", String))
+    return metadata
+
+
+def schema(engine):
+    inspector = inspect(engine)
+    out = {}
+    for table in sorted(inspector.get_table_names()):
+        if table == "schema_version":
+            continue
+        out[table] = {
+            "columns": sorted((c["name"], str(c["type"]), c["nullable"])
+                              for c in inspector.get_columns(table)),
+            "pk": inspector.get_pk_constraint(table)["constrained_columns"],
+            "indexes": sorted((i["name"], tuple(i["column_names"]))
+                              for i in inspector.get_indexes(table)),
+        }
+    return out
+
+
+def test_empty_and_baseline_databases_end_at_the_same_schema(tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert run_migrations(fresh) == [m["version"] for m in MIGRATIONS]
+
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    baseline_metadata().create_all(old)
+    with old.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO trades (symbol, side, entry, amount, status, created_at, closed_at, pnl) "
+            "VALUES ('BTC/USDT:USDT', 'LONG', 100, 1, 'CLOSED', "
+            "'2026-01-01T10:00:00', '2026-01-01T11:30:00.250000', 1.5)"))
+        conn.execute(text(
+            "INSERT INTO equity_history (\"timestamp\", balance, equity, total_pnl) "
+            "VALUES ('2026-01-01T11:30:00', 100, 101, 1.5)"))
+    run_migrations(old)
+
+    assert schema(old) == schema(fresh)
+    # Every model column exists, whichever path the database took
+    for table in Base.metadata.sorted_tables:
+        assert {c.name for c in table.columns} == {c[0] for c in schema(fresh)[table.name]["columns"]}
+    with old.connect() as conn:
+        closed_at = conn.execute(text("SELECT closed_at FROM trades")).scalar()
+    assert str(closed_at).startswith("2026-01-01 11:30:00")
+
+
+def test_rerun_applies_nothing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.db'}")
+    run_migrations(engine)
+    before = schema(engine)
+    assert run_migrations(engine) == []
+    assert schema(engine) == before
@@ -0,0 +1,118 @@
+import ccxt
+import pytest
+from src.application import order_manager as order_module
+from src.application.order_manager import (
+    OrderManager, PARTIAL, MARKET, FILLED, FAILED,
+)
+from src.infrastructure.clock import VirtualClock
+from src.infrastructure.exchange.replay_client import ReplayExchangeClient
+
+SYMBOL = "BTC/USDT:USDT"
+T0 = 1_700_000_040_000  # A 1m bar open
+# Up bar: the replay path walks open 100 -> low 99 -> high 101 -> close 100.5
+BAR = [100.0, 101.0, 99.0, 100.5, 10.0]
+
+
+class FlakyClient:
+    """Replay client whose order polls fail while `failing` is set."""
+
+    def __init__(self, client):
+        self.client = client
+        self.failing = False
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def fetch_order(self, order_id, symbol):
+        if self.failing:
+            raise ccxt.NetworkError("timed out")
+        return self.client.fetch_order(order_id, symbol)
+
+
+@pytest.fixture
+def exchange(monkeypatch):
+    clock = VirtualClock(speed=0, start_ms=T0)
+    monkeypatch.setattr(order_module, "clock", clock)
+    series = {SYMBOL: [[T0 + i * 60_000, *BAR] for i in range(5)]}
+
+    def make(limit_fill_ratio=1.0):
+        return ReplayExchangeClient(series, "1m", clock=clock, limit_fill_ratio=limit_fill_ratio)
+    return clock, make
+
+
+def manager(client, done, **kwargs):
+    return OrderManager(client, done.append, poll_seconds=0, **kwargs)
+
+
+def test_limit_fills_without_market_fallback(exchange):
+    clock, make = exchange
+    done = []
+    orders = manager(make(), done, timeout=45)
+    orders.submit(SYMBOL, "LONG", 2.0, 99.5)
+    orders.step()
+    assert orders.pending(SYMBOL)  # Price is still 100
+
+    clock.advance(20)  # Path reaches the 99 low
+    orders.step()
+    [task] = done
+    assert task["state"] == FILLED
+    assert task["market_order_id"] is None
+    assert (task["filled"], task["average"]) == (2.0, 99.0)
+    assert not orders.pending(SYMBOL)
+
+
+def test_partial_fill_then_cancel_and_market_remainder(exchange):
+    clock, make = exchange
+    client = make(limit_fill_ratio=0.25)
+    done = []
+    orders = manager(client, done, timeout=45)
+    task = orders.submit(SYMBOL, "LONG", 4.0, 99.5)
+
+    clock.advance(20)
+    orders.step()
+    assert task["state"] == PARTIAL
+    assert (task["limit_filled"], task["average"]) == (1.0, 99.0)
+
+    # Past the timeout with the price back above the limit
+    clock.advance(25)
+    orders.step()
+    assert task["state"] == MARKET
+    assert client.orders[task["order_id"]]["status"] == "canceled"
+    market = client.orders[task["market_order_id"]]
+    assert market["amount"] == 3.0  # Only the unfilled remainder
+
+    orders.step()
+    assert done == [task]
+    assert task["state"] == FILLED
+    assert task["filled"] == 4.0
+    # 1 @ 99 on the limit, 3 @ 100.875 (3/4 of the way from 101 to 100.5)
+    assert task["average"] == pytest.approx((99.0 + 3 * 100.875) / 4)
+    assert orders.active_count() == 0
+
+
+def test_failing_polls_give_up_and_report_fills(exchange):
+    clock, make = exchange
+    client = FlakyClient(make(limit_fill_ratio=0.25))
+    done = []
+    orders = manager(client, done, timeout=45, max_errors=3)
+    task = orders.submit(SYMBOL, "LONG", 4.0, 99.5)
+    clock.advance(20)
+    orders.step()
+    assert task["filled"] == 1.0
+
+    client.failing = True
+    orders.step()
+    orders.step()
+    assert task["errors"] == 2 and orders.pending(SYMBOL)
+    # A good poll resets the count
+    client.failing = False
+    orders.step()
+    assert task["errors"] == 0
+
+    client.failing = True
+    for _ in range(3):
+        orders.step()
+    assert done == [task]
+    assert task["state"] == FAILED
+    assert task["filled"] == 2.0  # What was filled before the polls failed
+    assert not orders.pending(SYMBOL)
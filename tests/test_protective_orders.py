@@ -0,0 +1,125 @@
+import threading
+from src.application.protective_orders import ProtectiveOrders
+from src.domain.trading.exit_rules import resolve_params
+
+SYMBOL = "BTC/USDT:USDT"
+
+
+class FakeRepo:
+    def __init__(self):
+        self.saved = {}
+
+    def load_state_value(self, key, default=None):
+        return self.saved.get(key, default)
+
+    def save_state_value(self, key, value):
+        self.saved[key] = value
+
+
+class BlockingClient:
+    """Live client whose amend hangs until released, like a stuck REST call."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.amending = threading.Event()
+        self.amends = []
+
+    def create_protective_orders(self, symbol, side, amount, stop_price, tp_price):
+        return "algo-1"
+
+    def amend_protective_orders(self, symbol, algo_id, stop_price=None, tp_price=None, amount=None):
+        self.amending.set()
+        self.release.wait(5)
+        self.amends.append((symbol, stop_price, amount))
+
+    def fetch_protective_order(self, symbol, algo_id):
+        return {"state": "live"}
+
+    def cancel_protective_orders(self, symbol, algo_id):
+        pass
+
+
+def make_trade(**changes):
+    trade = {"symbol": SYMBOL, "side": "LONG", "entry": 100.0, "amount": 1.0,
+             "best_price": 100.0, "atr": 1.0, "breakeven_active": False}
+    trade.update(changes)
+    return trade
+
+
+def make_orders(client, amend_interval=0):
+    orders = ProtectiveOrders(client, FakeRepo(), resolve_params(), paper=False,
+                              amend_interval=amend_interval)
+    orders.place(SYMBOL, make_trade())
+    return orders
+
+
+def test_update_only_records_targets():
+    client = BlockingClient()
+    orders = make_orders(client)
+    orders.update(SYMBOL, make_trade(amount=2.0))
+    assert client.amends == []
+    assert orders.dirty[SYMBOL]["amount"] == 2.0
+    assert SYMBOL in orders.urgent
+
+
+def test_blocking_amend_does_not_hold_trade_lock():
+    client = BlockingClient()
+    orders = make_orders(client)
+    trade_lock = threading.RLock()
+    orders.update(SYMBOL, make_trade(amount=2.0))
+    orders.start()
+    try:
+        assert client.amending.wait(2)
+        # The amend is stuck on the exchange; an exit-engine tick still gets through
+        acquired = threading.Event()
+
+        def tick():
+            with trade_lock:
+                orders.update(SYMBOL, make_trade(amount=2.0, best_price=120.0, breakeven_active=True))
+                acquired.set()
+        worker = threading.Thread(target=tick)
+        worker.start()
+        assert acquired.wait(1)
+        worker.join(1)
+        assert orders.snapshot()[SYMBOL]["amount"] == 1.0
+    finally:
+        client.release.set()
+        orders.stop()
+    assert client.amends[0] == (SYMBOL, None, 2.0)
+    assert orders.snapshot()[SYMBOL]["amount"] == 2.0
+
+
+def test_trailing_moves_wait_for_interval():
+    client = BlockingClient()
+    client.release.set()
+    orders = make_orders(client, amend_interval=3600)
+    orders.update(SYMBOL, make_trade(best_price=120.0, breakeven_active=True))
+    assert orders.send_amends() == 0
+    orders.update(SYMBOL, make_trade(amount=3.0))
+    assert orders.send_amends() == 1
+    assert orders.dirty == {}
+
+
+def test_failed_amend_is_retried():
+    client = BlockingClient()
+    client.release.set()
+    orders = make_orders(client)
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(args)
+        raise RuntimeError("timeout")
+    client.amend_protective_orders = failing
+    orders.update(SYMBOL, make_trade(amount=2.0))
+    orders.send_amends()
+    assert len(calls) == 1
+    assert orders.dirty[SYMBOL]["amount"] == 2.0
+
+
+def test_cancel_drops_pending_amend():
+    client = BlockingClient()
+    orders = make_orders(client)
+    orders.update(SYMBOL, make_trade(amount=2.0))
+    orders.cancel(SYMBOL)
+    assert orders.send_amends() == 0
+    assert client.amends == []
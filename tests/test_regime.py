@@ -0,0 +1,74 @@
+import src.domain.analysis.regime as regime_module
+from src.domain.analysis.regime import RegimeService, DAY_MS, STATE_KEY
+
+ASSET = "BTC/USDT:USDT"
+START = 1_700_006_400_000 // DAY_MS * DAY_MS
+
+
+class FakeClock:
+    def __init__(self, now_ms):
+        self.now = now_ms
+
+    def now_ms(self):
+        return self.now
+
+
+class DailyClient:
+    """30 days of rising closes followed by 30 falling ones."""
+
+    def __init__(self):
+        closes = [100 + i for i in range(30)] + [129 - 2 * i for i in range(30)]
+        self.bars = [[START + i * DAY_MS, c, c, c, c, 1.0] for i, c in enumerate(closes)]
+
+    def fetch_ohlcv(self, symbol, timeframe="1d", limit=100, since=None):
+        now = regime_module.clock.now_ms()
+        # Like the exchange (and the replay client): nothing past the clock
+        bars = [b for b in self.bars if b[0] <= now and (since is None or b[0] >= since)]
+        return bars[:limit] if since is not None else bars[-limit:]
+
+
+class FakeRepo:
+    def __init__(self, saved):
+        self.values = {STATE_KEY: saved}
+
+    def load_state_value(self, key, default=None):
+        return self.values.get(key, default)
+
+    def save_state_value(self, key, value):
+        self.values[key] = value
+
+
+def day(i):
+    return START + i * DAY_MS + 60_000
+
+
+def test_replay_ignores_persisted_state(monkeypatch):
+    monkeypatch.setattr(regime_module, "clock", FakeClock(day(30)))
+    # A live run's state, taken at the end of the falling leg
+    live = {ASSET: {"last_ts": START + 58 * DAY_MS, "ema": 120.0, "close": 71.0}}
+    repo = FakeRepo(live)
+    service = RegimeService(DailyClient(), length=10, persist=False)
+    service.bind_repo(repo)
+
+    assert service.get_regime(ASSET) == "BULL"
+    assert repo.values[STATE_KEY] == live  # Never overwritten by the replay
+
+
+def test_state_from_the_future_is_rebuilt(monkeypatch):
+    monkeypatch.setattr(regime_module, "clock", FakeClock(day(30)))
+    service = RegimeService(DailyClient(), length=10)
+    service.bind_repo(FakeRepo(
+        {ASSET: {"last_ts": START + 58 * DAY_MS, "ema": 120.0, "close": 71.0}}))
+
+    assert service.get_regime(ASSET) == "BULL"
+    assert service.states[ASSET]["last_ts"] == START + 29 * DAY_MS
+
+
+def test_advances_with_the_clock(monkeypatch):
+    fake = FakeClock(day(30))
+    monkeypatch.setattr(regime_module, "clock", fake)
+    service = RegimeService(DailyClient(), length=10, persist=False)
+    assert service.get_regime(ASSET) == "BULL"
+    fake.now = day(45)
+    assert service.get_regime(ASSET) == "BEAR"
+    assert service.states[ASSET]["last_ts"] == START + 44 * DAY_MS
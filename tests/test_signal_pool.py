@@ -0,0 +1,58 @@
+import time
+import numpy as np
+import pandas as pd
+from src.domain.analysis import signal_pool
+from src.domain.analysis.signal_pool import SignalBatch, SignalExecutor
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+def frame(n=60):
+    close = np.linspace(100, 110, n)
+    return pd.DataFrame({"timestamp": np.arange(n) * 900_000, "open": close, "high": close,
+                         "low": close, "close": close, "volume": 1.0, "Funding": 0.0})
+
+
+def test_deadlines_follow_the_shared_clock(monkeypatch):
+    fake = FakeClock(1000.0)
+    monkeypatch.setattr(signal_pool, "clock", fake)
+    executor = SignalExecutor(max_workers=1, timeout=5)
+    try:
+        batch = executor.submit({"A/USDT:USDT": frame(), "B/USDT:USDT": frame()})
+        # Both pinned to the only worker: the second waits one slot longer
+        assert sorted(batch.deadlines.values()) == [1005.0, 1010.0]
+        fake.now = 2000.0
+        assert batch.done()
+    finally:
+        executor.shutdown()
+
+
+def test_timed_out_worker_is_replaced(monkeypatch):
+    fake = FakeClock(0.0)
+    monkeypatch.setattr(signal_pool, "clock", fake)
+    executor = SignalExecutor(max_workers=1, timeout=5)
+    try:
+        pool = executor._get_pool(0)
+        stuck = pool.submit(time.sleep, 60)
+        while not stuck.running():
+            time.sleep(0.01)
+        batch = SignalBatch({"A/USDT:USDT": stuck}, {"A/USDT:USDT": 5.0},
+                            lambda symbol: executor._recycle(0, pool))
+        assert not batch.done()
+
+        fake.now = 6.0
+        assert batch.done()
+        assert batch.results() == []
+        assert executor.pools[0] is None
+        # The stuck call's worker is gone, not left running in the background
+        assert stuck.exception(timeout=30) is not None
+        assert executor.run(abs, -3).result(timeout=60) == 3
+        assert executor.pools[0] is not pool
+    finally:
+        executor.shutdown()
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from src.infrastructure.persistence.postgres_repo import Trade, EquityHistory
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def add_closed_trades(repo):
+    """30 closed trades, every third a legacy row with no closed_at."""
+    rows = []
+    for i in range(30):
+        created = START + timedelta(hours=i)
+        legacy = i % 3 == 0
+        rows.append({"symbol": f"SYM{i}/USDT:USDT", "side": "LONG", "entry": 1.0, "amount": 1.0,
+                     "status": "CLOSED", "pnl": float(i), "created_at": created,
+                     "closed_at": None if legacy else created + timedelta(minutes=30)})
+    # Two trades closing at the same instant: the id breaks the tie
+    rows.append(dict(rows[1], symbol="TIE/USDT:USDT"))
+    with repo.engine.begin() as conn:
+        conn.execute(Trade.__table__.insert(), rows)
+        conn.execute(Trade.__table__.insert(), [{"symbol": "OPEN/USDT:USDT", "status": "OPEN",
+                                                 "created_at": START}])
+
+
+def test_pages_cover_every_closed_trade_once(sqlite_repo):
+    add_closed_trades(sqlite_repo)
+    everything = list(sqlite_repo.iter_closed_trades())
+    assert len(everything) == 31
+    assert sum(1 for t in everything if t["closed_at"] is None) == 10
+
+    paged, after_id = [], None
+    while True:
+        page = list(sqlite_repo.iter_closed_trades(after_id=after_id, limit=4))
+        if not page:
+            break
+        paged.extend(page)
+        after_id = page[-1]["id"]
+    assert [t["id"] for t in paged] == [t["id"] for t in everything]
+    # Legacy rows sort by when they opened
+    order = [t["closed_at"] or t["created_at"] for t in everything]
+    assert order == sorted(order)
+
+
+def test_start_date_includes_legacy_rows(sqlite_repo):
+    add_closed_trades(sqlite_repo)
+    since = (START + timedelta(hours=24)).replace(tzinfo=None).isoformat()
+    rows = list(sqlite_repo.iter_closed_trades(since))
+    assert [t["symbol"] for t in rows] == [f"SYM{i}/USDT:USDT" for i in range(24, 30)]
+
+
+def test_unknown_cursor_raises_before_iterating(sqlite_repo):
+    with pytest.raises(ValueError):
+        sqlite_repo.iter_closed_trades(after_id=12345)
+    assert sqlite_repo.engine.pool.checkedout() == 0
+
+
+class CountingSessions:
+    """Session factory that tracks how many sessions are open."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.open = 0
+
+    def __call__(self):
+        session = self.factory()
+        self.open += 1
+        close = session.close
+
+        def counted_close():
+            self.open -= 1
+            close()
+        session.close = counted_close
+        return session
+
+
+@pytest.mark.parametrize("reader", ["iter_closed_trades", "iter_equity_history", "iter_equity_series"])
+def test_streams_open_no_session_until_iterated(sqlite_repo, reader):
+    add_closed_trades(sqlite_repo)
+    with sqlite_repo.engine.begin() as conn:
+        conn.execute(EquityHistory.__table__.insert(), [
+            {"timestamp": datetime.now(timezone.utc) - timedelta(seconds=10 * i),
+             "balance": 1.0, "equity": 1.0, "total_pnl": 0.0} for i in range(5)])
+    sessions = sqlite_repo.Session = CountingSessions(sqlite_repo.Session)
+    pool = sqlite_repo.engine.pool
+
+    never_iterated = getattr(sqlite_repo, reader)()  # e.g. a dropped streaming response
+    assert sessions.open == 0
+
+    rows = getattr(sqlite_repo, reader)()
+    next(rows)
+    assert sessions.open == 1 and pool.checkedout() == 1
+    rows.close()
+    assert sessions.open == 0 and pool.checkedout() == 0
+    del never_iterated
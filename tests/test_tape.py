@@ -0,0 +1,61 @@
+import time
+import zlib
+from src.infrastructure.exchange.tape import TapeWriter, TapeReader
+
+
+def gzip_members(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    members = 0
+    while data:
+        d = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        d.decompress(data)
+        data = d.unused_data
+        members += 1
+    return members
+
+
+def segment_paths(directory):
+    return TapeReader(directory).segments()
+
+
+def test_records_are_batched_until_flush_interval(tmp_path):
+    writer = TapeWriter(str(tmp_path), flush_seconds=0.3, flush_kb=1024)
+    for i in range(200):
+        writer.record("fetch_ticker", [f"SYM{i}"], {"last": i})
+        if i % 20 == 0:
+            time.sleep(0.01)
+    time.sleep(0.05)
+    assert segment_paths(str(tmp_path)) == []  # Still buffered
+
+    time.sleep(0.5)
+    paths = segment_paths(str(tmp_path))
+    assert len(paths) == 1
+    assert gzip_members(paths[0]) == 1
+    assert writer.written == 200
+    writer.close()
+
+
+def test_byte_threshold_flushes_early(tmp_path):
+    writer = TapeWriter(str(tmp_path), flush_seconds=60, flush_kb=4)
+    for i in range(500):
+        writer.record("fetch_ticker", ["BTC/USDT:USDT"], {"last": i, "pad": "x" * 40})
+    time.sleep(0.3)
+    assert writer.written > 0
+    writer.close()
+
+    path = segment_paths(str(tmp_path))[0]
+    assert gzip_members(path) > 1
+    assert writer.written == 500
+
+
+def test_close_flushes_pending_batch(tmp_path):
+    writer = TapeWriter(str(tmp_path), flush_seconds=60)
+    writer.record("fetch_ticker", ["BTC/USDT:USDT"], {"last": 1})
+    writer.record("fetch_ticker", ["ETH/USDT:USDT"], error="timeout")
+    writer.close()
+
+    records = list(TapeReader(str(tmp_path)).records())
+    assert [r["a"] for r in records] == [["BTC/USDT:USDT"], ["ETH/USDT:USDT"]]
+    assert records[1]["e"] == "timeout"
+    assert not writer.thread.is_alive()
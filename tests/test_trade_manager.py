@@ -0,0 +1,85 @@
+import threading
+import src.infrastructure.persistence.state as state_module
+from src.infrastructure.persistence.state import TradeManager
+
+
+class FakeRepo:
+    def __init__(self):
+        self.values = {}
+        self.closed = []
+        self.equity = []
+
+    def load_trades(self):
+        return {}
+
+    def load_state_value(self, key, default=None):
+        return self.values.get(key, default)
+
+    def save_state_value(self, key, value):
+        self.values[key] = value
+
+    def save_trade(self, trade):
+        pass
+
+    def close_trade(self, symbol, pnl, exit_reason):
+        self.closed.append(symbol)
+
+    def log_equity(self, balance, equity, total_pnl):
+        self.equity.append((balance, equity, total_pnl))
+
+
+class ClosingTickers:
+    """Ticker source that lets the exit engine close a position mid-sync."""
+
+    def __init__(self, close):
+        self.close = close
+
+    def fetch_ticker(self, symbol):
+        self.close()
+        return {"last": 110.0}
+
+
+def make_manager(monkeypatch, tickers=None):
+    monkeypatch.setattr(state_module, "get_repository", FakeRepo)
+    monkeypatch.setattr(state_module, "USE_WRITE_BEHIND", False)
+    manager = TradeManager(exchange_client=object(), tickers=tickers)
+    for symbol in ("BTC/USDT:USDT", "ETH/USDT:USDT", "SOL/USDT:USDT"):
+        manager.add_trade(symbol, {"symbol": symbol, "side": "LONG",
+                                   "entry": 100.0, "amount": 1.0})
+    return manager
+
+
+def close_from_other_thread(manager, symbol):
+    worker = threading.Thread(target=manager.remove_trade, args=(symbol, 1.0, "STOP_LOSS"))
+    worker.start()
+    worker.join()
+
+
+def test_sync_balance_survives_concurrent_close(monkeypatch):
+    closes = iter(["SOL/USDT:USDT", "ETH/USDT:USDT"])
+    tickers = ClosingTickers(lambda: close_from_other_thread(manager, next(closes, "none")))
+    manager = make_manager(monkeypatch, tickers)
+
+    balance, equity = manager.sync_balance()
+
+    assert list(manager.state["trades"]) == ["BTC/USDT:USDT"]
+    assert manager.repo.closed == ["SOL/USDT:USDT", "ETH/USDT:USDT"]
+    # Prices of the positions open when the sync started
+    assert equity == balance + 30.0
+
+
+def test_circuit_breaker_survives_concurrent_close(monkeypatch):
+    manager = make_manager(monkeypatch)
+
+    class ClosingTrade(dict):
+        def get(self, key, default=None):
+            close_from_other_thread(manager, "ETH/USDT:USDT")
+            return super().get(key, default)
+
+    manager.state["trades"]["BTC/USDT:USDT"] = ClosingTrade(
+        manager.state["trades"]["BTC/USDT:USDT"], unrealized_pnl=-0.01)
+
+    triggered, pnl_pct = manager.check_circuit_breaker()
+
+    assert "ETH/USDT:USDT" not in manager.state["trades"]
+    assert not triggered
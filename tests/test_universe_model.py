@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+from src.domain.analysis import universe_model as universe_module
+from src.domain.analysis.universe_model import UniverseModel
+
+
+class HeldExecutor:
+    """Takes work like SignalExecutor.run but only runs it when release() is called."""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, fn, *args):
+        future = Future()
+        self.calls.append((future, fn, args))
+        return future
+
+    def release(self):
+        future, fn, args = self.calls.pop(0)
+        future.set_result(fn(*args))
+
+
+def frames(seed, symbols=4, bars=150):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for i in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        out[f"S{i}/USDT:USDT"] = pd.DataFrame({
+            "timestamp": np.arange(bars) * 900_000,
+            "open": close, "high": close * 1.005, "low": close * 0.995,
+            "close": close, "volume": rng.uniform(100, 200, bars), "Funding": 0.0001,
+        })
+    return out
+
+
+def test_retraining_runs_in_the_executor_and_old_model_keeps_serving(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(universe_module.clock, "monotonic", lambda: now[0])
+    model = UniverseModel(retrain_minutes=60)
+    executor = HeldExecutor()
+
+    # First fit is handed off: nothing to serve until it lands
+    assert model.evaluate(frames(1), executor) == {}
+    assert model.model is None and len(executor.calls) == 1
+    # A scan while the fit is running does not start another one
+    model.evaluate(frames(1), executor)
+    assert len(executor.calls) == 1
+    executor.release()
+    first = model.model
+    assert first is not None and model.training is None
+    assert model.evaluate(frames(1), executor).keys() == frames(1).keys()
+
+    # Retrain due: the previous model serves until the new fit completes
+    now[0] = 3600.0
+    served = model.evaluate(frames(2), executor)
+    assert model.model is first and len(executor.calls) == 1
+    assert served.keys() == frames(2).keys()
+    executor.release()
+    assert model.model is not first
+    assert model.trained_at == 3600.0
+    assert not model.needs_training()
+
+
+def test_failed_fit_keeps_old_model_and_retries(monkeypatch):
+    monkeypatch.setattr(universe_module.clock, "monotonic", lambda: 0.0)
+    model = UniverseModel(retrain_minutes=60)
+    executor = HeldExecutor()
+    model.evaluate(frames(1), executor)
+    future, _, _ = executor.calls.pop()
+    future.set_exception(RuntimeError("worker died"))
+
+    assert model.model is None and model.training is None
+    assert model.needs_training()
+    model.evaluate(frames(1), executor)
+    assert len(executor.calls) == 1
+
+
+def test_without_executor_trains_inline():
+    model = UniverseModel()
+    assert model.evaluate(frames(1)).keys() == frames(1).keys()
@@ -0,0 +1,135 @@
+import pytest
+from src.infrastructure.persistence.write_behind import WriteBehindQueue
+
+
+class FakeRepo:
+    """In-memory stand-in for PostgresRepository's batch and read paths."""
+
+    def __init__(self):
+        self.rows = []  # Trade rows, in insert order
+        self.state = {}
+        self.equity = []
+        self.batches = []
+        self.fail_next = 0
+
+    def apply_batch(self, ops):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise RuntimeError("connection lost")
+        self.batches.append(list(ops))
+        for name, args in ops:
+            getattr(self, f"_{name}")(*args)
+
+    def _save_trade(self, data):
+        row = self._open_row(data["symbol"])
+        if row is None:
+            row = {"symbol": data["symbol"], "status": "OPEN", "created_at": data["created_at"]}
+            self.rows.append(row)
+        row.update({k: v for k, v in data.items() if k != "created_at"})
+
+    def _close_trade(self, symbol, pnl, exit_reason, closed_at):
+        row = self._open_row(symbol)
+        if row:
+            row.update(status="CLOSED", pnl=pnl, exit_reason=exit_reason, closed_at=closed_at)
+
+    def _save_state_value(self, key, value):
+        self.state[key] = value
+
+    def _log_equity(self, balance, equity, total_pnl, timestamp):
+        self.equity.append((balance, equity, total_pnl, timestamp))
+
+    def _open_row(self, symbol):
+        return next((r for r in self.rows if r["symbol"] == symbol and r["status"] == "OPEN"), None)
+
+    def load_trades(self):
+        return {r["symbol"]: dict(r) for r in self.rows if r["status"] == "OPEN"}
+
+    def load_state_value(self, key, default=None):
+        return self.state.get(key, default)
+
+
+@pytest.fixture
+def queue():
+    # An hour between background flushes: tests flush by hand
+    queue = WriteBehindQueue(FakeRepo(), flush_seconds=3600)
+    yield queue
+    queue.close()
+
+
+def trade(symbol="BTC/USDT:USDT", **changes):
+    return {"symbol": symbol, "side": "LONG", "entry": 100.0, "amount": 1.0, **changes}
+
+
+def test_repeated_writes_merge_by_key(queue):
+    queue.save_trade(trade(best_price=101.0))
+    first_created = next(iter(queue.pending.values()))[1][0]["created_at"]
+    queue.save_trade(trade(best_price=105.0))
+    queue.save_state_value("total_pnl", 1.0)
+    queue.save_state_value("total_pnl", 2.0)
+    queue.log_equity(10.0, 11.0, 1.0)
+    queue.log_equity(10.0, 12.0, 1.0)
+
+    assert queue.backlog() == 4  # One trade, one state key, two equity rows
+    assert queue.flush() == 4
+    [batch] = queue.repo.batches
+    saved = [args[0] for name, args in batch if name == "save_trade"]
+    assert saved == [dict(trade(best_price=105.0), created_at=first_created)]
+    assert queue.repo.state["total_pnl"] == 2.0
+    assert len(queue.repo.equity) == 2
+
+
+def test_close_bumps_generation(queue):
+    queue.save_trade(trade(entry=100.0))
+    queue.close_trade("BTC/USDT:USDT", 5.0, "TAKE_PROFIT")
+    # Reopened in the same flush window: a new row, not the closed one
+    queue.save_trade(trade(entry=90.0))
+    queue.flush()
+
+    rows = queue.repo.rows
+    assert [(r["entry"], r["status"]) for r in rows] == [(100.0, "CLOSED"), (90.0, "OPEN")]
+    assert rows[0]["pnl"] == 5.0
+
+
+def test_failed_batch_is_merged_back(queue):
+    queue.save_trade(trade(best_price=101.0))
+    queue.save_state_value("paper_balance", 10.0)
+    queue.repo.fail_next = 1
+    with pytest.raises(RuntimeError):
+        queue.flush()
+    assert queue.failures == 1
+    assert queue.backlog() == 2
+
+    # A newer write of the same key replaces the one that failed
+    queue.save_state_value("paper_balance", 12.0)
+    assert queue.flush() == 2
+    assert queue.repo.state["paper_balance"] == 12.0
+    assert queue.repo.rows[0]["best_price"] == 101.0
+
+
+def test_close_flushes_pending_writes(queue):
+    queue.save_trade(trade())
+    queue.log_equity(10.0, 10.0, 0.0)
+    queue.close()
+
+    assert not queue.thread.is_alive()
+    assert queue.backlog() == 0
+    assert list(queue.repo.load_trades()) == ["BTC/USDT:USDT"]
+    assert len(queue.repo.equity) == 1
+
+
+def test_reads_see_pending_writes(queue):
+    queue.save_trade(trade())
+    assert list(queue.load_trades()) == ["BTC/USDT:USDT"]
+    queue.close_trade("BTC/USDT:USDT", 1.0, "STOP_LOSS")
+    assert queue.load_trades() == {}
+    queue.save_state_value("total_pnl", 3.0)
+    assert queue.load_state_value("total_pnl") == 3.0
+
+
+def test_read_falls_back_to_stored_rows_when_flush_fails(queue):
+    queue.save_trade(trade())
+    queue.flush()
+    queue.save_trade(trade("ETH/USDT:USDT"))
+    queue.repo.fail_next = 1
+    assert list(queue.load_trades()) == ["BTC/USDT:USDT"]
+    assert queue.backlog() == 1